@@ -0,0 +1,202 @@
+"""
+Status poll latency while large uploads are in flight on the same event loop. The app is driven
+in process over ASGI; S3 and ECS are a local stub server with a fixed network delay, the batch
+DB is SQLite and both callers are already in the credential cache, so polls are served from the
+status cache and only measure how long they wait for the event loop.
+
+Three setups are compared:
+  blocking     - the upload route runs the handler on the event loop, as the routes used to
+  threads      - blocking calls and parsing on the I/O thread pool (UPLOAD_PARSE_PROCESSES=0)
+  processes    - blocking calls on the I/O thread pool, parsing in the process pool
+
+Usage: python -m benchmarks.api_concurrency_benchmark [uploads] [rows_per_upload]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_DELAY_SECONDS = 0.05
+
+
+class _AwsStub(BaseHTTPRequestHandler):
+    """
+    Accepts any S3 PutObject, multipart upload or ECS call after STUB_DELAY_SECONDS.
+    """
+
+    def _respond(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(STUB_DELAY_SECONDS)
+        content_type, body = "application/x-amz-json-1.1", b""
+        if self.command == "POST" and "?uploads" in self.path:
+            content_type = "application/xml"
+            body = b"<InitiateMultipartUploadResult><UploadId>stub</UploadId></InitiateMultipartUploadResult>"
+        elif self.command == "POST" and "uploadId=" in self.path:
+            content_type, body = "application/xml", b"<CompleteMultipartUploadResult></CompleteMultipartUploadResult>"
+        elif self.command == "POST":
+            body = b"{}"
+        self.send_response(200)
+        self.send_header("ETag", '"stub"')
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_POST = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+# Read by Configuration on import, and inherited by the spawned parsing processes
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_REGION_NAME": "ap-south-1",
+    "AWS_BUCKET": "benchmark-bucket",
+    "ECS_CLUSTER": "benchmark",
+    "ECS_CONTAINER_NAME": "benchmark",
+    "ECS_TASK_DEFINITION": "batch",
+    "TASK_ROLE_ARN": "arn:aws:iam::000000000000:role/benchmark",
+    "EXCEL_SIZE_LIMIT": str(512 * 1024 * 1024),
+    "DB_WARM_UP": "false",
+})
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, File, Form, Request, Response, UploadFile  # noqa: E402
+
+import routes  # noqa: E402
+from dependencies.authenticator import Authenticator  # noqa: E402
+from dependencies.configuration import Configuration  # noqa: E402
+from dependencies.managers.database_manager import DatabaseManager  # noqa: E402
+from handlers.batch_request_handler import BatchRequestHandler  # noqa: E402
+from models.batch_request import Base  # noqa: E402
+from models.dispatch_outbox import IeDispatchOutbox  # noqa: E402
+from utility.executors import Executors  # noqa: E402
+from utility.status_cache import StatusCache  # noqa: E402
+from utility.upload_validator import StreamingUploadValidator  # noqa: E402
+
+AUTH_TOKEN = "YmVuY2htYXJrOmJlbmNobWFyaw=="
+HEADERS = {"Authorization": f"Basic {AUTH_TOKEN}"}
+POLLED_REQUEST_ID = "benchmark-request"
+POLL_INTERVAL_SECONDS = 0.01
+
+
+def build_app(blocking_uploads: bool) -> FastAPI:
+    app = FastAPI()
+    if not blocking_uploads:
+        app.include_router(routes.api_router)
+        return app
+
+    @app.post("/v1/request")
+    async def blocking_batch_request(
+        request: Request, response: Response, client_ref_id: str = Form(), file: UploadFile = File(...)
+    ):
+        # The handler called straight from the async route, as before
+        return routes.with_batch_session(
+            BatchRequestHandler.handle_batch_request, 1, client_ref_id, "blocking", "csv", file, "Dev"
+        )
+
+    app.add_api_route("/v1/status/{request_id}", routes.batch_status, methods=["GET"])
+    return app
+
+
+def build_csv(rows: int) -> bytes:
+    lines = ["pan,client_ref_id"]
+    for row in range(rows):
+        lines.append(f"ABCDE{row % 10000:04d}{chr(65 + row // 10000 % 26)},ref{row}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def run(label: str, app: FastAPI, uploads: int, body: bytes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=600) as client:
+        async def upload(number: int):
+            response = await client.post(
+                "/v1/request", headers=HEADERS, data={"client_ref_id": f"ref{number}", "file_extension": "csv"},
+                files={"file": ("batch.csv", body, "text/csv")}
+            )
+            assert response.status_code == 200, response.text
+
+        latencies = []
+
+        async def poll(scheduled: float):
+            response = await client.get(f"/v1/status/{POLLED_REQUEST_ID}", headers=HEADERS)
+            assert response.status_code == 200, response.text
+            # Measured from when the poll was due, so time spent waiting for a blocked loop counts
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+
+        async def poll_on_schedule(done: asyncio.Event):
+            polls, first = [], time.perf_counter()
+            while not done.is_set():
+                scheduled = first + len(polls) * POLL_INTERVAL_SECONDS
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                polls.append(asyncio.create_task(poll(scheduled)))
+            await asyncio.gather(*polls)
+
+        done = asyncio.Event()
+        poller = asyncio.create_task(poll_on_schedule(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(number) for number in range(uploads)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await poller
+
+    latencies.sort()
+    print(
+        f"{label:<10} {uploads} uploads in {elapsed:6.2f}s | {len(latencies):5d} polls  "
+        f"p50 {latencies[len(latencies) // 2]:8.2f} ms  p99 {latencies[int(len(latencies) * 0.99) - 1]:8.2f} ms  "
+        f"max {latencies[-1]:8.2f} ms"
+    )
+
+
+def main():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    # Started here, not on import, as every spawned parsing process imports this module again
+    stub_server = ThreadingHTTPServer(("127.0.0.1", 0), _AwsStub)
+    threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+    stub_url = f"http://127.0.0.1:{stub_server.server_address[1]}"
+    os.environ.update({"AWS_ENDPOINT_URL_S3": stub_url, "AWS_ENDPOINT_URL_ECS": stub_url})
+
+    Configuration.BATCH_DB_CONNECTION_URL = f"sqlite:///{tempfile.mkdtemp(prefix='api_concurrency_benchmark_')}/"
+    Configuration.IE_DB = "ie.db"
+    batch_engine = DatabaseManager().engine(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    Base.metadata.create_all(batch_engine)
+    IeDispatchOutbox.__table__.create(batch_engine)
+    # Requests to http://benchmark are served as Dev
+    Configuration.init_config("Dev")
+    for service_id in (None, 43):
+        Authenticator._cache.set(Authenticator.cache_key(AUTH_TOKEN, service_id), 1, 3600)
+    Configuration.STATUS_CACHE_TTL_SECONDS = 3600
+    StatusCache.put(POLLED_REQUEST_ID, {"request_id": POLLED_REQUEST_ID, "status": "Inprogress"}, None)
+
+    body = build_csv(rows)
+    print(f"{uploads} concurrent uploads of {rows} rows ({len(body) / 1e6:.1f} MB), {STUB_DELAY_SECONDS * 1000:.0f} ms stub latency")
+
+    Configuration.UPLOAD_PARSE_PROCESSES = 0
+    asyncio.run(run("blocking", build_app(blocking_uploads=True), uploads, body))
+    asyncio.run(run("threads", build_app(blocking_uploads=False), uploads, body))
+
+    Configuration.UPLOAD_PARSE_PROCESSES = max(2, uploads)
+    # Start every parsing process and run one small validation in each before measuring
+    with tempfile.NamedTemporaryFile(suffix=".csv") as warm_up_file:
+        warm_up_file.write(build_csv(10))
+        warm_up_file.flush()
+        list(Executors.cpu().map(time.sleep, [0.5] * Configuration.UPLOAD_PARSE_PROCESSES))
+        list(Executors.cpu().map(
+            StreamingUploadValidator.validate_file, *zip(*[
+                (warm_up_file.name, "csv", {"pan"}, Configuration.AWS_BUCKET, f"warm-up/{number}.parquet")
+                for number in range(Configuration.UPLOAD_PARSE_PROCESSES)
+            ])
+        ))
+    asyncio.run(run("processes", build_app(blocking_uploads=False), uploads, body))
+    Executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
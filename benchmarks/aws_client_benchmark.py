@@ -0,0 +1,72 @@
+"""
+Per request cost of AWS client handling: a new boto3 client per call, as the handlers used to do,
+vs the shared AwsClients registry. Presigning is local signing, so the numbers are pure client
+construction and credential lookup overhead; the ECS case stubs list_task_definitions and adds the
+task definition TTL cache on top.
+
+Usage: python -m benchmarks.aws_client_benchmark [requests]
+"""
+import os
+import sys
+import time
+
+import boto3
+from botocore.stub import Stubber
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("AWS_REGION_NAME", "ap-south-1")
+
+from dependencies.configuration import Configuration  # noqa: E402
+from handlers.ecs_run_task_handler import ECSRunTaskHandler  # noqa: E402
+from utility.aws_clients import AwsClients  # noqa: E402
+
+PRESIGN_PARAMS = {"Bucket": "benchmark-bucket", "Key": "request/input/request.csv"}
+TASK_DEFINITION_ARN = "arn:aws:ecs:ap-south-1:000000000000:task-definition/batch:42"
+
+
+def presign_new_client():
+    client = boto3.client("s3", region_name=Configuration.AWS_REGION_NAME)
+    client.generate_presigned_url("get_object", Params=PRESIGN_PARAMS, ExpiresIn=86400)
+
+
+def presign_shared_client():
+    AwsClients.client("s3").generate_presigned_url("get_object", Params=PRESIGN_PARAMS, ExpiresIn=86400)
+
+
+def resolve_task_definition(ecs_client):
+    stubber = Stubber(ecs_client)
+    stubber.add_response("list_task_definitions", {"taskDefinitionArns": [TASK_DEFINITION_ARN]})
+    with stubber:
+        return ECSRunTaskHandler._ECSRunTaskHandler__get_latest_task_definition(ecs_client, "batch")
+
+
+def resolve_new_client_uncached():
+    ECSRunTaskHandler._task_definition_cache.clear()
+    resolve_task_definition(boto3.client("ecs", region_name=Configuration.AWS_REGION_NAME))
+
+
+def resolve_shared_client_cached():
+    resolve_task_definition(AwsClients.client("ecs"))
+
+
+def measure(label: str, func, requests: int):
+    func()
+    started = time.perf_counter()
+    for _ in range(requests):
+        func()
+    per_request_ms = (time.perf_counter() - started) * 1000 / requests
+    print(f"{label:<40} {per_request_ms:8.3f} ms/request")
+    return per_request_ms
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    before = measure("presign, new client per call", presign_new_client, requests)
+    after = measure("presign, shared client", presign_shared_client, requests)
+    print(f"{'saved per presign':<40} {before - after:8.3f} ms")
+
+    before = measure("ECS launch, new client + list call", resolve_new_client_uncached, requests)
+    after = measure("ECS launch, shared client + TTL cache", resolve_shared_client_cached, requests)
+    print(f"{'saved per ECS launch (excl. network)':<40} {before - after:8.3f} ms")
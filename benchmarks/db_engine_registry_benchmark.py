@@ -0,0 +1,86 @@
+"""
+Per request database cost of the API: a new engine per request that is disposed when the request
+ends, as DatabaseManager used to behave, vs the process wide engine registry with its pooled
+connections. Both databases are SQLite files behind a connect hook that sleeps for the connection
+setup time of a real MySQL server (TCP + TLS + auth), default 20 ms.
+
+Usage: python -m benchmarks.db_engine_registry_benchmark [requests] [connect_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from dependencies.configuration import Configuration
+from dependencies.managers.database_manager import DatabaseManager
+
+CONNECT_SECONDS = 0.02
+connections_opened = 0
+
+
+@event.listens_for(Engine, "do_connect")
+def _slow_connect(dialect, conn_rec, cargs, cparams):
+    global connections_opened
+    connections_opened += 1
+    time.sleep(CONNECT_SECONDS)
+
+
+def request_with_new_engines(databases):
+    # Old behaviour: engines built per request and disposed in close_sessions
+    engines = [
+        create_engine(
+            db_url + schema, pool_recycle=3600, pool_size=Configuration.DB_POOL_SIZE,
+            max_overflow=Configuration.DB_MAX_OVERFLOW, pool_timeout=150
+        )
+        for db_url, schema in databases
+    ]
+    for engine in engines:
+        with Session(engine, future=True) as db_session:
+            db_session.execute(text("SELECT 1"))
+    for engine in engines:
+        engine.dispose()
+
+
+def request_with_registry(databases):
+    db_manager = DatabaseManager()
+    for db_url, schema in databases:
+        with db_manager.get_db(db_url, schema) as db_session:
+            db_session.execute(text("SELECT 1"))
+
+
+def measure(label: str, func, databases, requests: int):
+    global connections_opened
+    func(databases)
+    connections_opened = 0
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        func(databases)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(
+        f"{label:<32} mean {sum(latencies) / requests:7.2f} ms  p50 {latencies[requests // 2]:7.2f} ms  "
+        f"p99 {latencies[int(requests * 0.99) - 1]:7.2f} ms  connections opened {connections_opened}"
+    )
+    return sum(latencies) / requests
+
+
+def main():
+    global CONNECT_SECONDS
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    CONNECT_SECONDS = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    directory = tempfile.mkdtemp(prefix="db_registry_benchmark_")
+    databases = [(f"sqlite:///{os.path.join(directory, '')}", schema) for schema in ("ie.db", "cs.db")]
+
+    before = measure("engine per request + dispose", request_with_new_engines, databases, requests)
+    after = measure("process wide engine registry", request_with_registry, databases, requests)
+    print(f"speedup {before / after:.1f}x over {requests} requests, {CONNECT_SECONDS * 1000:.0f} ms connection setup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Rows per second of RowExecutor at increasing concurrency. The downstream API is a local stub server
+process that answers every POST after a fixed delay, default 50 ms; the batch DB is a SQLite file per
+run holding one IN_PROGRESS batch of Open rows. The stub speaks HTTP/1.1 (no h2c), so the client falls
+back to pooled keep-alive HTTP/1.1 connections.
+
+Usage: python -m benchmarks.row_executor_benchmark [rows] [stub_delay_ms] [concurrency,...]
+"""
+import asyncio
+import multiprocessing
+import sys
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.task.row_executor import RowExecutor
+from models.batch_request import Base, IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from models.batch_status_counter import IeBatchStatusCounter
+from utility.executors import Executors
+from utility.status_counter import BatchStatusCounter
+
+
+
+RESPONSE_BODY = b'{"status": "ok"}'
+
+
+async def _serve_connection(reader, writer, delay_seconds: float):
+    # Minimal keep-alive HTTP/1.1: every request is answered with 200 after delay_seconds
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    await reader.readexactly(int(line.split(b":", 1)[1]))
+            await asyncio.sleep(delay_seconds)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def run_stub_server(delay_seconds: float, port_pipe):
+    """
+    The downstream API stub, in its own process so it does not share the executor's GIL.
+    """
+    async def serve():
+        server = await asyncio.start_server(
+            lambda reader, writer: _serve_connection(reader, writer, delay_seconds), "127.0.0.1", 0, backlog=4096
+        )
+        port_pipe.send(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def prepare_database(run: int, rows: int) -> int:
+    Configuration.IE_DB = f"run{run}.db"
+    engine = DatabaseManager().engine(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    Base.metadata.create_all(engine)
+    IeBatchStatusCounter.metadata.create_all(engine)
+
+    db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    now = datetime.now()
+    batch = IEBatchRequestLog(
+        request_id=f"benchmark-{run}", cid=1, env="Dev", status=BatchRequestStatus.IN_PROGRESS.value,
+        total_count=rows, created_on=now, updated_on=now
+    )
+    db_session.add(batch)
+    db_session.flush()
+    batch_request_id = batch.id
+    db_session.execute(insert(IeBatchRunLog), [
+        {
+            "batch_request_auto_id": batch_request_id, "batch_ref_num": str(row), "env": "Dev", "cid": 1,
+            "processing_status": BatchRequestStatus.OPEN.value, "request_body": f'{{"client_ref_id": "ref{row}", "pan": null}}'
+        }
+        for row in range(rows)
+    ])
+    BatchStatusCounter.add(db_session, batch_request_id, {BatchRequestStatus.OPEN.value: rows})
+    db_session.commit()
+    db_session.close()
+    return batch_request_id
+
+
+def completed_rows(batch_request_id: int) -> int:
+    db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    try:
+        return db_session.scalar(select(func.count()).where(
+            IeBatchRunLog.batch_request_auto_id == batch_request_id,
+            IeBatchRunLog.processing_status == BatchRequestStatus.COMPLETED.value
+        ))
+    finally:
+        db_session.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay_seconds = (int(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    concurrencies = [int(value) for value in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1, 8, 32, 128]
+
+    port_receiver, port_sender = multiprocessing.Pipe(duplex=False)
+    stub_server = multiprocessing.get_context("spawn").Process(
+        target=run_stub_server, args=(delay_seconds, port_sender), daemon=True
+    )
+    stub_server.start()
+    Configuration.ROW_EXECUTOR_API_URL = f"http://127.0.0.1:{port_receiver.recv()}/execute"
+    Configuration.ROW_EXECUTOR_IDLE_SECONDS = 0
+    Configuration.ROW_EXECUTOR_POLL_SECONDS = 0.05
+
+    directory = tempfile.mkdtemp(prefix="row_executor_benchmark_")
+    Configuration.BATCH_DB_CONNECTION_URL = f"sqlite:///{directory}/"
+    print(f"{rows} rows, {delay_seconds * 1000:.0f} ms stub latency")
+
+    for run, concurrency in enumerate(concurrencies):
+        # Fewer rows at low concurrency, so each run takes a similar time
+        run_rows = min(rows, max(concurrency * 40, 200))
+        batch_request_id = prepare_database(run, run_rows)
+        summary = asyncio.run(RowExecutor([batch_request_id], concurrency=concurrency).run())
+        done = completed_rows(batch_request_id)
+        assert done == run_rows, f"{done} of {run_rows} rows completed"
+        print(
+            f"concurrency {concurrency:4d}: {run_rows:6d} rows in {summary['seconds']:6.2f}s  "
+            f"{run_rows / summary['seconds']:8.0f} rows/sec"
+        )
+
+    stub_server.terminate()
+    Executors.shutdown()
+
+
+if __name__ == "__main__":
+    main()
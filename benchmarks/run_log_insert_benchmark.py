@@ -0,0 +1,72 @@
+"""
+Rows/sec of the batch loader insert: per-row ORM objects vs RunLogBulkWriter.
+
+Runs against SQLite by default; pass a SQLAlchemy URL to measure a real MySQL schema.
+Usage: python -m benchmarks.run_log_insert_benchmark [rows] [db_url]
+"""
+import datetime
+import json
+import sys
+import time
+
+import pandas as pd
+import pytz
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from dependencies.constants import BatchRequestStatus
+from handlers.task.run_log_writer import RunLogBulkWriter
+from models.batch_status import IeBatchRunLog
+from models.batch_status_counter import IeBatchStatusCounter
+from utility.pan_validator import PanValidator
+
+
+def legacy_insert(db_session, df, ent_id, batch_request_auto_id, env):
+    """The loader's previous insert loop: iterrows, one ORM object per row, bulk_save_objects of 500."""
+    df = df.fillna("")
+    index = 0
+    for start in range(0, df.shape[0], 500):
+        batch_status_objs = []
+        for idx, row in df.iloc[start: start + 500].iterrows():
+            pan = PanValidator.sanitize_one(row.get("pan", ""))
+            client_ref_id = row.get("client_ref_id") or f"{ent_id}_{datetime.date.today()}_{batch_request_auto_id}_{idx}"
+            tz = pytz.timezone("Asia/Kolkata")
+            batch_status_objs.append(IeBatchRunLog(
+                env=env,
+                cid=ent_id,
+                batch_request_auto_id=batch_request_auto_id,
+                client_ref_id=client_ref_id,
+                processing_status=BatchRequestStatus.OPEN.value,
+                batch_ref_num=index,
+                pan=pan,
+                request_body=json.dumps({"client_ref_id": client_ref_id, "pan": pan}),
+                retry_count=0,
+                created_on=datetime.datetime.now(tz),
+                updated_on=datetime.datetime.now(tz),
+            ))
+            index += 1
+        db_session.bulk_save_objects(batch_status_objs)
+        db_session.commit()
+
+
+def measure(label, engine, rows, func):
+    with Session(engine) as db_session:
+        db_session.execute(delete(IeBatchRunLog))
+        db_session.commit()
+
+        started = time.perf_counter()
+        func(db_session)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<10} {rows:>10,} rows  {elapsed:8.3f}s  {rows / elapsed:>12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    engine = create_engine(sys.argv[2] if len(sys.argv) > 2 else "sqlite://")
+    IeBatchRunLog.metadata.create_all(engine)
+    IeBatchStatusCounter.metadata.create_all(engine)
+
+    df = pd.DataFrame({"pan": [f"ABCDE{i % 10000:04d}F" for i in range(rows)]})
+
+    measure("legacy", engine, rows, lambda db_session: legacy_insert(db_session, df, 1, 1, "Prod"))
+    measure("core", engine, rows, lambda db_session: RunLogBulkWriter(db_session, 1, 1, "Prod").write(df))
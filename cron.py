@@ -1,11 +1,15 @@
 from dependencies.logger import logger
-from handlers.cron.cron_handler import failed_retry_cron, check_status_cron, batch_loader_cron
+from handlers.cron.cron_handler import failed_retry_cron, check_status_cron, batch_loader_cron, \
+    counter_reconcile_cron, compile_output_cron, execute_rows_cron
 
 
 CRON_EVENT_FUNCTION_MAP = {
     "failed_retry_cron": failed_retry_cron,
     "check_status_cron": check_status_cron,
-    "batch_loader_cron": batch_loader_cron
+    "batch_loader_cron": batch_loader_cron,
+    "counter_reconcile_cron": counter_reconcile_cron,
+    "compile_output_cron": compile_output_cron,
+    "execute_rows_cron": execute_rows_cron
 }
 
 
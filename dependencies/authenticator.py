@@ -1,14 +1,56 @@
 import base64
+import hashlib
 
+from sqlalchemy import select
+
+from dependencies.configuration import Configuration
 from dependencies.logger import logger
+from dependencies.managers.cache_manager import MemoryCacheBackend
 from models.ent_client import ClientService
 
+# Cached for a token that matched no enabled client
+_REJECTED = "rejected"
+
 
 class Authenticator:
+    """
+    Validates Basic tokens against client_service. Results are cached in process by a hash of the
+    token, the service_id and the CS_DB schema selected for the request's host: accepted tokens for
+    AUTH_CACHE_TTL_SECONDS, rejected ones for AUTH_NEGATIVE_CACHE_TTL_SECONDS, so repeat callers are
+    authenticated without a SOFTI DB session.
+    """
+
+    _cache = MemoryCacheBackend(Configuration.AUTH_CACHE_MAX_ENTRIES)
 
     @staticmethod
-    def validate(headers, db_session,  service_id=None):
+    def cache_key(auth_token: str, service_id=None, schema: str = None) -> str:
+        # determine_environment switches CS_DB per host, and a client may exist in one schema only
+        schema = schema or Configuration.CS_DB
+        return hashlib.sha256(f"{schema}|{auth_token}|{service_id or ''}".encode()).hexdigest()
+
+    @classmethod
+    def invalidate(cls, auth_token: str = None, service_id=None, schema: str = None):
+        """
+        Forget a cached token, e.g. after its client was disabled or its secret rotated.
 
+        :param auth_token: Basic token, with or without the 'Basic ' prefix; every cached token if None
+        :param service_id: service the token was validated for
+        :param schema: CS_DB schema the token was validated in; the current CS_DB if None
+        """
+        if auth_token is None:
+            cls._cache = MemoryCacheBackend(Configuration.AUTH_CACHE_MAX_ENTRIES)
+            logger.info("Credential cache cleared")
+            return
+        cls._cache.delete(cls.cache_key(auth_token.replace("Basic ", ""), service_id, schema))
+
+    @classmethod
+    async def validate(cls, headers, db_session_factory, service_id=None):
+        """
+        :param headers: request headers
+        :param db_session_factory: returns an async SOFTI DB session; only called when the token is not cached
+        :param service_id: service the client must be enabled for
+        :return: cid of the client and the token
+        """
         auth_token = headers.get('Authorization') or headers.get('authorization')
         if not auth_token:
             logger.error('Authentication Token not found.')
@@ -21,6 +63,17 @@ class Authenticator:
             logger.exception(f'Base64 decoding failed. Authentication failed: {err}')
             raise InterruptedError("401|AUTHENTICATION_FAILED")
 
+        cache_key = cls.cache_key(auth_token, service_id)
+        if Configuration.AUTH_CACHE_ENABLED:
+            cid = cls._cache.get(cache_key)
+            if cid == _REJECTED:
+                logger.error('Authentication Token rejected from the credential cache.')
+                raise InterruptedError("401|AUTHENTICATION_FAILED")
+            if cid is not None:
+                logger.info(f'Authenticated client with eID: [{cid}] from the credential cache')
+                return cid, auth_token
+
+        db_session = db_session_factory()
         try:
             query_param = {
                 "client_id" : client_id.strip(),
@@ -31,13 +84,17 @@ class Authenticator:
             if service_id:
                 query_param.update({"service_id": service_id})
 
-            client = db_session.query(ClientService).filter_by(**query_param).first()
+            client = (await db_session.execute(select(ClientService).filter_by(**query_param).limit(1))).scalars().first()
 
             if not client:
                 logger.error('No client found for the supplied Authentication Token.')
+                if Configuration.AUTH_CACHE_ENABLED:
+                    cls._cache.set(cache_key, _REJECTED, Configuration.AUTH_NEGATIVE_CACHE_TTL_SECONDS)
                 raise InterruptedError("401|AUTHENTICATION_FAILED")
 
             logger.info(f'Authenticated client with eID: [{client.cid}]')
+            if Configuration.AUTH_CACHE_ENABLED:
+                cls._cache.set(cache_key, client.cid, Configuration.AUTH_CACHE_TTL_SECONDS)
 
             return client.cid, auth_token
         except Exception as err:
@@ -45,4 +102,4 @@ class Authenticator:
             raise InterruptedError("401|AUTHENTICATION_FAILED")
 
         finally:
-            db_session.close()
+            await db_session.close()
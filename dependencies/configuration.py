@@ -6,6 +6,8 @@ from os.path import dirname
 
 from dotenv import load_dotenv
 
+from dependencies.constants import RETRYABLE_RESPONSE_CODES, TERMINAL_RESPONSE_CODES
+
 
 BASEDIR = Path(dirname(dirname(__file__)))
 
@@ -25,13 +27,89 @@ class Configuration:
 
     AWS_BUCKET = os.getenv('AWS_BUCKET')
     AWS_REGION_NAME = os.getenv('AWS_REGION_NAME')
+    AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 32))
+    AWS_MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', 5))
 
     MAX_LENGTH_OF_PAN_LIST = os.getenv('MAX_LENGTH_OF_PAN_LIST')
 
+    # Upload validation limits
+    EXCEL_SIZE_LIMIT = os.getenv('EXCEL_SIZE_LIMIT')
+    MAX_BATCH_ROWS = int(os.getenv('MAX_BATCH_ROWS', 2000000))
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+    PAN_VALIDATION_CHUNK_SIZE = int(os.getenv('PAN_VALIDATION_CHUNK_SIZE', 50000))
+    # Row digests held in memory by the upload duplicate check (8 bytes each); the rest are spilled to temp files
+    DUPLICATE_CHECK_BUFFER_ROWS = int(os.getenv('DUPLICATE_CHECK_BUFFER_ROWS', 262144))
+
+    # Tee the upload to S3 as a multipart upload while it is being validated
+    S3_STREAMING_UPLOAD = os.getenv('S3_STREAMING_UPLOAD', 'false').lower() == 'true'
+    S3_MULTIPART_PART_SIZE = int(os.getenv('S3_MULTIPART_PART_SIZE', 8 * 1024 * 1024))
+    S3_MULTIPART_CONCURRENCY = int(os.getenv('S3_MULTIPART_CONCURRENCY', 4))
+
+    # Blocking work of the API runs off the event loop: I/O on a thread pool, upload parsing on
+    # a process pool (0 parses on the I/O threads)
+    IO_THREAD_POOL_SIZE = int(os.getenv('IO_THREAD_POOL_SIZE', 16))
+    UPLOAD_PARSE_PROCESSES = int(os.getenv('UPLOAD_PARSE_PROCESSES', 2))
+
     TASK_ROLE_ARN = os.getenv('TASK_ROLE_ARN')
 
+    # Cache: 'memory' (per process) or 'redis' (shared across containers)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_REDIS_TIMEOUT = float(os.getenv('CACHE_REDIS_TIMEOUT', 0.2))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    CACHE_METRICS_LOG_EVERY = int(os.getenv('CACHE_METRICS_LOG_EVERY', 100))
+
+    # A cached presigned URL is handed out until this share of its lifetime has passed
+    PRESIGNED_URL_REUSE_FRACTION = float(os.getenv('PRESIGNED_URL_REUSE_FRACTION', 0.5))
+
+    # Status documents are invalidated by the writers of a batch's status; with the memory backend a
+    # write in another process is only seen once the TTL runs out
+    STATUS_CACHE_TTL_SECONDS = int(os.getenv('STATUS_CACHE_TTL_SECONDS', 60))
+
+    # Validated credentials are kept in process; a disabled or rotated client is accepted until its
+    # entry expires unless Authenticator.invalidate is called
+    AUTH_CACHE_ENABLED = os.getenv('AUTH_CACHE_ENABLED', 'true').lower() == 'true'
+    AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', 300))
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv('AUTH_NEGATIVE_CACHE_TTL_SECONDS', 30))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', 1000))
+
     SOFTI_API_URL =os.getenv('SOFTI_API_URL')
 
+    # Output compilation: concurrent Softi API calls and the claim lease of a COMPILING batch
+    COMPILE_CONCURRENCY = int(os.getenv('COMPILE_CONCURRENCY', 8))
+    COMPILE_HTTP_TIMEOUT = float(os.getenv('COMPILE_HTTP_TIMEOUT', 30))
+    COMPILE_CLAIM_TIMEOUT_MINUTES = int(os.getenv('COMPILE_CLAIM_TIMEOUT_MINUTES', 30))
+
+    # Row executor: posts Open run log rows to ROW_EXECUTOR_API_URL over HTTP/2; disabled while unset
+    ROW_EXECUTOR_API_URL = os.getenv('ROW_EXECUTOR_API_URL')
+    ROW_EXECUTOR_HTTP2 = os.getenv('ROW_EXECUTOR_HTTP2', 'true').lower() == 'true'
+    ROW_EXECUTOR_HTTP_TIMEOUT = float(os.getenv('ROW_EXECUTOR_HTTP_TIMEOUT', 30))
+    ROW_EXECUTOR_CONCURRENCY = int(os.getenv('ROW_EXECUTOR_CONCURRENCY', 64))
+    # The calls are spread over clients of this many connections each: an httpx pool scans every connection
+    # and waiting request on each call, so one pool of hundreds of connections spends its time on bookkeeping
+    ROW_EXECUTOR_CLIENT_CONNECTIONS = int(os.getenv('ROW_EXECUTOR_CLIENT_CONNECTIONS', 8))
+    ROW_EXECUTOR_CLAIM_SIZE = int(os.getenv('ROW_EXECUTOR_CLAIM_SIZE', 500))
+    # Results are written in groups of up to this many rows, at least every ROW_EXECUTOR_FLUSH_SECONDS
+    ROW_EXECUTOR_FLUSH_ROWS = int(os.getenv('ROW_EXECUTOR_FLUSH_ROWS', 200))
+    ROW_EXECUTOR_FLUSH_SECONDS = float(os.getenv('ROW_EXECUTOR_FLUSH_SECONDS', 1.0))
+    # Inprogress rows claimed longer ago than this belonged to an executor that died and are claimed again
+    ROW_EXECUTOR_CLAIM_TIMEOUT_MINUTES = int(os.getenv('ROW_EXECUTOR_CLAIM_TIMEOUT_MINUTES', 10))
+    # With nothing to claim, keep polling this long for rows a loader is still inserting before exiting
+    ROW_EXECUTOR_IDLE_SECONDS = float(os.getenv('ROW_EXECUTOR_IDLE_SECONDS', 30))
+    ROW_EXECUTOR_POLL_SECONDS = float(os.getenv('ROW_EXECUTOR_POLL_SECONDS', 1.0))
+    ROW_EXECUTOR_DISPATCH_WINDOW_SECONDS = int(os.getenv('ROW_EXECUTOR_DISPATCH_WINDOW_SECONDS', 60))
+    # check_status reads a batch's statistics from its counters only while every writer of run log rows
+    # keeps them, which the out-of-repo processor does not; otherwise, and for any batch whose counters
+    # do not add up to its total_count, from a GROUP BY over the run log
+    STATUS_COUNTERS_AUTHORITATIVE = os.getenv(
+        'STATUS_COUNTERS_AUTHORITATIVE', str(bool(ROW_EXECUTOR_API_URL))
+    ).lower() == 'true'
+
+    # Output compilation engine: 'softi' calls SOFTI_API_URL, 'local' builds the file from the run log
+    OUTPUT_COMPILE_MODE = os.getenv('OUTPUT_COMPILE_MODE', 'softi').lower()
+    OUTPUT_FORMAT = os.getenv('OUTPUT_FORMAT', 'xlsx').lower()
+    OUTPUT_PAGE_SIZE = int(os.getenv('OUTPUT_PAGE_SIZE', 10000))
+
     SENDER_EMAIL = 'alerts@digitap.ai'
     SENDER_NAME = 'Softi Exception'
     SENDER_NAME_FOR_CLIENT = 'Softi Batch'
@@ -42,13 +120,65 @@ class Configuration:
     SMTP_HOST = 'email-smtp.ap-south-1.amazonaws.com'
     SMTP_PORT = 587
 
+    # Batch loader read and insert tuning
+    LOADER_READ_CHUNK_SIZE = int(os.getenv("LOADER_READ_CHUNK_SIZE", 50000))
+    LOADER_MIN_CHUNK_SIZE = int(os.getenv("LOADER_MIN_CHUNK_SIZE", 1000))
+    LOADER_MAX_CHUNK_SIZE = int(os.getenv("LOADER_MAX_CHUNK_SIZE", 50000))
+    LOADER_TARGET_COMMIT_SECONDS = float(os.getenv("LOADER_TARGET_COMMIT_SECONDS", 1.0))
+    LOADER_USE_LOAD_DATA = os.getenv("LOADER_USE_LOAD_DATA", "false").lower() == "true"
+    LOADER_INSERT_WORKERS = int(os.getenv("LOADER_INSERT_WORKERS", 4))
+    LOADER_QUEUE_SIZE = int(os.getenv("LOADER_QUEUE_SIZE", 8))
+    LOADER_STALL_MINUTES = int(os.getenv("LOADER_STALL_MINUTES", 15))
+
+    # Failed retry: errored run log rows moved per transaction
+    FAILED_RETRY_BATCH_SIZE = int(os.getenv("FAILED_RETRY_BATCH_SIZE", 5000))
+
+    # Failed retry backoff: base * 2^retry_count seconds, capped, with jitter
+    RETRY_BACKOFF_BASE_SECONDS = int(os.getenv("RETRY_BACKOFF_BASE_SECONDS", 60))
+    RETRY_BACKOFF_MAX_SECONDS = int(os.getenv("RETRY_BACKOFF_MAX_SECONDS", 3600))
+    RETRYABLE_RESPONSE_CODES = {
+        int(code) for code in os.getenv("RETRYABLE_RESPONSE_CODES", RETRYABLE_RESPONSE_CODES).split(",") if code.strip()
+    }
+    TERMINAL_RESPONSE_CODES = {
+        int(code) for code in os.getenv("TERMINAL_RESPONSE_CODES", TERMINAL_RESPONSE_CODES).split(",") if code.strip()
+    }
+
     DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
     DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    # Kept below the server's wait_timeout so idle pooled connections are replaced before MySQL drops them
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    # Open one connection to each database when a process starts, before the first request needs it
+    DB_WARM_UP = os.getenv("DB_WARM_UP", "true").lower() == "true"
 
     # ECS configurations
     ECS_CLUSTER = os.getenv('ECS_CLUSTER')
     ECS_CONTAINER_NAME = os.getenv('ECS_CONTAINER_NAME')
     ECS_TASK_DEFINITION = os.getenv('ECS_TASK_DEFINITION')
+    TASK_DEFINITION_CACHE_SECONDS = int(os.getenv('TASK_DEFINITION_CACHE_SECONDS', 300))
+    # New batches are started in groups: one loader task per window or per DISPATCH_MAX_REQUESTS
+    # request_ids (ECS caps a task's container overrides at 8 KiB, about 150 request_ids)
+    DISPATCH_WINDOW_SECONDS = float(os.getenv('DISPATCH_WINDOW_SECONDS', 2))
+    # A Lambda container is frozen once it has answered, so it never buffers: every submission is relayed at once
+    RUNNING_ON_LAMBDA = bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+    DISPATCH_MAX_REQUESTS = int(os.getenv('DISPATCH_MAX_REQUESTS', 100))
+    # A DISPATCHED batch is held for its loader until the lease runs out, then dispatched again
+    DISPATCH_LEASE_SECONDS = int(os.getenv('DISPATCH_LEASE_SECONDS', 600))
+    # Failed launches are retried from the dispatch outbox: base * 2^attempts seconds, capped, with jitter
+    DISPATCH_RETRY_BASE_SECONDS = int(os.getenv('DISPATCH_RETRY_BASE_SECONDS', 5))
+    DISPATCH_RETRY_MAX_SECONDS = int(os.getenv('DISPATCH_RETRY_MAX_SECONDS', 300))
+    CHECK_STATUS_DISPATCH_WINDOW_SECONDS = int(os.getenv('CHECK_STATUS_DISPATCH_WINDOW_SECONDS', 60))
+    # Where tasks run: 'ecs' starts an ECS task per job, 'worker' queues the job in ie_job_queue for
+    # the long running workers (python tasks.py worker)
+    TASK_RUNNER = os.getenv('TASK_RUNNER', 'ecs').lower()
+    WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', 4))
+    WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', 0.25))
+    # Renewed every third of the lease while a job runs, also during the shutdown grace period; a job whose
+    # lease runs out is claimed again, so it must outlast the time ECS waits after the grace period to kill
+    WORKER_JOB_LEASE_SECONDS = int(os.getenv('WORKER_JOB_LEASE_SECONDS', 120))
+    WORKER_JOB_MAX_ATTEMPTS = int(os.getenv('WORKER_JOB_MAX_ATTEMPTS', 3))
+    # Kept below the ECS stopTimeout, so running jobs reach a checkpoint before SIGKILL
+    WORKER_SHUTDOWN_GRACE_SECONDS = int(os.getenv('WORKER_SHUTDOWN_GRACE_SECONDS', 90))
     FARGATE = 'FARGATE'
     SECURITY_GROUP, SUBNETS = {
         'PROD': (
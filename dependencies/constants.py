@@ -12,6 +12,7 @@ class BaseEnum(Enum):
 class BatchRequestStatus(BaseEnum):
 
     PENDING = 'PENDING'
+    DISPATCHED = 'DISPATCHED'
     IN_PROGRESS = 'Inprogress'
     COMPLETED = 'Completed'
     COMPLING_OUTPUT = 'Compling_output'
@@ -73,5 +74,10 @@ ERROR_MAPPING_CONSTANT = {
 
 
 FAILURE_RETRY_LIMIT = 3
+
+# Default classification of run log http_response_code for retries, overridable from the environment.
+# Rows without a response code (timeouts, connection errors) are retried, other 4xx codes are terminal.
+RETRYABLE_RESPONSE_CODES = "408,425,429,500,502,503,504"
+TERMINAL_RESPONSE_CODES = "400,401,403,404,405,409,410,413,415,422"
 INTERNAL_SERVER_ERROR = "Internal Server Error"
 CLIENT_REF_REGEX = "^[a-zA-Z0-9_-]{1,100}$"
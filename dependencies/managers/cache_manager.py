@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+
+
+class MemoryCacheBackend:
+    """
+    In-process cache with a TTL per entry, evicting the least recently used entry once full.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_if_absent(self, key: str, value: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return False
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisCacheBackend:
+    """
+    Cache shared by every Lambda container and task through Redis. Redis errors are logged and
+    treated as a miss, the cache never fails the request it serves.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def get(self, key: str):
+        try:
+            value = self.redis.get(key)
+        except redis.RedisError:
+            logger.exception(f"[CACHE] Redis get failed for {key}")
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        try:
+            self.redis.set(key, value, px=max(int(ttl_seconds * 1000), 1))
+        except redis.RedisError:
+            logger.exception(f"[CACHE] Redis set failed for {key}")
+
+    def set_if_absent(self, key: str, value: str, ttl_seconds: float) -> bool:
+        try:
+            return bool(self.redis.set(key, value, px=max(int(ttl_seconds * 1000), 1), nx=True))
+        except redis.RedisError:
+            logger.exception(f"[CACHE] Redis set_if_absent failed for {key}")
+            return True
+
+    def delete(self, key: str):
+        try:
+            self.redis.delete(key)
+        except redis.RedisError:
+            logger.exception(f"[CACHE] Redis delete failed for {key}")
+
+
+class CacheManager:
+    """
+    Process wide cache. CACHE_BACKEND selects an in-process cache ('memory') or Redis at
+    CACHE_REDIS_URL ('redis'). Lookups through get() are counted as hits and misses per
+    namespace, and the hit ratio is logged every CACHE_METRICS_LOG_EVERY lookups.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CacheManager, cls).__new__(cls)
+                    instance.backend = cls._build_backend()
+                    instance.hits = {}
+                    instance.misses = {}
+                    instance._metrics_lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def _build_backend():
+        if Configuration.CACHE_BACKEND == "redis":
+            logger.info("[CACHE] Using the Redis cache backend")
+            return RedisCacheBackend(redis.Redis.from_url(
+                Configuration.CACHE_REDIS_URL,
+                socket_timeout=Configuration.CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=Configuration.CACHE_REDIS_TIMEOUT
+            ))
+        return MemoryCacheBackend(Configuration.CACHE_MAX_ENTRIES)
+
+    def get(self, namespace: str, key: str):
+        value = self.backend.get(f"{namespace}:{key}")
+        self._record(namespace, value is not None)
+        return value
+
+    def set(self, namespace: str, key: str, value: str, ttl_seconds: float):
+        self.backend.set(f"{namespace}:{key}", value, ttl_seconds)
+
+    def set_if_absent(self, namespace: str, key: str, value: str, ttl_seconds: float) -> bool:
+        """
+        :return: True if the key was not set and now holds the value
+        """
+        return self.backend.set_if_absent(f"{namespace}:{key}", value, ttl_seconds)
+
+    def delete(self, namespace: str, key: str):
+        self.backend.delete(f"{namespace}:{key}")
+
+    def _record(self, namespace: str, hit: bool):
+        with self._metrics_lock:
+            counter = self.hits if hit else self.misses
+            counter[namespace] = counter.get(namespace, 0) + 1
+            hits, misses = self.hits.get(namespace, 0), self.misses.get(namespace, 0)
+
+        if (hits + misses) % Configuration.CACHE_METRICS_LOG_EVERY == 0:
+            logger.info(
+                f"[CACHE] {namespace}: {hits} hits, {misses} misses, hit ratio {hits / (hits + misses):.2%}"
+            )
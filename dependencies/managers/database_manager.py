@@ -1,6 +1,7 @@
 import threading
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
 from dependencies.configuration import Configuration
@@ -8,78 +9,192 @@ from dependencies.logger import logger
 
 
 class DatabaseManager:
+    """
+    Process wide registry of SQLAlchemy engines, one per connection URL and schema. Engines and
+    their connection pools live as long as the process, across requests, cron runs and warm Lambda
+    invocations; callers close their sessions to hand connections back to the pool. Pooled
+    connections are checked with a ping on checkout and recycled after DB_POOL_RECYCLE seconds.
+
+    The API's async routes use async engines (aiomysql) from the same registry. An async pool is bound to
+    the event loop it was first used on, which is the loop uvicorn or Mangum keeps for the whole process.
+    """
 
     _instance = None
+    _engines = {}
+    _async_engines = {}
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        self.thread_pool = threading.local()
+    def engine(self, db_url, schema):
+        """
+        :return: the process wide engine for the database, created on first use
+        """
+        connection_string = db_url + schema
+        engine = self._engines.get(connection_string)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(connection_string)
+                if engine is None:
+                    engine = self._create_engine(connection_string, schema)
+                    self._engines[connection_string] = engine
+        return engine
+
+    def async_engine(self, db_url, schema):
+        """
+        :return: the process wide async engine for the database, created on first use
+        """
+        connection_string = db_url + schema
+        engine = self._async_engines.get(connection_string)
+        if engine is None:
+            with self._lock:
+                engine = self._async_engines.get(connection_string)
+                if engine is None:
+                    url = make_url(connection_string)
+                    if url.get_backend_name() == "mysql":
+                        url = url.set(drivername="mysql+aiomysql")
+                    engine = create_async_engine(url, **self._pool_params())
+                    logger.info(f"Created async...{id(engine)} - {engine.url.host} for {schema}")
+                    self._async_engines[connection_string] = engine
+        return engine
+
+    def get_async_db(self, db_url, schema) -> AsyncSession:
+        return AsyncSession(self.async_engine(db_url, schema), expire_on_commit=False)
 
     def get_db(self, db_url, schema):
-        connection_pool = getattr(self.thread_pool, "connection_pool", {})
-        connection_string = db_url + schema
         try:
-            if connection_pool.get(connection_string):
-                logger.info(f"DB Connection already present for {connection_string}")
-                return Session(connection_pool[connection_string], future=True)
-            else:
-                logger.info(f"DB Connection Pool: {connection_pool}")
-                return self.reset_db_conn(db_url, schema)
+            return Session(self.engine(db_url, schema), future=True)
         except Exception as e:
             logger.exception(f"An exception has occurred in the Get DB function. {e}")
 
     def reset_db_conn(self, db_url, schema):
+        """
+        Replace the engine of a database with a new one, closing the old pool's idle connections.
+        """
         logger.info(f"Resetting DB connection: {db_url}")
-        engine = None
         connection_string = db_url + schema
-        connection_pool = getattr(self.thread_pool, "connection_pool", {})
-        try:
-            if connection_pool.get(connection_string):
-                connection_pool[connection_string].dispose()
-
-
-        except Exception as e:
-            logger.exception("An exception has occurred in the Reset DB connection.")
-
-        _params = {
-            "pool_recycle": 3600,
+        with self._lock:
+            engine = self._engines.pop(connection_string, None)
+        if engine is not None:
+            try:
+                engine.dispose()
+            except Exception:
+                logger.exception("An exception has occurred in the Reset DB connection.")
+        return self.get_db(db_url, schema)
+
+    @staticmethod
+    def _pool_params() -> dict:
+        return {
+            "pool_pre_ping": True,
+            "pool_recycle": Configuration.DB_POOL_RECYCLE,
             "pool_size": Configuration.DB_POOL_SIZE,
             "max_overflow": Configuration.DB_MAX_OVERFLOW,
-            "pool_timeout": 150,
+            "pool_timeout": Configuration.DB_POOL_TIMEOUT,
+            # Reuse the most recently returned connection, so idle extras age out instead of all going stale
+            "pool_use_lifo": True,
         }
 
+    @staticmethod
+    def _create_engine(connection_string, schema):
+        _params = DatabaseManager._pool_params()
+        if Configuration.LOADER_USE_LOAD_DATA:
+            # Client side switch for the loader's LOAD DATA LOCAL INFILE fast path
+            _params["connect_args"] = {"local_infile": True}
+
+        engine = None
         for _ in range(3):
             try:
                 engine = create_engine(connection_string, **_params)
                 break
             except Exception as e:
                 logger.exception(f"An exception has occurred in create Engine.{e}")
-                engine = None
                 continue
 
-        if engine is not None:
-            logger.info(f"Created...{id(engine)} - {engine.url.host} for {schema}")
+        if engine is None:
+            raise RuntimeError(f"Could not create an engine for {schema}")
+        logger.info(f"Created...{id(engine)} - {engine.url.host} for {schema}")
+        return engine
 
-            connection_pool[connection_string] = engine
-            self.thread_pool.connection_pool = connection_pool
+    def health_check(self) -> dict:
+        """
+        Run SELECT 1 on every engine, opening a pooled connection if there is none.
 
-        return Session(engine, future=True)
+        :return: engine host and database to True if it answered
+        """
+        health = {}
+        for engine in list(self._engines.values()):
+            name = f"{engine.url.host}/{engine.url.database}"
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                health[name] = True
+            except Exception:
+                logger.exception(f"DB health check failed for {name}")
+                health[name] = False
+        return health
+
+    def warm_up(self, databases: list) -> dict:
+        """
+        Create the engines of the databases and open a connection to each, on process start. Never raises,
+        a database that is down is connected to again on first use.
+
+        :param databases: (db_url, schema) pairs
+        :return: health_check() result
+        """
+        if not Configuration.DB_WARM_UP:
+            return {}
+        for db_url, schema in databases:
+            if not db_url:
+                continue
+            try:
+                self.engine(db_url, schema)
+            except Exception:
+                logger.exception(f"DB warm up failed for {schema}")
+        health = self.health_check()
+        logger.info(f"DB warm up: {health}")
+        return health
+
+    async def warm_up_async(self, databases: list):
+        """
+        Create the async engines of the databases and open a connection to each, on the serving event loop.
+        Never raises.
+
+        :param databases: (db_url, schema) pairs
+        """
+        if not Configuration.DB_WARM_UP:
+            return
+        for db_url, schema in databases:
+            if not db_url:
+                continue
+            try:
+                async with self.async_engine(db_url, schema).connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except Exception:
+                logger.exception(f"Async DB warm up failed for {schema}")
+
+    async def dispose_async(self):
+        """
+        Close the idle pooled connections of every async engine, on shutdown of the serving event loop.
+        """
+        for engine in list(self._async_engines.values()):
+            try:
+                await engine.dispose()
+            except Exception as e:
+                logger.exception(f"Exception occurred - {e}")
 
     def dispose(self):
+        """
+        Close the idle pooled connections of every engine, on process shutdown. The engines stay usable.
+        """
         logger.info("Inside DB Dispose function")
-        connection_pool = getattr(self.thread_pool, "connection_pool", {})
-        for connection_string in list(connection_pool.keys()):
+        for connection_string, engine in list(self._engines.items()):
             try:
-                logger.info(f"Disposing connection: {connection_string}")
-                connection_pool[connection_string].dispose()
+                logger.info(f"Disposing connection pool of {engine.url.host}/{engine.url.database}")
+                engine.dispose()
             except Exception as e:
                 logger.exception(f"Exception occurred - {e}")
 
-            connection_pool.pop(connection_string, None)
-            logger.info(f"Removed {connection_string} from the thread pool.")
-
         logger.info("Completed DB disposition.")
@@ -2,10 +2,7 @@ import datetime
 import json
 import os
 import re
-import tempfile
 
-import boto3
-import pandas as pd
 import pytz
 
 from botocore.exceptions import ClientError
@@ -17,8 +14,13 @@ from dependencies.configuration import Configuration
 from dependencies.logger import logger
 
 from models.batch_request import IEBatchRequestLog
-from handlers.ecs_run_task_handler import ECSRunTaskHandler
-from utility.common import CommonUtils
+from handlers.dispatch_relay import DispatchRelay
+from handlers.ecs_dispatch_buffer import ECSDispatchBuffer
+from utility.aws_clients import AwsClients
+from utility.columnar_artifact import ColumnarArtifact
+from utility.executors import Executors
+from utility.s3_multipart import S3MultipartUpload
+from utility.upload_validator import StreamingUploadValidator
 
 
 class BatchRequestHandler:
@@ -59,9 +61,26 @@ class BatchRequestHandler:
         s3_bucket = Configuration.AWS_BUCKET
 
         required_columns = {"pan"}
-        temp_file_path, length_of_df = self.process_and_validate_file(file, file_extension, required_columns)
-
-        self.upload_file_to_s3(temp_file_path, s3_bucket, s3_key)
+        # The parsing processes read the spooled upload through /proc
+        parse_pool = None if Configuration.S3_STREAMING_UPLOAD or not os.path.isdir("/proc/self/fd") else Executors.cpu()
+        if parse_pool:
+            # Parsed in another process, which also uploads the columnar artifact, while this thread uploads the file
+            length_of_df = self.validate_in_process(parse_pool, file, file_extension, required_columns, s3_bucket, s3_key)
+        else:
+            artifact = ColumnarArtifact()
+            try:
+                if Configuration.S3_STREAMING_UPLOAD:
+                    length_of_df = self.validate_and_stream_to_s3(
+                        file, file_extension, required_columns, s3_bucket, s3_key, artifact
+                    )
+                else:
+                    length_of_df = self.process_and_validate_file(file, file_extension, required_columns, artifact=artifact)
+                    self.upload_file_to_s3(file.file, s3_bucket, s3_key)
+
+                # Sanitized columns for the loader, so it does not have to parse the upload again
+                artifact.upload(AwsClients.client('s3'), s3_bucket, ColumnarArtifact.key_for(s3_key))
+            finally:
+                artifact.close()
 
         batch_request_obj = IEBatchRequestLog(
             client_ref_id=client_ref_id,
@@ -76,14 +95,14 @@ class BatchRequestHandler:
         )
 
         self.db_session.add(batch_request_obj)
+        # The outbox row commits with the batch, so a batch is never left without its loader dispatch
+        self.db_session.flush()
+        DispatchRelay.enqueue(self.db_session, batch_request_obj.id, request_id)
         self.db_session.commit()
 
         logger.info(f"BatchRequest created for request_id={request_id}, cid={ent_id}")
 
-        ECSRunTaskHandler().create_ecs_task(
-            ecs_task_name="batch_loader_task",
-            ecs_task_params=(request_id,)
-        )
+        ECSDispatchBuffer.submit(request_id)
 
         response = {
             "http_response_code": status.HTTP_200_OK,
@@ -99,54 +118,20 @@ class BatchRequestHandler:
         return response
 
     @staticmethod
-    def process_and_validate_file(file: UploadFile, file_extension: str, required_columns: set) -> (str, int):
+    def process_and_validate_file(
+        file: UploadFile,
+        file_extension: str,
+        required_columns: set,
+        on_chunk=None,
+        artifact: ColumnarArtifact = None
+    ) -> int:
         """
-        Save the uploaded file to a temporary file, validate its structure, and return its file path.
+        Validate the uploaded file while streaming through it in chunks and return its row count.
         Raises InterruptedError if validation fails.
         """
         logger.info("Inside process_and_validate_file")
         try:
-            # Save uploaded file to temp
-            suffix = ".csv" if file_extension.lower() == "csv" else ".xlsx"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(file.file.read())
-                temp_file_path = tmp.name
-
-            # Load DataFrame
-            if file_extension.lower() == "csv":
-                df = pd.read_csv(temp_file_path)
-            elif file_extension.lower() == "xlsx":
-                df = pd.read_excel(temp_file_path)
-            else:
-                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Unsupported file extension: {file_extension}")
-
-            # Check if file is empty
-            if df.empty:
-                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|File is empty")
-
-            # Normalize column names
-            df.columns = df.columns.str.strip().str.lower()
-            required_columns_lower = {col.lower() for col in required_columns}
-
-            # Check missing columns
-            missing = required_columns_lower - set(df.columns)
-            if missing:
-                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Missing columns: {', '.join(missing)}")
-
-            # Duplicate check
-            if df.duplicated(keep=False).any():
-                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Duplicate records found")
-
-            # PAN sanitization
-            df["sanitized_pan"] = df["pan"].apply(CommonUtils.sanitize_and_validate_pan)
-
-            # Check for invalid PANs
-            invalid_rows = df[df["sanitized_pan"].isnull()]
-            if not invalid_rows.empty:
-                invalid_list = ", ".join(invalid_rows["pan"].astype(str).unique())
-                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Invalid PAN(s) File")
-
-            return temp_file_path, len(df)
+            return StreamingUploadValidator(file_extension, required_columns, on_chunk, artifact).validate(file.file)
 
         except InterruptedError:
             raise
@@ -155,22 +140,93 @@ class BatchRequestHandler:
             raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|Error processing file")
 
     @staticmethod
-    def upload_file_to_s3(file_path: str, s3_bucket: str, s3_key: str):
+    def validate_in_process(
+        parse_pool,
+        file: UploadFile,
+        file_extension: str,
+        required_columns: set,
+        s3_bucket: str,
+        s3_key: str
+    ) -> int:
         """
-        Upload a file to S3 using boto3's upload_file method.
+        Validate the upload in the parsing process pool, so the parsing does not hold this process's GIL,
+        while this thread sends it to S3 as a multipart upload that is completed only if validation succeeds.
+        The worker opens the spooled upload through /proc, with its own file offset, so the file is never
+        copied. Raises InterruptedError if validation fails.
         """
-        logger.info("Inside the upload file to s3 function")
-        s3 = boto3.resource('s3')
+        logger.info("Inside validate_in_process")
+        # Rolls an upload still held in memory (at most the spool size) over to its temp file
+        spool_path = f"/proc/{os.getpid()}/fd/{file.file.fileno()}"
+        validation = parse_pool.submit(
+            StreamingUploadValidator.validate_file, spool_path, file_extension, required_columns,
+            s3_bucket, ColumnarArtifact.key_for(s3_key)
+        )
+        multipart_upload = S3MultipartUpload(s3_bucket, s3_key)
+        try:
+            multipart_upload.start()
+            file.file.seek(0)
+            while chunk := file.file.read(Configuration.UPLOAD_CHUNK_SIZE):
+                multipart_upload.write(chunk)
+            length_of_df = validation.result()
+            multipart_upload.complete()
+            return length_of_df
+        except InterruptedError:
+            multipart_upload.abort()
+            raise
+        except ClientError as e:
+            logger.error(f"S3 multipart upload failed: {str(e)}")
+            multipart_upload.abort()
+            validation.cancel()
+            raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|S3 upload failed")
+        except Exception as e:
+            logger.error(f"Error processing file: {e}", exc_info=True)
+            multipart_upload.abort()
+            raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|Error processing file")
 
+    def validate_and_stream_to_s3(
+        self,
+        file: UploadFile,
+        file_extension: str,
+        required_columns: set,
+        s3_bucket: str,
+        s3_key: str,
+        artifact: ColumnarArtifact = None
+    ) -> int:
+        """
+        Validate the upload and send it to S3 as a multipart upload in the same pass.
+        The upload is completed only if validation succeeds and aborted otherwise.
+        """
+        logger.info("Inside validate_and_stream_to_s3")
+        multipart_upload = S3MultipartUpload(s3_bucket, s3_key)
         try:
-            s3.meta.client.upload_file(file_path, s3_bucket, s3_key)
+            multipart_upload.start()
+            length_of_df = self.process_and_validate_file(
+                file, file_extension, required_columns, on_chunk=multipart_upload.write, artifact=artifact
+            )
+            multipart_upload.complete()
+        except ClientError as e:
+            logger.error(f"S3 multipart upload failed: {str(e)}")
+            multipart_upload.abort()
+            raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|S3 upload failed")
+        except Exception:
+            multipart_upload.abort()
+            raise
+
+        return length_of_df
+
+    @staticmethod
+    def upload_file_to_s3(fileobj, s3_bucket: str, s3_key: str):
+        """
+        Upload the validated file object to S3 using boto3's managed upload_fileobj.
+        """
+        logger.info("Inside the upload file to s3 function")
+        try:
+            fileobj.seek(0)
+            AwsClients.client('s3').upload_fileobj(fileobj, s3_bucket, s3_key)
             logger.info(f"Uploaded file to s3://{s3_bucket}/{s3_key}")
         except ClientError as e:
             logger.error(f"S3 upload failed: {str(e)}")
             raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|S3 upload failed")
-        finally:
-            if os.path.exists(file_path):
-                os.unlink(file_path)  # Clean up
 
     def handle_batch_request_list_object(
             self,
@@ -211,14 +267,14 @@ class BatchRequestHandler:
         )
 
         self.db_session.add(batch_request_obj)
+        # The outbox row commits with the batch, so a batch is never left without its loader dispatch
+        self.db_session.flush()
+        DispatchRelay.enqueue(self.db_session, batch_request_obj.id, request_id)
         self.db_session.commit()
 
         logger.info(f"BatchRequest created for request_id={request_id}, cid={ent_id}")
 
-        ECSRunTaskHandler().create_ecs_task(
-            ecs_task_name="batch_loader_task",
-            ecs_task_params=(request_id,)
-        )
+        ECSDispatchBuffer.submit(request_id)
 
         response = {
             "http_response_code": status.HTTP_200_OK,
@@ -1,9 +1,14 @@
+from datetime import datetime
+
+import pytz
+from sqlalchemy import exists, select
+
 from dependencies.configuration import Configuration
-from dependencies.constants import BatchRequestStatus
 from dependencies.logger import logger
 from dependencies.managers.database_manager import DatabaseManager
-from handlers.ecs_run_task_handler import ECSRunTaskHandler
+from handlers.dispatch_relay import OUTBOX_PENDING, OUTBOX_SENDING, DispatchRelay
 from models.batch_request import IEBatchRequestLog
+from models.dispatch_outbox import IeDispatchOutbox
 
 
 class BatchScheduler:
@@ -13,25 +18,35 @@ class BatchScheduler:
         self.db_session = self.db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
 
     def check_and_load(self):
+        """
+        Relay the dispatch outbox: launches that failed are retried once their backoff is due. Batches
+        that need a loader but have no open outbox row (a lease ran out before the task claimed the
+        batch, a load stalled, or the batch predates the outbox) get one first.
+        """
         logger.info("Inside check_and_load")
         try:
-            batch_request_objs = self.db_session.query(IEBatchRequestLog).filter(
-                IEBatchRequestLog.status == BatchRequestStatus.PENDING.value
+            now = datetime.now(pytz.timezone("Asia/Kolkata"))
+            batch_request_objs = self.db_session.execute(
+                select(IEBatchRequestLog.id, IEBatchRequestLog.request_id).where(
+                    DispatchRelay.claimable(now),
+                    ~exists().where(
+                        IeDispatchOutbox.batch_request_auto_id == IEBatchRequestLog.id,
+                        IeDispatchOutbox.status.in_([OUTBOX_PENDING, OUTBOX_SENDING])
+                    )
+                )
             ).all()
 
             for batch_request_obj in batch_request_objs:
-                self.__load_batch(batch_request_obj)
+                DispatchRelay.enqueue(self.db_session, batch_request_obj.id, batch_request_obj.request_id)
+            self.db_session.commit()
+            if batch_request_objs:
+                logger.info(f"[DISPATCH] Queued {len(batch_request_objs)} batches without a live dispatch")
 
         except Exception:
             logger.exception('The error occurred inside the check_and_load')
+            self.db_session.rollback()
         finally:
             self.db_session.close()
-            self.db_manager.dispose()
-
-    @staticmethod
-    def __load_batch( batch_request_obj: IEBatchRequestLog):
 
-        ECSRunTaskHandler().create_ecs_task(
-            ecs_task_name='batch_loader_task',
-            ecs_task_params=(batch_request_obj.request_id,)
-        )
+        started = DispatchRelay().relay()
+        logger.info(f"[DISPATCH] Loader tasks started for {started} batches")
@@ -0,0 +1,45 @@
+from sqlalchemy import select
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from models.batch_request import IEBatchRequestLog
+from utility.status_counter import BatchStatusCounter
+
+
+class CounterReconciler:
+
+    @staticmethod
+    def counter_reconcile_cron():
+        """
+        Check the status counters of every in-progress batch against a recount of its run log rows
+        and correct any drift, e.g. from rows changed by a writer that does not maintain the counters.
+        Each batch is reconciled in its own short transaction.
+        """
+        db_manager = DatabaseManager()
+        db_session = db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+
+        try:
+            logger.info('[COUNTER_RECONCILE] Starting counter_reconcile_cron job')
+
+            batch_request_ids = db_session.scalars(
+                select(IEBatchRequestLog.id).where(IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value)
+            ).all()
+            db_session.commit()
+
+            drifted = 0
+            for batch_request_id in batch_request_ids:
+                try:
+                    if BatchStatusCounter.reconcile(db_session, batch_request_id):
+                        drifted += 1
+                except Exception:
+                    logger.exception(f'[COUNTER_RECONCILE] Failed to reconcile BatchRequest [{batch_request_id}]')
+
+            logger.info(f'[COUNTER_RECONCILE] Checked {len(batch_request_ids)} batches, corrected {drifted}')
+
+        except Exception:
+            logger.exception('[COUNTER_RECONCILE] Exception occurred in counter_reconcile_cron')
+            db_session.rollback()
+        finally:
+            db_session.close()
@@ -3,8 +3,11 @@ from dependencies.logger import logger
 
 
 from handlers.cron.batch_loader_cron import BatchScheduler
+from handlers.cron.counter_reconcile import CounterReconciler
 from handlers.cron.failed_retry import FailedRetry
+from handlers.output_api_handler import ExternalAPIHandler
 from handlers.task.check_status import CheckStatus
+from handlers.task.row_executor import RowExecutor
 
 
 def failed_retry_cron():
@@ -37,3 +40,36 @@ def batch_loader_cron():
         logger.exception(f'some exception occurred in batch_loader_cron {e}')
     finally:
         logger.info(f'Completing batch_loader_cron task at {datetime.now()}')
+
+
+def counter_reconcile_cron():
+    """Triggers the status counter reconciliation."""
+    logger.info(f'Triggering counter_reconcile_cron task at {datetime.now()}')
+    try:
+        CounterReconciler().counter_reconcile_cron()
+    except Exception as e:
+        logger.exception(f'some exception occurred in counter_reconcile_cron {e}')
+    finally:
+        logger.info(f'Completing counter_reconcile_cron task at {datetime.now()}')
+
+
+def compile_output_cron():
+    """Compiles batches left in COMPLING_OUTPUT and reclaims stale COMPILING claims."""
+    logger.info(f'Triggering compile_output_cron task at {datetime.now()}')
+    try:
+        ExternalAPIHandler().process_completed_batches()
+    except Exception as e:
+        logger.exception(f'some exception occurred in compile_output_cron {e}')
+    finally:
+        logger.info(f'Completing compile_output_cron task at {datetime.now()}')
+
+
+def execute_rows_cron():
+    """Starts the row executor for Open run log rows, including rows FailedRetry moved back to Open."""
+    logger.info(f'Triggering execute_rows_cron task at {datetime.now()}')
+    try:
+        RowExecutor.dispatch()
+    except Exception as e:
+        logger.exception(f'some exception occurred in execute_rows_cron {e}')
+    finally:
+        logger.info(f'Completing execute_rows_cron task at {datetime.now()}')
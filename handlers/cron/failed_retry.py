@@ -1,62 +1,177 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-from dependencies.constants import BatchRequestStatus
+import pytz
+from sqlalchemy import bindparam, func, or_, select, update
+
+from dependencies.constants import BatchRequestStatus, FAILURE_RETRY_LIMIT
 from dependencies.configuration import Configuration
 from dependencies.managers.database_manager import DatabaseManager
 from dependencies.logger import logger
 from models.batch_request import IEBatchRequestLog
 from models.batch_status import IeBatchRunLog
+from utility.status_counter import BatchStatusCounter
 
-from sqlalchemy import and_
 
 class FailedRetry:
 
     @staticmethod
     def failed_retry_cron():
+        """
+        Schedule the errored rows of every in-progress batch for a retry with exponential backoff,
+        move them back to Open once due, or to Failure when the response code is terminal or their
+        retry_count has reached FAILURE_RETRY_LIMIT.
+
+        Rows are handled in slices of FAILED_RETRY_BATCH_SIZE, each in its own short transaction:
+        the slice is locked, rewritten by set based UPDATEs, counted into the status counters and
+        committed. Rows locked by another transaction are skipped and picked up by the next run.
+        """
         db_manager = DatabaseManager()
         db_session = db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
 
         try:
             logger.info('[FAILED_RETRY] Starting failed_retry_cron job')
 
-            # Get all batch requests that are currently IN_PROGRESS
-            batch_requests = db_session.query(IEBatchRequestLog).filter(
-                IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value
+            batch_request_ids = db_session.scalars(
+                select(IEBatchRequestLog.id).where(IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value)
             ).all()
+            db_session.commit()
+            if not batch_request_ids:
+                return
 
-            updates_to_commit = []
-
-            for batch_request in batch_requests:
-                logger.info(f"[FAILED_RETRY] Checking BatchRequest ID: {batch_request.id}")
-
-                # Get all errored runs for this batch
-                errored_runs = db_session.query(IeBatchRunLog).with_for_update().filter(
-                    and_(
-                        IeBatchRunLog.batch_request_auto_id == batch_request.id,
-                        IeBatchRunLog.processing_status == BatchRequestStatus.ERROR.value
-                    )
-                ).all()
-
-                for run in errored_runs:
-                    if run.retry_count >= 3:
-                        logger.info(f"[FAILED_RETRY] Marking BatchRun ID {run.id} as FAILURE (retry_count={run.retry_count})")
-                        run.processing_status = BatchRequestStatus.FAILURE.value
-                    else:
-                        logger.info(f"[FAILED_RETRY] Retrying BatchRun ID {run.id} (retry_count={run.retry_count} → {run.retry_count + 1})")
-                        run.retry_count += 1
-                        run.processing_status = BatchRequestStatus.OPEN.value
+            totals = [defaultdict(int), defaultdict(int), defaultdict(int)]
+            while True:
+                slice_counts = FailedRetry.__retry_slice(db_session, batch_request_ids)
+                for total, counts in zip(totals, slice_counts):
+                    for batch_request_id, count in counts.items():
+                        total[batch_request_id] += count
 
-                    updates_to_commit.append(run)
+                if sum(sum(counts.values()) for counts in slice_counts) < Configuration.FAILED_RETRY_BATCH_SIZE:
+                    break
 
-            if updates_to_commit:
-                db_session.bulk_save_objects(updates_to_commit)
-                db_session.commit()
-                logger.info(f"[FAILED_RETRY] Updated {len(updates_to_commit)} BatchRun entries.")
+            retried, failed, scheduled = totals
+            for batch_request_id in sorted(set(retried) | set(failed) | set(scheduled)):
+                logger.info(
+                    f"[FAILED_RETRY] BatchRequest [{batch_request_id}]: {retried[batch_request_id]} rows retried, "
+                    f"{failed[batch_request_id]} rows marked as FAILURE, {scheduled[batch_request_id]} rows scheduled"
+                )
+            logger.info(
+                f"[FAILED_RETRY] Updated {sum(retried.values()) + sum(failed.values()) + sum(scheduled.values())} "
+                f"BatchRun entries."
+            )
 
-        except Exception as e:
+        except Exception:
             logger.exception("[FAILED_RETRY] Exception occurred in failed_retry_cron")
             db_session.rollback()
         finally:
             if db_session:
                 db_session.close()
-            if db_manager:
-                db_manager.dispose()
+
+    @staticmethod
+    def is_terminal_response(http_response_code) -> bool:
+        """
+        :param http_response_code: last response code of the row, None if no response was received
+        :return: True if retrying the row cannot succeed
+        """
+        if http_response_code is None or http_response_code in Configuration.RETRYABLE_RESPONSE_CODES:
+            return False
+        return http_response_code in Configuration.TERMINAL_RESPONSE_CODES or 400 <= http_response_code < 500
+
+    @staticmethod
+    def backoff_delay(retry_count: int, base_seconds: float = None, max_seconds: float = None) -> float:
+        """
+        Exponential backoff with equal jitter: half the capped delay plus a random share of the other half,
+        so rows that failed together are not all retried together.
+
+        :param base_seconds: defaults to RETRY_BACKOFF_BASE_SECONDS
+        :param max_seconds: defaults to RETRY_BACKOFF_MAX_SECONDS
+        :return: seconds to wait before the next attempt
+        """
+        base_seconds = Configuration.RETRY_BACKOFF_BASE_SECONDS if base_seconds is None else base_seconds
+        max_seconds = Configuration.RETRY_BACKOFF_MAX_SECONDS if max_seconds is None else max_seconds
+        delay = min(max_seconds, base_seconds * 2 ** retry_count)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def __retry_slice(db_session, batch_request_ids: list) -> tuple:
+        """
+        Handle one slice of errored rows that are unscheduled or due, in one transaction:
+
+        - terminal response code or FAILURE_RETRY_LIMIT reached: Failure
+        - unscheduled: stays Error with next_retry_at set by the backoff
+        - due: back to Open with retry_count incremented and the schedule cleared
+
+        :return: (rows moved to Open, rows moved to Failure, rows scheduled), each as batch request id to count
+        """
+        now = datetime.now(pytz.timezone("Asia/Kolkata"))
+        rows = db_session.execute(
+            select(
+                IeBatchRunLog.id, IeBatchRunLog.batch_request_auto_id, IeBatchRunLog.retry_count,
+                IeBatchRunLog.http_response_code, IeBatchRunLog.next_retry_at
+            )
+            .where(
+                IeBatchRunLog.batch_request_auto_id.in_(batch_request_ids),
+                IeBatchRunLog.processing_status == BatchRequestStatus.ERROR.value,
+                or_(IeBatchRunLog.next_retry_at.is_(None), IeBatchRunLog.next_retry_at <= now)
+            )
+            .limit(Configuration.FAILED_RETRY_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            db_session.commit()
+            return {}, {}, {}
+
+        retried, failed, scheduled = defaultdict(int), defaultdict(int), defaultdict(int)
+        failed_ids, due_ids, schedules = [], [], []
+        for row in rows:
+            retry_count = row.retry_count or 0
+            if retry_count >= FAILURE_RETRY_LIMIT or FailedRetry.is_terminal_response(row.http_response_code):
+                failed_ids.append(row.id)
+                failed[row.batch_request_auto_id] += 1
+            elif row.next_retry_at is None:
+                schedules.append({
+                    "run_id": row.id,
+                    "retry_at": now + timedelta(seconds=FailedRetry.backoff_delay(retry_count))
+                })
+                scheduled[row.batch_request_auto_id] += 1
+            else:
+                due_ids.append(row.id)
+                retried[row.batch_request_auto_id] += 1
+
+        if failed_ids:
+            db_session.execute(
+                update(IeBatchRunLog)
+                .where(IeBatchRunLog.id.in_(failed_ids))
+                .values(processing_status=BatchRequestStatus.FAILURE.value, next_retry_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        if due_ids:
+            db_session.execute(
+                update(IeBatchRunLog)
+                .where(IeBatchRunLog.id.in_(due_ids))
+                .values(
+                    processing_status=BatchRequestStatus.OPEN.value,
+                    retry_count=func.coalesce(IeBatchRunLog.retry_count, 0) + 1,
+                    next_retry_at=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if schedules:
+            # One executemany, every row gets its own jittered time
+            db_session.connection().execute(
+                update(IeBatchRunLog.__table__)
+                .where(IeBatchRunLog.__table__.c.id == bindparam("run_id"))
+                .values(next_retry_at=bindparam("retry_at")),
+                schedules
+            )
+
+        for batch_request_auto_id in set(retried) | set(failed):
+            BatchStatusCounter.add(db_session, batch_request_auto_id, {
+                BatchRequestStatus.ERROR.value: -(retried[batch_request_auto_id] + failed[batch_request_auto_id]),
+                BatchRequestStatus.OPEN.value: retried[batch_request_auto_id],
+                BatchRequestStatus.FAILURE.value: failed[batch_request_auto_id],
+            })
+
+        db_session.commit()
+        return retried, failed, scheduled
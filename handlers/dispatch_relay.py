@@ -0,0 +1,207 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import and_, bindparam, or_, select, update
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.cron.failed_retry import FailedRetry
+from handlers.job_queue import JobQueue
+from models.batch_request import IEBatchRequestLog
+from models.dispatch_outbox import IeDispatchOutbox
+from utility.status_cache import StatusCache
+
+OUTBOX_PENDING = "PENDING"
+OUTBOX_SENDING = "SENDING"
+OUTBOX_SENT = "SENT"
+OUTBOX_SKIPPED = "SKIPPED"
+
+
+class DispatchRelay:
+    """
+    Starts the loader tasks recorded in ie_dispatch_outbox.
+
+    A slice of due outbox rows is locked with SKIP LOCKED, so overlapping relays take different rows,
+    and each row's batch is claimed by moving it to DISPATCHED with a lease, one conditional UPDATE
+    each; rows whose batch cannot be claimed are SKIPPED. The claimed batches are started as one task
+    outside the transaction: the rows are then marked SENT, or the batches go back to PENDING and the
+    rows get their next attempt after a backoff.
+    """
+
+    def __init__(self):
+        self.db_manager = DatabaseManager()
+        self.db_session = self.db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        self._tz = pytz.timezone("Asia/Kolkata")
+
+    @staticmethod
+    def enqueue(db_session, batch_request_auto_id: int, request_id: str, ecs_task_name: str = "batch_loader_task"):
+        """
+        Add the outbox row of a batch to the session; the caller commits it together with the batch.
+        """
+        now = datetime.now(pytz.timezone("Asia/Kolkata"))
+        db_session.add(IeDispatchOutbox(
+            batch_request_auto_id=batch_request_auto_id,
+            request_id=request_id,
+            ecs_task_name=ecs_task_name,
+            status=OUTBOX_PENDING,
+            attempts=0,
+            next_attempt_at=now,
+            created_on=now,
+            updated_on=now
+        ))
+
+    @staticmethod
+    def claimable(now: datetime):
+        """
+        :return: condition of the batches a loader may be dispatched for: PENDING, DISPATCHED with an
+            expired lease, or loads whose checkpoint has not moved for LOADER_STALL_MINUTES
+        """
+        return or_(
+            IEBatchRequestLog.status == BatchRequestStatus.PENDING.value,
+            and_(
+                IEBatchRequestLog.status == BatchRequestStatus.DISPATCHED.value,
+                IEBatchRequestLog.dispatch_lease_expires_at < now
+            ),
+            and_(
+                IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value,
+                IEBatchRequestLog.loaded_row_offset.isnot(None),
+                IEBatchRequestLog.load_completed_on.is_(None),
+                IEBatchRequestLog.updated_on < now - timedelta(minutes=Configuration.LOADER_STALL_MINUTES)
+            )
+        )
+
+    def relay(self, request_ids: list = None) -> int:
+        """
+        :param request_ids: only relay the outbox rows of these requests; every due row if None
+        :return: number of batches a task was started for
+        """
+        started = 0
+        try:
+            while True:
+                rows, claimed = self.__claim_slice(request_ids)
+                for ecs_task_name, group in claimed.items():
+                    started += self.__launch(ecs_task_name, group)
+                if len(rows) < Configuration.DISPATCH_MAX_REQUESTS:
+                    break
+        except Exception:
+            logger.exception("[DISPATCH] Error while relaying the dispatch outbox")
+            self.db_session.rollback()
+        finally:
+            self.db_session.close()
+        return started
+
+    def __claim_slice(self, request_ids: list = None) -> tuple:
+        """
+        Lock up to DISPATCH_MAX_REQUESTS due outbox rows and claim their batches, in one transaction.
+        A claimed row is SENDING until the lease ends, so a relay that dies mid launch is retried then.
+
+        :return: (locked rows, claimed rows per ecs_task_name), rows as plain dicts
+        """
+        now = datetime.now(self._tz)
+        query = select(IeDispatchOutbox).where(
+            IeDispatchOutbox.status.in_([OUTBOX_PENDING, OUTBOX_SENDING]),
+            or_(IeDispatchOutbox.next_attempt_at.is_(None), IeDispatchOutbox.next_attempt_at <= now)
+        )
+        if request_ids is not None:
+            query = query.where(IeDispatchOutbox.request_id.in_(list(request_ids)))
+        outbox_rows = self.db_session.scalars(
+            query.order_by(IeDispatchOutbox.id).limit(Configuration.DISPATCH_MAX_REQUESTS).with_for_update(skip_locked=True)
+        ).all()
+
+        lease_expires_at = now + timedelta(seconds=Configuration.DISPATCH_LEASE_SECONDS)
+        rows, claimed = [], defaultdict(list)
+        for outbox_row in outbox_rows:
+            result = self.db_session.execute(
+                update(IEBatchRequestLog)
+                .where(IEBatchRequestLog.id == outbox_row.batch_request_auto_id, self.claimable(now))
+                .values(status=BatchRequestStatus.DISPATCHED.value, dispatch_lease_expires_at=lease_expires_at, updated_on=now)
+                .execution_options(synchronize_session=False)
+            )
+            row = {
+                "id": outbox_row.id,
+                "batch_request_auto_id": outbox_row.batch_request_auto_id,
+                "request_id": outbox_row.request_id,
+                "attempts": outbox_row.attempts or 0,
+            }
+            rows.append(row)
+            if result.rowcount == 1:
+                outbox_row.status, outbox_row.next_attempt_at = OUTBOX_SENDING, lease_expires_at
+                claimed[outbox_row.ecs_task_name].append(row)
+            else:
+                # Already loading, finished, or held by a live lease from another outbox row
+                outbox_row.status, outbox_row.next_attempt_at = OUTBOX_SKIPPED, None
+            outbox_row.updated_on = now
+
+        self.db_session.commit()
+        if claimed:
+            StatusCache.invalidate([row["request_id"] for group in claimed.values() for row in group])
+        return rows, claimed
+
+    def __launch(self, ecs_task_name: str, rows: list) -> int:
+        """
+        Start one task for the claimed rows and record the outcome.
+
+        :return: number of batches the task was started for, 0 if the launch failed
+        """
+        request_ids = [row["request_id"] for row in rows]
+        logger.info(f"[DISPATCH] Starting {ecs_task_name} for {len(request_ids)} requests")
+        try:
+            JobQueue.start_task(ecs_task_name, tuple(request_ids), raise_on_failure=True)
+            error = None
+        except Exception as e:
+            error = str(e)
+
+        now = datetime.now(self._tz)
+        outbox_ids = [row["id"] for row in rows]
+        if error is None:
+            self.db_session.execute(
+                update(IeDispatchOutbox)
+                .where(IeDispatchOutbox.id.in_(outbox_ids), IeDispatchOutbox.status == OUTBOX_SENDING)
+                .values(status=OUTBOX_SENT, attempts=IeDispatchOutbox.attempts + 1, next_attempt_at=None, updated_on=now)
+                .execution_options(synchronize_session=False)
+            )
+            self.db_session.commit()
+            return len(rows)
+
+        logger.error(f"[DISPATCH] {ecs_task_name} launch failed for {len(request_ids)} requests, retrying with backoff")
+        # One executemany, every row gets its own jittered time
+        self.db_session.connection().execute(
+            update(IeDispatchOutbox.__table__)
+            .where(
+                IeDispatchOutbox.__table__.c.id == bindparam("outbox_id"),
+                IeDispatchOutbox.__table__.c.status == OUTBOX_SENDING
+            )
+            .values(
+                status=OUTBOX_PENDING,
+                attempts=bindparam("attempts"),
+                next_attempt_at=bindparam("retry_at"),
+                last_error=error[:512],
+                updated_on=now
+            ),
+            [
+                {
+                    "outbox_id": row["id"],
+                    "attempts": row["attempts"] + 1,
+                    "retry_at": now + timedelta(seconds=FailedRetry.backoff_delay(
+                        row["attempts"], Configuration.DISPATCH_RETRY_BASE_SECONDS, Configuration.DISPATCH_RETRY_MAX_SECONDS
+                    ))
+                }
+                for row in rows
+            ]
+        )
+        # Released, so the retry can claim them again before the lease would have run out
+        self.db_session.execute(
+            update(IEBatchRequestLog)
+            .where(
+                IEBatchRequestLog.id.in_([row["batch_request_auto_id"] for row in rows]),
+                IEBatchRequestLog.status == BatchRequestStatus.DISPATCHED.value
+            )
+            .values(status=BatchRequestStatus.PENDING.value, dispatch_lease_expires_at=None, updated_on=now)
+            .execution_options(synchronize_session=False)
+        )
+        self.db_session.commit()
+        StatusCache.invalidate(request_ids)
+        return 0
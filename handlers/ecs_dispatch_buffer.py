@@ -0,0 +1,140 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.dispatch_relay import DispatchRelay
+from handlers.job_queue import JobQueue
+from models.dispatch_window import IeDispatchWindow
+
+
+class ECSDispatchBuffer:
+    """
+    Coalesces batch_loader_task launches. A submission to an idle buffer is relayed at once and opens a
+    window of DISPATCH_WINDOW_SECONDS; request_ids submitted during the window are held until it ends, or
+    until DISPATCH_MAX_REQUESTS are waiting, and then relayed from the dispatch outbox together, as one
+    task that loads them all, instead of one Fargate task per submission. On Lambda nothing is held.
+
+    Loader launches are made exactly once by the DISPATCHED claim in DispatchRelay. Launches of tasks
+    without arguments, like check_status_task, are collapsed by a window claimed in ie_dispatch_window.
+    """
+
+    _pending = []
+    _timer = None
+    _burst_until = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, request_id: str):
+        """
+        :param request_id: request_id of a new PENDING batch, with its outbox row committed
+        """
+        if Configuration.DISPATCH_WINDOW_SECONDS <= 0 or Configuration.RUNNING_ON_LAMBDA:
+            cls.dispatch_batch_loader([request_id])
+            return
+
+        request_ids = None
+        with cls._lock:
+            now = time.monotonic()
+            if not cls._pending and now >= cls._burst_until:
+                # Idle: relayed at once; the submissions that follow within the window are grouped
+                cls._burst_until = now + Configuration.DISPATCH_WINDOW_SECONDS
+                request_ids = [request_id]
+            else:
+                cls._pending.append(request_id)
+                if len(cls._pending) >= Configuration.DISPATCH_MAX_REQUESTS:
+                    request_ids = cls._take()
+            if not request_ids and cls._timer is None:
+                cls._timer = threading.Timer(max(cls._burst_until - now, 0), cls.flush)
+                cls._timer.daemon = True
+                cls._timer.start()
+
+        if request_ids:
+            cls.dispatch_batch_loader(request_ids)
+
+    @classmethod
+    def flush(cls):
+        """
+        Start a task for every buffered request_id now, e.g. when the window ends or on shutdown.
+        """
+        with cls._lock:
+            request_ids = cls._take()
+        if request_ids:
+            cls.dispatch_batch_loader(request_ids)
+
+    @classmethod
+    def _take(cls) -> list:
+        request_ids, cls._pending = cls._pending, []
+        if cls._timer is not None:
+            cls._timer.cancel()
+            cls._timer = None
+        return request_ids
+
+    @staticmethod
+    def dispatch_batch_loader(request_ids: list):
+        """
+        Relay the outbox rows of the request_ids, one batch_loader_task per DISPATCH_MAX_REQUESTS of them.
+        """
+        DispatchRelay().relay(list(dict.fromkeys(request_ids)))
+
+    @classmethod
+    def dispatch_once(cls, ecs_task_name: str, window_seconds: int):
+        """
+        Start a task without arguments at most once per window_seconds, across every process: the first
+        request of a window claims it in ie_dispatch_window and starts the task at once.
+
+        A request made while the window is held still needs a task that starts after it. With
+        TASK_RUNNER=worker it is queued as a job that becomes available when the window ends; the
+        queued job covers every later request until a worker takes it. A one-shot ECS task does not
+        wait for the window to end, the task's cron covers the request.
+        """
+        claimed, window_until = cls._claim_window(ecs_task_name, window_seconds)
+        if claimed:
+            JobQueue.start_task(ecs_task_name)
+            return
+
+        if Configuration.TASK_RUNNER == "worker":
+            logger.info(f"[DISPATCH] {ecs_task_name} started in the last {window_seconds}s, queued for {window_until}")
+            JobQueue.enqueue(ecs_task_name, available_at=window_until)
+        else:
+            logger.info(f"[DISPATCH] {ecs_task_name} started in the last {window_seconds}s, left to its cron")
+
+    @staticmethod
+    def _claim_window(ecs_task_name: str, window_seconds: int) -> tuple:
+        """
+        :return: (True if this call opened a new window, end of the window now held)
+        """
+        tz = pytz.timezone("Asia/Kolkata")
+        now = datetime.now(tz)
+        window_until = now + timedelta(seconds=window_seconds)
+        db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        try:
+            updated = db_session.execute(
+                update(IeDispatchWindow)
+                .where(IeDispatchWindow.task_name == ecs_task_name, IeDispatchWindow.window_until <= now)
+                .values(window_until=window_until, updated_on=now)
+            )
+            if updated.rowcount == 1:
+                db_session.commit()
+                return True, window_until
+
+            try:
+                db_session.add(IeDispatchWindow(task_name=ecs_task_name, window_until=window_until, updated_on=now))
+                db_session.commit()
+                return True, window_until
+            except IntegrityError:
+                # Another process holds the window
+                db_session.rollback()
+
+            held_until = db_session.scalar(
+                select(IeDispatchWindow.window_until).where(IeDispatchWindow.task_name == ecs_task_name)
+            )
+            return False, held_until or window_until
+        finally:
+            db_session.close()
@@ -1,23 +1,33 @@
 import json
 import re
+import threading
+import time
 
-import boto3
 from starlette import status
 
 from dependencies.configuration import Configuration
 from dependencies.logger import logger
 
 from handlers.smtp_handler import SMTPHandler
+from utility.aws_clients import AwsClients
 
 
 class ECSRunTaskHandler:
 
+    # Task definition family to (latest task definition ARN, monotonic expiry time)
+    _task_definition_cache = {}
+    _cache_lock = threading.Lock()
+
     @staticmethod
-    def __get_latest_task_definition(ecs_client: boto3.client, ecs_task_family: str):
+    def __get_latest_task_definition(ecs_client, ecs_task_family: str):
         version = re.search(r':\d+$', ecs_task_family)
         if version:
             ecs_task_family = ecs_task_family[: -1 * (len(version.group()))]
 
+        cached = ECSRunTaskHandler._task_definition_cache.get(ecs_task_family)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
         logger.info(f"Getting Latest Task Definition For {ecs_task_family}")
         response = ecs_client.list_task_definitions(
             familyPrefix=ecs_task_family,
@@ -25,29 +35,35 @@ class ECSRunTaskHandler:
             maxResults=1
         )
 
-        if not response.get('taskDefinitionArn'):
+        if not response.get('taskDefinitionArns'):
             logger.error(f"No task definitions found for family '{ecs_task_family}'")
             return ecs_task_family
 
-        latest_task_definition = response.get('taskDefinitionArn')
+        latest_task_definition = response['taskDefinitionArns'][0]
         logger.info(f"Latest Task Definition Found: {latest_task_definition}")
+        with ECSRunTaskHandler._cache_lock:
+            ECSRunTaskHandler._task_definition_cache[ecs_task_family] = (
+                latest_task_definition, time.monotonic() + Configuration.TASK_DEFINITION_CACHE_SECONDS
+            )
         return latest_task_definition
 
     def create_ecs_task(
         self,
         ecs_task_name: str,
-        ecs_task_params: tuple
+        ecs_task_params: tuple,
+        raise_on_failure: bool = False
     ):
         """
         Create ECS
         :param ecs_task_name: ECS task name
         :param ecs_task_params: ECS task params
+        :param raise_on_failure: re-raise after the failure email, for callers that retry the launch
         :return:
         """
         logger.info(f'Creating ECS task for {ecs_task_name}.')
 
         try:
-            client = boto3.client('ecs')
+            client = AwsClients.client('ecs')
 
             task_def = Configuration.ECS_TASK_DEFINITION
 
@@ -90,4 +106,6 @@ class ECSRunTaskHandler:
             logger.exception('Exception occurred while creating ECS task')
             SMTPHandler().send_aws_ses_exception(
                 error_message=f'Exception occurred while creating ECS task: {e}'
-            )
\ No newline at end of file
+            )
+            if raise_on_failure:
+                raise
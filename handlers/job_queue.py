@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import and_, or_, select, update
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.ecs_run_task_handler import ECSRunTaskHandler
+from models.job_queue import IeJobQueue
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_DONE = "DONE"
+JOB_FAILED = "FAILED"
+
+
+class JobQueue:
+    """
+    Durable queue of task runs in ie_job_queue, for TASK_RUNNER=worker. Every method runs in its own
+    short transaction on a pooled session, so it is safe to call from the worker's job threads.
+    """
+
+    @staticmethod
+    def _session():
+        return DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(pytz.timezone("Asia/Kolkata"))
+
+    @classmethod
+    def start_task(cls, task_name: str, params: tuple = (), raise_on_failure: bool = False):
+        """
+        Run a task on the configured TASK_RUNNER: queued for the workers, or in its own ECS task.
+
+        :param task_name: task name from tasks.py
+        :param params: task arguments
+        :param raise_on_failure: re-raise when the task could not be started
+        """
+        if Configuration.TASK_RUNNER != "worker":
+            ECSRunTaskHandler().create_ecs_task(
+                ecs_task_name=task_name, ecs_task_params=tuple(params), raise_on_failure=raise_on_failure
+            )
+            return
+        try:
+            cls.enqueue(task_name, params)
+        except Exception:
+            logger.exception(f"[JOB_QUEUE] Could not queue {task_name}")
+            if raise_on_failure:
+                raise
+
+    @classmethod
+    def enqueue(cls, task_name: str, params: tuple = (), available_at: datetime = None) -> bool:
+        """
+        :param available_at: earliest time a worker may claim the job, now if None
+        :return: False if the task takes no arguments and is already queued, as that job covers this one
+        """
+        db_session = cls._session()
+        try:
+            if not params and db_session.scalar(
+                select(IeJobQueue.id).where(IeJobQueue.task_name == task_name, IeJobQueue.status == JOB_QUEUED).limit(1)
+            ):
+                logger.info(f"[JOB_QUEUE] {task_name} already queued")
+                return False
+
+            now = cls._now()
+            db_session.add(IeJobQueue(
+                task_name=task_name,
+                params=json.dumps(list(params)) if params else None,
+                status=JOB_QUEUED,
+                attempts=0,
+                available_at=available_at or now,
+                created_on=now,
+                updated_on=now
+            ))
+            db_session.commit()
+            logger.info(f"[JOB_QUEUE] Queued {task_name}")
+            return True
+        finally:
+            db_session.close()
+
+    @classmethod
+    def claim(cls, limit: int, worker_id: str) -> list:
+        """
+        Claim up to limit jobs: QUEUED ones that are available, and RUNNING ones whose lease ran out.
+        A job that already had WORKER_JOB_MAX_ATTEMPTS is FAILED instead.
+
+        :return: claimed jobs as {"id", "task_name", "params"}
+        """
+        db_session = cls._session()
+        try:
+            now = cls._now()
+            rows = db_session.scalars(
+                select(IeJobQueue)
+                .where(or_(
+                    and_(IeJobQueue.status == JOB_QUEUED, IeJobQueue.available_at <= now),
+                    and_(IeJobQueue.status == JOB_RUNNING, IeJobQueue.lease_expires_at < now)
+                ))
+                .order_by(IeJobQueue.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).all()
+
+            jobs = []
+            for row in rows:
+                row.updated_on = now
+                if row.attempts >= Configuration.WORKER_JOB_MAX_ATTEMPTS:
+                    logger.error(f"[JOB_QUEUE] Job {row.id} ({row.task_name}) lost its worker {row.attempts} times")
+                    row.status, row.lease_expires_at = JOB_FAILED, None
+                    row.last_error = f"Lease expired after {row.attempts} attempts"
+                    continue
+                row.status, row.locked_by = JOB_RUNNING, worker_id
+                row.lease_expires_at = now + timedelta(seconds=Configuration.WORKER_JOB_LEASE_SECONDS)
+                row.attempts += 1
+                jobs.append({"id": row.id, "task_name": row.task_name, "params": row.params})
+
+            db_session.commit()
+            return jobs
+        finally:
+            db_session.close()
+
+    @classmethod
+    def heartbeat(cls, job_ids: list, worker_id: str):
+        """
+        Renew the lease of the worker's running jobs.
+        """
+        if not job_ids:
+            return
+        cls._update(job_ids, worker_id, lease_expires_at=cls._now() + timedelta(seconds=Configuration.WORKER_JOB_LEASE_SECONDS))
+
+    @classmethod
+    def finish(cls, job_id: int, worker_id: str, error: str = None):
+        """
+        Mark the job DONE, or FAILED with the error.
+        """
+        cls._update(
+            [job_id], worker_id,
+            status=JOB_FAILED if error else JOB_DONE, lease_expires_at=None, last_error=error[:512] if error else None
+        )
+
+    @classmethod
+    def _update(cls, job_ids: list, worker_id: str, **values):
+        # Only the worker holding the claim changes the job
+        db_session = cls._session()
+        try:
+            db_session.execute(
+                update(IeJobQueue)
+                .where(IeJobQueue.id.in_(job_ids), IeJobQueue.status == JOB_RUNNING, IeJobQueue.locked_by == worker_id)
+                .values(updated_on=cls._now(), **values)
+                .execution_options(synchronize_session=False)
+            )
+            db_session.commit()
+        finally:
+            db_session.close()
@@ -1,66 +1,207 @@
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import httpx
+import pytz
+from sqlalchemy import and_, or_, select, update
+
 from dependencies.configuration import Configuration
 from dependencies.constants import BatchRequestStatus
 from dependencies.logger import logger
 from dependencies.managers.database_manager import DatabaseManager
 
+from handlers.task.output_file_builder import OutputFileBuilder
 from models.batch_request import IEBatchRequestLog
 from utility.aws import AwsUtility
+from utility.status_cache import StatusCache
 
 
 class ExternalAPIHandler:
+    """
+    Output compilation stage: claims COMPLING_OUTPUT batches by moving them to COMPILING, so no two
+    workers compile the same batch, and compiles the claimed batches concurrently: through the Softi API
+    over one pooled keep-alive HTTP client, or with OutputFileBuilder when OUTPUT_COMPILE_MODE is local.
+    """
+
+    _http_client = None
+    _client_lock = threading.Lock()
 
     def __init__(self):
         self.db_manager = DatabaseManager()
         self.db_session = self.db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        self._tz = pytz.timezone("Asia/Kolkata")
+
+    @classmethod
+    def _client(cls) -> httpx.Client:
+        # Shared by every call and kept across warm invocations, so connections are reused
+        if cls._http_client is None:
+            with cls._client_lock:
+                if cls._http_client is None:
+                    cls._http_client = httpx.Client(
+                        timeout=Configuration.COMPILE_HTTP_TIMEOUT,
+                        limits=httpx.Limits(
+                            max_connections=Configuration.COMPILE_CONCURRENCY,
+                            max_keepalive_connections=Configuration.COMPILE_CONCURRENCY
+                        )
+                    )
+        return cls._http_client
 
-    def process_completed_batches(self):
+    def process_completed_batches(self, batch_request_ids: list = None):
         """
         For batches in COMPLING_OUTPUT, call Sofi API and update the output S3 path
+
+        :param batch_request_ids: batches to compile; every claimable batch if None
         """
         try:
-            logger.info("Starting Sofi API processing for completed batches")
-
-            completed_batches = self.db_session.query(IEBatchRequestLog).filter(
-                IEBatchRequestLog.status == BatchRequestStatus.COMPLING_OUTPUT.value
-            ).all()
-
-            logger.info(f"Found {len(completed_batches)} batches in COMPLING_OUTPUT state")
-
-            for batch in completed_batches:
-                logger.info(f"Calling Sofi API for batch: {batch.id}")
-                s3_url_output_key = batch.input_s3_url.replace('input', 'output').replace('.csv', '.xlsx')
-
-                payload = {
-                    "request_id": batch.request_id,
-                    "input_file_path": batch.input_s3_url,
-                    "input_file_url" : AwsUtility.create_presigned_url(batch.input_s3_url),
-                    "output_file_path" : s3_url_output_key,
-                    "output_file_url": AwsUtility.create_presigned_url(s3_url_output_key)
-                }
-                response = requests.post(Configuration.SOFTI_API_URL, json=payload, timeout=30)
-
-                if response.status_code == 200:
-                    result = response.json()
-                    output_s3_path = result.get("output_file_path")
-
-                    if not output_s3_path:
-                        logger.error(f"No output_file_path received for batch {batch.id}")
-                        batch.status = BatchRequestStatus.COMPILATION_ERROR.value
-                    else:
-                        batch.output_s3_url = output_s3_path
-                        batch.status = BatchRequestStatus.COMPLETED.value
-                        logger.info(f"Batch {batch.id} marked COMPLETED with output path: {output_s3_path}")
-                else:
-                    logger.error(f"Sofi API failed for batch {batch.id} with status code: {response.status_code}")
-                    batch.status = BatchRequestStatus.COMPILATION_ERROR.value
-
-                self.db_session.commit()
+            claimed_batches = self.claim_batches(batch_request_ids)
+            logger.info(f"Claimed {len(claimed_batches)} batches for output compilation")
+            if not claimed_batches:
+                return
+            request_ids = {batch.id: batch.request_id for batch in claimed_batches}
+            StatusCache.invalidate(list(request_ids.values()))
 
+            with ThreadPoolExecutor(
+                max_workers=min(Configuration.COMPILE_CONCURRENCY, len(claimed_batches)),
+                thread_name_prefix="compile-output"
+            ) as executor:
+                if Configuration.OUTPUT_COMPILE_MODE == "local":
+                    engine = self.db_session.get_bind()
+                    futures = {
+                        executor.submit(
+                            self.compile_locally, engine, batch.id, batch.request_id, batch.input_s3_url, batch.total_count
+                        ): batch.id
+                        for batch in claimed_batches
+                    }
+                else:
+                    # The payload is built on the worker too, so a batch it fails for is recorded on its own
+                    # future; the workers get plain values, the batch objects expire on this thread's commits
+                    futures = {
+                        executor.submit(self.compile_with_softi, batch.request_id, batch.input_s3_url): batch.id
+                        for batch in claimed_batches
+                    }
+                # Results are written from this thread as they arrive, the session is not shared with the workers
+                for future in as_completed(futures):
+                    try:
+                        output_s3_path = future.result()
+                    except Exception:
+                        logger.exception(f"Output compilation failed for batch {futures[future]}")
+                        output_s3_path = None
+                    self.__record_result(futures[future], output_s3_path)
+                    StatusCache.invalidate([request_ids[futures[future]]])
 
         except Exception:
             logger.exception("Error while processing Sofi API batches")
             self.db_session.rollback()
         finally:
             self.db_session.close()
-            self.db_manager.dispose()
+
+    def claim_batches(self, batch_request_ids: list = None) -> list:
+        """
+        Move batches to COMPILING with one conditional UPDATE each; a batch is only claimed by the worker
+        whose UPDATE changed it. COMPILING batches whose claim is older than COMPILE_CLAIM_TIMEOUT_MINUTES
+        were left behind by a worker that died and are claimed again.
+
+        :param batch_request_ids: batches to claim; every claimable batch if None
+        :return: claimed batches
+        """
+        now = datetime.now(self._tz)
+        claimable = or_(
+            IEBatchRequestLog.status == BatchRequestStatus.COMPLING_OUTPUT.value,
+            and_(
+                IEBatchRequestLog.status == BatchRequestStatus.COMPILING.value,
+                IEBatchRequestLog.updated_on < now - timedelta(minutes=Configuration.COMPILE_CLAIM_TIMEOUT_MINUTES)
+            )
+        )
+
+        if batch_request_ids is None:
+            batch_request_ids = self.db_session.scalars(select(IEBatchRequestLog.id).where(claimable)).all()
+
+        claimed_ids = []
+        for batch_request_id in batch_request_ids:
+            result = self.db_session.execute(
+                update(IEBatchRequestLog)
+                .where(IEBatchRequestLog.id == batch_request_id, claimable)
+                .values(status=BatchRequestStatus.COMPILING.value, updated_on=now)
+                .execution_options(synchronize_session=False)
+            )
+            self.db_session.commit()
+            if result.rowcount == 1:
+                claimed_ids.append(batch_request_id)
+
+        if not claimed_ids:
+            return []
+        return self.db_session.scalars(select(IEBatchRequestLog).where(IEBatchRequestLog.id.in_(claimed_ids))).all()
+
+    @staticmethod
+    def compile_with_softi(request_id: str, input_s3_url: str | None) -> str | None:
+        """
+        :return: output file path returned by the Softi API, None if the call failed
+        """
+        return ExternalAPIHandler.call_softi_api(ExternalAPIHandler.build_payload(request_id, input_s3_url))
+
+    @staticmethod
+    def build_payload(request_id: str, input_s3_url: str | None) -> dict:
+        s3_url_output_key = AwsUtility.output_url_for(input_s3_url, request_id=request_id)
+        return {
+            "request_id": request_id,
+            "input_file_path": input_s3_url,
+            # pan_list batches have no input file
+            "input_file_url": AwsUtility.create_presigned_url(AwsUtility.s3_key_from_url(input_s3_url))
+            if input_s3_url else None,
+            "output_file_path": s3_url_output_key,
+            "output_file_url": AwsUtility.create_presigned_url(AwsUtility.s3_key_from_url(s3_url_output_key))
+        }
+
+    @staticmethod
+    def call_softi_api(payload: dict) -> str | None:
+        """
+        :return: output file path returned by the Softi API, None if the call failed
+        """
+        logger.info(f"Calling Sofi API for request: {payload['request_id']}")
+        try:
+            response = ExternalAPIHandler._client().post(Configuration.SOFTI_API_URL, json=payload)
+            if response.status_code != 200:
+                logger.error(
+                    f"Sofi API failed for request {payload['request_id']} with status code: {response.status_code}"
+                )
+                return None
+            output_s3_path = response.json().get("output_file_path")
+        except (httpx.HTTPError, ValueError):
+            logger.exception(f"Sofi API call failed for request {payload['request_id']}")
+            return None
+
+        if not output_s3_path:
+            logger.error(f"No output_file_path received for request {payload['request_id']}")
+        return output_s3_path
+
+    @staticmethod
+    def compile_locally(
+            engine, batch_request_id: int, request_id: str, input_s3_url: str | None, total_rows: int
+    ) -> str | None:
+        """
+        :return: s3 url of the output file built from the run log, None if the build failed
+        """
+        try:
+            return OutputFileBuilder(engine, batch_request_id, input_s3_url, total_rows, request_id=request_id).build()
+        except Exception:
+            logger.exception(f"Local output compilation failed for batch {batch_request_id}")
+            return None
+
+    def __record_result(self, batch_request_id: int, output_s3_path: str | None):
+        values = {"status": BatchRequestStatus.COMPILATION_ERROR.value, "updated_on": datetime.now(self._tz)}
+        if output_s3_path:
+            values.update(status=BatchRequestStatus.COMPLETED.value, output_s3_url=output_s3_path)
+
+        # Only the claim holder writes the result
+        self.db_session.execute(
+            update(IEBatchRequestLog)
+            .where(
+                IEBatchRequestLog.id == batch_request_id,
+                IEBatchRequestLog.status == BatchRequestStatus.COMPILING.value
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        self.db_session.commit()
+        logger.info(f"Batch {batch_request_id} marked {values['status']} with output path: {output_s3_path}")
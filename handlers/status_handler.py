@@ -1,28 +1,51 @@
+from sqlalchemy import select
 from starlette import status
 
-from dependencies.configuration import Configuration
 from dependencies.constants import BatchRequestStatus
 from dependencies.logger import logger
 
 from models.batch_request import IEBatchRequestLog
 
 from utility.aws import AwsUtility
+from utility.status_cache import StatusCache
+
+# Claim states internal to the loader and the output compilation, clients see the state they were claimed from
+_CLIENT_STATUS = {
+    BatchRequestStatus.DISPATCHED.value: BatchRequestStatus.PENDING.value,
+    BatchRequestStatus.COMPILING.value: BatchRequestStatus.COMPLING_OUTPUT.value,
+}
 
 
 class StatusHandler:
 
-    def __init__(self, db_session):
-        self.db_session = db_session
+    def __init__(self, db_session_factory):
+        """
+        :param db_session_factory: returns an async batch DB session; only called when the status cache misses
+        """
+        self.db_session_factory = db_session_factory
 
-    def get_batch_request_status(self, request_id: str):
+    async def get_batch_request_status(self, request_id: str) -> dict:
         """
         Display the current statics along with the request_id to front end when request_id is provided in from client
+
+        :return: {"body", "etag", "last_modified"}, from the status cache when it holds the request_id
         """
         logger.info('Inside status_api function')
 
         logger.info(f'The request_id from the input api: {request_id}')
 
-        batch_request_obj = self.db_session.query(IEBatchRequestLog).filter(IEBatchRequestLog.request_id == request_id).first()
+        document = StatusCache.get(request_id)
+        if document:
+            logger.info(f'Status of {request_id} served from the status cache')
+            return document
+
+        db_session = self.db_session_factory()
+        try:
+            batch_request_obj = (await db_session.execute(
+                select(IEBatchRequestLog).where(IEBatchRequestLog.request_id == request_id).limit(1)
+            )).scalars().first()
+        finally:
+            await db_session.close()
 
         if not batch_request_obj:
             logger.error(f"No batch found for request_id: {request_id}")
@@ -38,16 +61,21 @@ class StatusHandler:
                 {
                     "current_statistics": batch_request_obj.current_statistics
                 },
-            "status": batch_request_obj.status
+            "status": _CLIENT_STATUS.get(batch_request_obj.status, batch_request_obj.status)
         })
 
-        s3_url_key = batch_request_obj.input_s3_url.replace('input', 'output').replace('.csv', '.xlsx')
-        s3_url_key = s3_url_key.replace(f's3://{Configuration.AWS_BUCKET}/', '')
+        s3_url_key = AwsUtility.s3_key_from_url(
+            batch_request_obj.output_s3_url or AwsUtility.output_url_for(
+                batch_request_obj.input_s3_url, request_id=batch_request_obj.request_id
+            )
+        )
 
         if batch_request_obj.status == BatchRequestStatus.COMPLETED.value:
+            # The presigned URL cache hands out URLs with most of their lifetime left, far longer than
+            # the document stays cached
             dict_for_status_api.update({
                 "download_pre_singed_url": AwsUtility.create_presigned_url(s3_url_key)
             })
         logger.info(f'The current_statics  {dict_for_status_api}')
 
-        return dict_for_status_api
+        return StatusCache.put(request_id, dict_for_status_api, batch_request_obj.updated_on)
@@ -1,29 +1,41 @@
-import io
+import datetime
+import itertools
 import json
-import re
-import time
 from typing import Union, List
 
-import pytz
 import pandas as pd
-import datetime
+import pytz
 
+from sqlalchemy import func
 from starlette import status
-from boto3.session import Session
 
 from dependencies.configuration import Configuration
 from dependencies.constants import BatchRequestStatus
 from dependencies.logger import logger
 from dependencies.managers.database_manager import DatabaseManager
 
-from handlers.ecs_run_task_handler import ECSRunTaskHandler
+from handlers.ecs_dispatch_buffer import ECSDispatchBuffer
+from handlers.task.load_pipeline import BatchLoadPipeline
+from handlers.task.row_executor import RowExecutor
 from models.batch_request import IEBatchRequestLog
-from models.batch_status import IeBatchRunLog
+from utility.chunked_reader import S3ChunkedReader
+from utility.status_cache import StatusCache
 
 class BatchLoader:
     def __init__(self):
         self.db_manager = DatabaseManager()
         self.db_session = self.db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        self.pipeline = None
+        self.stop_requested = False
+
+    def request_stop(self):
+        """
+        Called from the SIGTERM handler: commit the chunks in flight, keep the checkpoint and stop.
+        """
+        logger.info("Batch loader stop requested")
+        self.stop_requested = True
+        if self.pipeline:
+            self.pipeline.request_stop()
 
     def _process_pan_list_batch(self, batch_request_obj):
         """
@@ -41,171 +53,126 @@ class BatchLoader:
             batch_request_obj.status = BatchRequestStatus.INVALID.value
             batch_request_obj.error_message = "INVALID PAN LIST"
             self.db_session.commit()
+            StatusCache.invalidate([batch_request_obj.request_id])
             return
 
         # Convert to DataFrame to reuse insert_into_batch_status_table logic
         df = pd.DataFrame({"pan": pan_list})
         self.db_session.commit()
 
-        self.update_request_table(batch_request_obj.id)
-        self.insert_into_batch_status_table(df, ent_id, batch_request_obj.id, env)
+        if not self.insert_into_batch_status_table([df], ent_id, batch_request_obj, env):
+            return
 
         logger.info("PAN list batch loading completed")
-        ECSRunTaskHandler().create_ecs_task(ecs_task_name="check_status_task", ecs_task_params=())
+        ECSDispatchBuffer.dispatch_once("check_status_task", Configuration.CHECK_STATUS_DISPATCH_WINDOW_SECONDS)
 
     @staticmethod
-    def sanitize_and_validate_pan(pan_raw: str) -> str | None:
-
-        if not pan_raw:
-            return None
-
-        # Remove any non-alphanumeric characters
-        pan_clean = re.sub(r"[^A-Za-z0-9]", "", pan_raw).upper()
-
-        if len(pan_clean) != 10:
-            return None
-
-        if not re.match(r"^[A-Z]{5}[0-9]{4}[A-Z]$", pan_clean):
-            return None
-
-        return pan_clean
-
-    @staticmethod
-    def download_s3(input_s3_link: str, batch_request_obj: IEBatchRequestLog):
+    def download_s3(input_s3_link: str):
         """
-        Download the s3_file from AWS S3 Bucket
+        Stream the s3_file from AWS S3 Bucket as DataFrame chunks.
+        The first chunk is read eagerly so an unreadable file fails before any row is inserted.
         :param input_s3_link: s3_link from batch request table
-        :param batch_request_obj : BatchRequest
-        :return: df
+        :return: iterator of DataFrame chunks
         """
         logger.info("Inside Downloading S3")
         try:
             link = input_s3_link.split("/")
-            session = Session()
-
-            s3 = session.resource("s3")
-            s3_file = s3.Object(bucket_name=Configuration.AWS_BUCKET, key="/".join(link[3:])).get()
+            chunks = S3ChunkedReader(Configuration.AWS_BUCKET, "/".join(link[3:])).iter_chunks()
 
-            file_extension = batch_request_obj.input_s3_url.split(".")[-1].lower()
-            if file_extension == "csv":
-                df = pd.read_csv(io.BytesIO(s3_file["Body"].read()), dtype=str, encoding="utf-8")
-            else:
-                df = pd.read_excel(io.BytesIO(s3_file["Body"].read()), engine="openpyxl", dtype=str)
-
-            logger.info("S3 File Downloaded Successfully")
-            return df
+            first_chunk = next(chunks, None)
+            logger.info("S3 File Download Started Successfully")
+            return itertools.chain([first_chunk] if first_chunk is not None else [], chunks)
 
         except Exception as e:
             logger.exception(f"Error occurred while downloading s3_file{e}")
             raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|S3 Utility Failed")
 
-    @staticmethod
-    def __create_client_ref_id(ent_id: int, row_id: int, batch_request_auto_id: int):
+    def insert_into_batch_status_table(
+            self, chunks, ent_id: int, batch_request_obj: IEBatchRequestLog, env
+    ) -> bool:
         """
-        Creates client reference number
-        :param ent_id: ent id
-        :param row_id: row id in Excel
-        :param batch_request_auto_id: BatchRequest ID
-        :return: client_ref_id
+        Insert every DataFrame chunk into the batch status table as it arrives,
+        overlapping parsing with the inserts through BatchLoadPipeline.
+        Rows below the batch's loaded_row_offset checkpoint were committed by an earlier run and are skipped.
+
+        :param chunks: iterable of DataFrame chunks indexed by row number
+        :return: True once the whole input is loaded, False if the load was stopped early
         """
-        _date = datetime.date.today()
+        start_offset = batch_request_obj.loaded_row_offset or 0
+        if start_offset:
+            logger.info(f"Resuming Batch Request ID {batch_request_obj.id} from row {start_offset}")
 
-        return f"{ent_id}_{_date}_{batch_request_auto_id}_{row_id}"
+        self.pipeline = BatchLoadPipeline(self.db_session, ent_id, batch_request_obj.id, env, start_offset)
+        if self.stop_requested:
+            self.pipeline.request_stop()
 
-    def insert_into_batch_status_table(
-            self, df, ent_id: int, batch_request_auto_id: int, env
-    ):
-        chunk_size = 500
-        logger.info(f"Batch Loader Chunk Size: {chunk_size}")
-        df = df.fillna("")
-        index = 0
-        for start in range(0, df.shape[0], chunk_size):
-            df_subset = df.iloc[start: start + chunk_size]
-            batch_status_objs = []
-
-            for idx, row in df_subset.iterrows():
-                pan_raw = row.get("pan", "")
-
-                pan = self.sanitize_and_validate_pan(pan_raw)
-                existing_client_ref_id = row.get("client_ref_id")
-                client_ref_id = existing_client_ref_id or self.__create_client_ref_id(
-                    ent_id,
-                    idx,
-                    batch_request_auto_id
-                )
-                tz = pytz.timezone("Asia/Kolkata")
-
-                request_body = json.dumps({
-                            "client_ref_id": client_ref_id,
-                             "pan": pan
-                })
-
-                batch_status_obj = IeBatchRunLog(
-                    env= env,
-                    cid=ent_id,
-                    batch_request_auto_id=batch_request_auto_id,
-                    client_ref_id=client_ref_id,
-                    processing_status=BatchRequestStatus.OPEN.value,
-                    batch_ref_num=index,
-                    pan=pan,
-                    request_body=request_body,
-                    retry_count=0,
-                    created_on=datetime.datetime.now(tz),
-                    updated_on=datetime.datetime.now(tz),
-                )
-
-                batch_status_objs.append(batch_status_obj)
-                index += 1
-
-            self.__insert_to_batch_status(batch_status_objs)
-
-    def __insert_to_batch_status(self, batch_status_objs: List):
-        for _ in range(3):
-            try:
-                self.db_session.bulk_save_objects(batch_status_objs)
-                self.db_session.commit()
-                logger.info("Inserted into batch status table")
-                return
-            except Exception:
-                logger.exception(
-                    f"Error occurred while bulk saving [Start {batch_status_objs[0]}, End {batch_status_objs[-1]}]"
-                )
-                self.db_session.rollback()
-                time.sleep(5)
+        try:
+            completed = self.pipeline.run(chunks)
+        finally:
+            self.pipeline = None
+
+        if not completed:
+            logger.info(f"Batch Request ID {batch_request_obj.id} stopped at its checkpoint, will resume later")
+            return False
 
-    def update_request_table(self, batch_request_auto_id: int):
+        self.db_session.query(IEBatchRequestLog).filter_by(id=batch_request_obj.id).update(
+            {"load_completed_on": datetime.datetime.now(pytz.timezone("Asia/Kolkata"))}
+        )
+        self.db_session.commit()
+        return True
+
+    def update_request_table(self, batch_request_auto_id: int) -> bool:
         """
-        Updates the batch request status to IN_PROGRESS
+        Claims the batch by moving it from DISPATCHED (or PENDING, when started by hand) to IN_PROGRESS
+        with a conditional UPDATE; only the loader whose UPDATE changed the batch loads it.
 
         :param batch_request_auto_id: id of batch request row
-        :returns: None
+        :returns: True if this loader claimed the batch
         """
         try:
-            self.db_session.query(IEBatchRequestLog).filter_by(id=batch_request_auto_id).update(
-                {"status": BatchRequestStatus.IN_PROGRESS.value}
+            claimed = self.db_session.query(IEBatchRequestLog).filter(
+                IEBatchRequestLog.id == batch_request_auto_id,
+                IEBatchRequestLog.status.in_([BatchRequestStatus.DISPATCHED.value, BatchRequestStatus.PENDING.value])
+            ).update(
+                {
+                    "status": BatchRequestStatus.IN_PROGRESS.value,
+                    # A non null checkpoint marks the load as started until load_completed_on is set
+                    "loaded_row_offset": func.coalesce(IEBatchRequestLog.loaded_row_offset, 0),
+                    "dispatch_lease_expires_at": None,
+                    "updated_on": datetime.datetime.now(pytz.timezone("Asia/Kolkata"))
+                },
+                synchronize_session=False
             )
 
             self.db_session.commit()
-            logger.info("Batch request status updated to IN_PROGRESS")
+            if claimed:
+                logger.info("Batch request status updated to IN_PROGRESS")
+            return claimed == 1
 
         except Exception:
             logger.exception("Error occurred while updating request table")
+            self.db_session.rollback()
+            return False
 
     def pending_batch_loader(self, received_request_id: Union[str, List[str]]):
         """
         1. Downloads Pending Excel file(s) from S3 Bucket
         2. Inserts details from Excel to batch status table
         3. Updates the batch request status to IN_PROGRESS
+
+        Batches are claimed one at a time as they are reached, so a batch dispatched to two loaders is
+        loaded by one; a batch whose earlier load was interrupted resumes from its checkpoint.
         """
         logger.info("Inside Pending Batch Loader")
 
         logger.info(f"Received request_id : {received_request_id}")
+        received_request_ids = [received_request_id] if isinstance(received_request_id, str) else list(received_request_id)
 
         batch_request_objs = (
             self.db_session.query(IEBatchRequestLog)
             .filter(
-                IEBatchRequestLog.status == BatchRequestStatus.PENDING.value,
-                IEBatchRequestLog.request_id == received_request_id
+                IEBatchRequestLog.status.in_([BatchRequestStatus.DISPATCHED.value, BatchRequestStatus.PENDING.value]),
+                IEBatchRequestLog.request_id.in_(received_request_ids)
             )
             .all()
         )
@@ -215,6 +182,14 @@ class BatchLoader:
             return
 
         for batch_request_obj in batch_request_objs:
+            if self.stop_requested:
+                break
+            if not self.update_request_table(batch_request_obj.id):
+                logger.info(f"Batch Request ID {batch_request_obj.id} already claimed by another loader, skipping")
+                continue
+            StatusCache.invalidate([batch_request_obj.request_id])
+            # Loaded rows are committed as Open chunk by chunk, so they can be executed while the load goes on
+            RowExecutor.dispatch()
             try:
                 logger.info(f"Processing Batch Request ID: {batch_request_obj.id}")
                 if batch_request_obj.pan_list:
@@ -226,9 +201,9 @@ class BatchLoader:
                 batch_request_obj.status = BatchRequestStatus.INVALID.value
                 batch_request_obj.error_message = "UPLOADED FILE IS INVALID"
                 self.db_session.commit()
+                StatusCache.invalidate([batch_request_obj.request_id])
 
         self.db_session.close()
-        self.db_manager.dispose()
 
     def _process_single_batch(self, batch_request_obj):
         logger.info("Inside the _process_single_batch")
@@ -236,14 +211,13 @@ class BatchLoader:
 
         input_s3_link = batch_request_obj.input_s3_url
         logger.info(f"S3_LINK: {input_s3_link}")
-        df = self.download_s3(input_s3_link, batch_request_obj)
-        df.columns = df.columns.str.strip().str.lower()
+        chunks = self.download_s3(input_s3_link)
         env = batch_request_obj.env
         self.db_session.commit()
 
-        self.update_request_table(batch_request_obj.id)
-        self.insert_into_batch_status_table(df, ent_id, batch_request_obj.id, env)
+        if not self.insert_into_batch_status_table(chunks, ent_id, batch_request_obj, env):
+            return
 
         logger.info("Batch Loading Completed")
 
-        ECSRunTaskHandler().create_ecs_task(ecs_task_name="check_status_task", ecs_task_params=())
+        ECSDispatchBuffer.dispatch_once("check_status_task", Configuration.CHECK_STATUS_DISPATCH_WINDOW_SECONDS)
@@ -1,11 +1,27 @@
+import datetime
+
+import pytz
+
 from dependencies.configuration import Configuration
 from dependencies.constants import BatchRequestStatus
 from dependencies.logger import logger
 from dependencies.managers.database_manager import DatabaseManager
 from handlers.output_api_handler import ExternalAPIHandler
+from utility.status_cache import StatusCache
+from utility.status_counter import BatchStatusCounter
 
 from models.batch_request import IEBatchRequestLog
-from models.batch_status import IeBatchRunLog
+
+from sqlalchemy import or_, select, update
+
+# current_statistics key for every run log processing_status that is reported
+STATISTICS_KEYS = {
+    BatchRequestStatus.FAILURE.value: 'failure',
+    BatchRequestStatus.COMPLETED.value: 'completed',
+    BatchRequestStatus.OPEN.value: 'open',
+    BatchRequestStatus.ERROR.value: 'error',
+    BatchRequestStatus.IN_PROGRESS.value: 'inprogress',
+}
 
 
 class CheckStatus:
@@ -14,68 +30,114 @@ class CheckStatus:
         self.db_manager = DatabaseManager()
         self.db_session = self.db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
 
+    @staticmethod
+    def build_statistics(status_counts: dict) -> dict:
+        """
+        :param status_counts: processing_status to row count of one batch
+        :return: current_statistics dict of the batch
+        """
+        statistics = {key: 0 for key in STATISTICS_KEYS.values()}
+        for processing_status, count in status_counts.items():
+            if processing_status in STATISTICS_KEYS:
+                statistics[STATISTICS_KEYS[processing_status]] += count
+        statistics['total'] = sum(status_counts.values())
+        return statistics
+
+    @staticmethod
+    def collect_statistics(db_session, total_counts: dict) -> dict:
+        """
+        Read the statistics of every batch from its status counters, one primary key range per batch.
+        Batches whose counters are missing or do not add up to their total_count, and every batch while
+        STATUS_COUNTERS_AUTHORITATIVE is off, are counted with one GROUP BY over the run log instead.
+
+        :param db_session: batch DB session
+        :param total_counts: IEBatchRequestLog id to its total_count
+        :return: batch request id to its current_statistics dict
+        """
+        batch_request_ids = list(total_counts)
+        if Configuration.STATUS_COUNTERS_AUTHORITATIVE:
+            status_counts = BatchStatusCounter.counts(db_session, batch_request_ids)
+            recount_ids = [
+                batch_request_id for batch_request_id, counts in status_counts.items()
+                if not counts or sum(counts.values()) != (total_counts[batch_request_id] or 0)
+            ]
+        else:
+            status_counts, recount_ids = {}, batch_request_ids
+
+        if recount_ids:
+            if Configuration.STATUS_COUNTERS_AUTHORITATIVE:
+                logger.info(f'Counters of {len(recount_ids)} batches do not match their total_count, recounting the run log')
+            status_counts.update(BatchStatusCounter.actual_counts(db_session, recount_ids))
+
+        return {
+            batch_request_id: CheckStatus.build_statistics(counts)
+            for batch_request_id, counts in status_counts.items()
+        }
+
     def update_current_statistics(self):
         """
         Query for the update of the current_static_batch
         """
         try:
             logger.info("Inside the update_current_statistics function")
-            batch_request_objs = self.db_session.query(IEBatchRequestLog).filter(
-                IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value
+
+            # Batches whose loader is still inserting rows are not counted yet
+            batches = self.db_session.execute(
+                select(IEBatchRequestLog.id, IEBatchRequestLog.request_id, IEBatchRequestLog.total_count).where(
+                    IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value,
+                    or_(
+                        IEBatchRequestLog.loaded_row_offset.is_(None),
+                        IEBatchRequestLog.load_completed_on.isnot(None)
+                    )
+                )
             ).all()
+            request_ids = {batch_request_id: request_id for batch_request_id, request_id, _ in batches}
+            batch_request_ids = list(request_ids)
 
-            logger.info(f'Count of Pending Batch Request: {len(batch_request_objs)}')
-
-            for batch_request_obj in batch_request_objs:
-                logger.info(f'Creating current_statistics for BatchRequest: {batch_request_obj.id}')
-
-                batch_request_obj.current_statistics = {
-                    'failure': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id,
-                        processing_status=BatchRequestStatus.FAILURE.value
-                    ).count(),
-                    'completed': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id,
-                        processing_status=BatchRequestStatus.COMPLETED.value
-                    ).count(),
-                    'open': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id,
-                        processing_status=BatchRequestStatus.OPEN.value
-                    ).count(),
-                    'total': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id
-                    ).count(),
-                    'error': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id,
-                        processing_status=BatchRequestStatus.ERROR.value
-                    ).count(),
-                    'inprogress': self.db_session.query(IeBatchRunLog).filter_by(
-                        batch_request_auto_id=batch_request_obj.id,
-                        processing_status=BatchRequestStatus.IN_PROGRESS.value
-                    ).count()
-                }
+            logger.info(f'Count of Pending Batch Request: {len(batch_request_ids)}')
+            if not batch_request_ids:
+                return
 
+            now = datetime.datetime.now(pytz.timezone("Asia/Kolkata"))
+            statistics = self.collect_statistics(
+                self.db_session, {batch_request_id: total_count for batch_request_id, _, total_count in batches}
+            )
+
+            updates = []
+            compiling_batch_ids = []
+            for batch_request_id, current_statistics in statistics.items():
+                status = BatchRequestStatus.IN_PROGRESS.value
                 if (
-                    (
-                        batch_request_obj.current_statistics.get('failure', 0) +
-                        batch_request_obj.current_statistics.get('completed', 0)
-                    ) == batch_request_obj.current_statistics.get('total', 0) and
-                    batch_request_obj.current_statistics.get('total', 0) != 0
+                    current_statistics['failure'] + current_statistics['completed'] == current_statistics['total'] and
+                    current_statistics['total'] != 0
                 ):
-                    batch_request_obj.status = BatchRequestStatus.COMPLING_OUTPUT.value
+                    status = BatchRequestStatus.COMPLING_OUTPUT.value
+                    compiling_batch_ids.append(batch_request_id)
 
-                    self.db_session.commit()
-                    ExternalAPIHandler().process_completed_batches()
+                updates.append({
+                    'id': batch_request_id,
+                    'current_statistics': current_statistics,
+                    'status': status,
+                    'updated_on': now
+                })
+                logger.info(f'Statistics Generated for BatchRequest [{batch_request_id}]: {current_statistics}')
 
-                self.db_session.commit()
+            # Bulk UPDATE by primary key, executed as a single executemany. The status guard leaves
+            # alone any batch another worker has moved on since it was selected.
+            self.db_session.execute(
+                update(IEBatchRequestLog).where(IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value),
+                updates,
+                execution_options={"synchronize_session": None}
+            )
+            self.db_session.commit()
+            StatusCache.invalidate(list(request_ids.values()))
 
-                logger.info(
-                    f'Statistics Generated for BatchRequest [{batch_request_obj.id}]: {batch_request_obj.current_statistics}'
-                )
+            if compiling_batch_ids:
+                logger.info(f'Batches moved to COMPLING_OUTPUT: {compiling_batch_ids}')
+                ExternalAPIHandler().process_completed_batches(compiling_batch_ids)
 
         except Exception:
             logger.exception('Some exception occurred in updating the current_statistics column')
             self.db_session.rollback()
         finally:
             self.db_session.close()
-            self.db_manager.dispose()
@@ -0,0 +1,207 @@
+import datetime
+import queue
+import threading
+import time
+
+import pytz
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from handlers.task.run_log_writer import RunLogBulkWriter
+from models.batch_request import IEBatchRequestLog
+
+_END_OF_INPUT = None
+
+
+class _CommitWatermark:
+    """
+    Tracks chunks committed out of order by the insert workers and exposes the highest
+    row offset below which every row is committed.
+    """
+
+    def __init__(self, offset: int):
+        self.offset = offset
+        self._committed = {}
+        self._lock = threading.Lock()
+
+    def committed(self, start: int, end: int) -> int | None:
+        """
+        Record the committed batch_ref_num range [start, end).
+
+        :return: the new offset if it moved, else None
+        """
+        with self._lock:
+            self._committed[start] = end
+            moved = False
+            while self.offset in self._committed:
+                self.offset = self._committed.pop(self.offset)
+                moved = True
+            return self.offset if moved else None
+
+
+class BatchLoadPipeline:
+    """
+    Producer/consumer pipeline for loading one batch.
+
+    The calling thread downloads and parses the input chunks and builds the run log column
+    arrays, and a pool of insert workers, each on its own pooled connection, drains them
+    from a bounded queue. Parsing and DB round-trips overlap, and the queue bound keeps
+    memory flat when the database is the slower side.
+
+    Every commit moves the batch's loaded_row_offset checkpoint forward over the gap free
+    prefix of committed rows, so a restarted load resumes from there.
+    """
+
+    def __init__(self, db_session, ent_id: int, batch_request_auto_id: int, env: str, start_offset: int = 0):
+        """
+        :param db_session: loader session, used for column building; its engine supplies the worker connections
+        :param start_offset: rows already committed by an earlier run, skipped on input
+        """
+        self.engine = db_session.get_bind()
+        self.batch_request_auto_id = batch_request_auto_id
+        self.start_offset = start_offset
+        self.watermark = _CommitWatermark(start_offset)
+        self._tz = pytz.timezone("Asia/Kolkata")
+        self.workers = Configuration.LOADER_INSERT_WORKERS
+        self.queue = queue.Queue(maxsize=Configuration.LOADER_QUEUE_SIZE)
+
+        self.builder = RunLogBulkWriter(db_session, ent_id, batch_request_auto_id, env, start_offset)
+        self.writers = [
+            RunLogBulkWriter(Session(self.engine, future=True), ent_id, batch_request_auto_id, env)
+            for _ in range(self.workers)
+        ]
+
+        self._failure = None
+        self._interrupted = False
+        self._stop = threading.Event()
+
+        self.rows_parsed = 0
+        self.parse_seconds = 0.0
+        self.build_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def request_stop(self):
+        """
+        Stop taking new chunks. Chunks already being inserted are committed before run returns.
+        """
+        logger.info("[LOAD_PIPELINE] Stop requested, finishing in-flight chunks")
+        self._interrupted = True
+        self._stop.set()
+
+    def run(self, chunks) -> bool:
+        """
+        Load every DataFrame chunk and block until all of them are committed.
+        Raises the first insert failure after the workers have stopped.
+
+        :param chunks: iterable of DataFrame chunks indexed by row number
+        :return: True if the whole input was loaded, False if the load was stopped early
+        """
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._insert_worker, args=(writer,), name=f"batch-insert-{number}", daemon=True)
+            for number, writer in enumerate(self.writers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._produce(chunks)
+        finally:
+            for _ in threads:
+                self.queue.put(_END_OF_INPUT)
+            for thread in threads:
+                thread.join()
+            for writer in self.writers:
+                writer.db_session.close()
+
+        self._log_throughput(time.perf_counter() - started)
+
+        if self._failure:
+            raise self._failure
+
+        return not self._interrupted
+
+    def _produce(self, chunks):
+        chunks = iter(chunks)
+        rows_to_skip = self.start_offset
+        while not self._stop.is_set():
+            parse_started = time.perf_counter()
+            chunk = next(chunks, None)
+            self.parse_seconds += time.perf_counter() - parse_started
+            if chunk is None:
+                return
+
+            if rows_to_skip:
+                skipped = min(rows_to_skip, len(chunk))
+                chunk = chunk.iloc[skipped:]
+                rows_to_skip -= skipped
+                if chunk.empty:
+                    continue
+
+            chunk = chunk.fillna("")
+            self.rows_parsed += len(chunk)
+
+            # Slice by the workers' current adaptive chunk size
+            slice_size = sum(writer.chunk_size for writer in self.writers) // len(self.writers)
+            for start in range(0, len(chunk), slice_size):
+                if self._stop.is_set():
+                    return
+                build_started = time.perf_counter()
+                columns = self.builder.build_columns(chunk.iloc[start: start + slice_size])
+                self.build_seconds += time.perf_counter() - build_started
+
+                blocked_started = time.perf_counter()
+                self.queue.put(columns)
+                self.blocked_seconds += time.perf_counter() - blocked_started
+
+    def _insert_worker(self, writer: RunLogBulkWriter):
+        while True:
+            columns = self.queue.get()
+            if columns is _END_OF_INPUT:
+                return
+            if self._stop.is_set():
+                continue
+
+            try:
+                writer.insert_columns(columns)
+                offset = self.watermark.committed(
+                    int(columns["batch_ref_num"][0]), int(columns["batch_ref_num"][-1]) + 1
+                )
+                if offset is not None:
+                    self._save_checkpoint(writer.db_session, offset)
+            except Exception as e:
+                logger.exception(f"[{threading.current_thread().name}] Insert worker failed")
+                self._failure = self._failure or e
+                self._stop.set()
+
+    def _save_checkpoint(self, db_session, offset: int):
+        # Workers can finish out of order, so the checkpoint only ever moves forward
+        db_session.execute(
+            update(IEBatchRequestLog)
+            .where(
+                IEBatchRequestLog.id == self.batch_request_auto_id,
+                or_(IEBatchRequestLog.loaded_row_offset.is_(None), IEBatchRequestLog.loaded_row_offset < offset)
+            )
+            .values(loaded_row_offset=offset, updated_on=datetime.datetime.now(self._tz))
+        )
+        db_session.commit()
+
+    def _log_throughput(self, wall_seconds: float):
+        rows_written = sum(writer.rows_written for writer in self.writers)
+        logger.info(
+            f"[LOAD_PIPELINE] {rows_written}/{self.rows_parsed} rows in {wall_seconds:.2f}s "
+            f"({rows_written / max(wall_seconds, 1e-6):.0f} rows/sec) with {self.workers} insert workers"
+        )
+        logger.info(
+            f"[LOAD_PIPELINE] parse stage: {self.rows_parsed / max(self.parse_seconds, 1e-6):.0f} rows/sec, "
+            f"build stage: {self.rows_parsed / max(self.build_seconds, 1e-6):.0f} rows/sec, "
+            f"blocked on full queue: {self.blocked_seconds:.2f}s"
+        )
+        for number, writer in enumerate(self.writers):
+            logger.info(
+                f"[LOAD_PIPELINE] insert worker {number}: {writer.rows_written} rows, "
+                f"{writer.rows_written / max(writer.insert_seconds, 1e-6):.0f} rows/sec, "
+                f"final chunk size {writer.chunk_size}"
+            )
@@ -0,0 +1,171 @@
+import csv
+import io
+import time
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from models.batch_status import IeBatchRunLog
+from utility.aws import AwsUtility
+from utility.s3_multipart import S3MultipartUpload
+
+OUTPUT_COLUMNS = ("client_ref_id", "pan", "processing_status", "http_response_code", "response")
+
+OUTPUT_SCHEMA = pa.schema([
+    ("client_ref_id", pa.string()),
+    ("pan", pa.string()),
+    ("processing_status", pa.string()),
+    ("http_response_code", pa.int32()),
+    ("response", pa.string()),
+])
+
+
+class _MultipartSink(io.RawIOBase):
+    """
+    Write-only, non-seekable stream into an S3 multipart upload.
+    """
+
+    def __init__(self, upload: S3MultipartUpload):
+        super().__init__()
+        self._upload = upload
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self._upload.write(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+
+class OutputFileBuilder:
+    """
+    Compiles a batch's output file from its run log rows, in input order, and streams it to S3 as
+    a multipart upload while it is written, as xlsx (openpyxl write-only), csv or parquet.
+
+    Rows are read page by page: a page is a range of batch_ref_num, which is the row number in the
+    input file, looked up on the (batch_request_auto_id, batch_ref_num) unique key and put in order in
+    memory. Only one page and the upload's in-flight parts are held at a time, whatever the batch size.
+
+    The loader numbers rows from 0 without gaps and may keep rows the validator did not count in
+    total_count, so paging carries on past total_count until a page comes back empty, and the build
+    fails unless every run log row of the batch was written.
+    """
+
+    def __init__(
+            self, engine, batch_request_id: int, input_s3_url: str | None, total_rows: int, output_format: str = None,
+            request_id: str = None
+    ):
+        self.engine = engine
+        self.batch_request_id = batch_request_id
+        self.total_rows = total_rows or 0
+        self.output_format = (output_format or Configuration.OUTPUT_FORMAT).lower()
+        self.page_size = Configuration.OUTPUT_PAGE_SIZE
+
+        self.output_s3_url = AwsUtility.output_url_for(input_s3_url, self.output_format, request_id=request_id)
+        self.rows_written = 0
+        self.missing_rows = 0
+        self.run_log_rows = None
+
+    def iter_pages(self, db_session):
+        """
+        :return: lists of output rows in input order, one page of batch_ref_num at a time
+        """
+        start = 0
+        while True:
+            end = start + self.page_size
+            if start < self.total_rows:
+                end = min(end, self.total_rows)
+            ref_nums = range(start, end)
+            rows = db_session.execute(
+                select(IeBatchRunLog.batch_ref_num, *(getattr(IeBatchRunLog, column) for column in OUTPUT_COLUMNS))
+                .where(
+                    IeBatchRunLog.batch_request_auto_id == self.batch_request_id,
+                    IeBatchRunLog.batch_ref_num.in_([str(ref_num) for ref_num in ref_nums])
+                )
+            ).all()
+
+            if start >= self.total_rows:
+                if not rows:
+                    return
+                logger.info(f"[OUTPUT_BUILDER] Batch {self.batch_request_id}: {len(rows)} rows past total_count {self.total_rows}")
+            else:
+                self.missing_rows += len(ref_nums) - len(rows)
+            rows.sort(key=lambda row: int(row[0]))
+            yield [row[1:] for row in rows]
+            start = end
+
+    def build(self) -> str:
+        """
+        :return: s3 url of the uploaded output file
+        """
+        started = time.perf_counter()
+        upload = S3MultipartUpload(Configuration.AWS_BUCKET, AwsUtility.s3_key_from_url(self.output_s3_url))
+        upload.start()
+        try:
+            with Session(self.engine, future=True) as db_session:
+                self.run_log_rows = db_session.scalar(
+                    select(func.count()).where(IeBatchRunLog.batch_request_auto_id == self.batch_request_id)
+                )
+                pages = self.iter_pages(db_session)
+                sink = _MultipartSink(upload)
+                if self.output_format == "csv":
+                    self._write_csv(sink, pages)
+                elif self.output_format == "parquet":
+                    self._write_parquet(sink, pages)
+                else:
+                    self._write_xlsx(sink, pages)
+            if self.rows_written != self.run_log_rows:
+                raise ValueError(
+                    f"Batch {self.batch_request_id}: {self.rows_written} rows written of {self.run_log_rows} in the run log"
+                )
+        except Exception:
+            upload.abort()
+            raise
+        upload.complete()
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"[OUTPUT_BUILDER] Batch {self.batch_request_id}: {self.rows_written} rows written to {self.output_s3_url} "
+            f"in {elapsed:.2f}s ({self.rows_written / max(elapsed, 1e-6):.0f} rows/sec), {self.missing_rows} rows missing"
+        )
+        return self.output_s3_url
+
+    def _write_csv(self, sink, pages):
+        with io.TextIOWrapper(io.BufferedWriter(sink, buffer_size=1024 * 1024), encoding="utf-8", newline="") as text:
+            writer = csv.writer(text)
+            writer.writerow(OUTPUT_COLUMNS)
+            for page in pages:
+                writer.writerows(page)
+                self.rows_written += len(page)
+
+    def _write_parquet(self, sink, pages):
+        with pq.ParquetWriter(sink, OUTPUT_SCHEMA, compression="zstd") as writer:
+            for page in pages:
+                if not page:
+                    continue
+                writer.write_table(pa.Table.from_pylist(
+                    [dict(zip(OUTPUT_COLUMNS, row)) for row in page], schema=OUTPUT_SCHEMA
+                ))
+                self.rows_written += len(page)
+
+    def _write_xlsx(self, sink, pages):
+        # Write-only mode spools the sheet to a temp file (serialised with lxml when installed); the zip is
+        # streamed to the sink on save
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet("output")
+        worksheet.append(OUTPUT_COLUMNS)
+        for page in pages:
+            for row in page:
+                worksheet.append(row)
+            self.rows_written += len(page)
+        workbook.save(sink)
@@ -0,0 +1,347 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+
+import httpx
+import pytz
+from sqlalchemy import and_, bindparam, or_, select, update
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.ecs_dispatch_buffer import ECSDispatchBuffer
+from models.batch_request import IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from utility.executors import Executors
+from utility.status_counter import BatchStatusCounter
+
+
+class RowExecutor:
+    """
+    Drains the Open run log rows of IN_PROGRESS batches against ROW_EXECUTOR_API_URL on one event loop.
+
+    Rows are claimed ROW_EXECUTOR_CLAIM_SIZE at a time by moving them to Inprogress with SKIP LOCKED, so
+    any number of executors share the backlog, and each row's request_body is posted by one of
+    ROW_EXECUTOR_CONCURRENCY coroutines over pooled HTTP/2 clients. Results are written in
+    groups, one executemany per group with the status counters moved in the same transaction; a 2xx
+    response makes the row Completed, anything else Error, which FailedRetry retries. The DB work runs
+    on the I/O thread pool so it never blocks the calls in flight.
+    """
+
+    def __init__(self, batch_request_ids: list = None, concurrency: int = None):
+        """
+        :param batch_request_ids: batches to execute; every IN_PROGRESS batch if None
+        :param concurrency: calls in flight, defaults to ROW_EXECUTOR_CONCURRENCY
+        """
+        self.batch_request_ids = [int(batch_id) for batch_id in batch_request_ids] if batch_request_ids else None
+        self.concurrency = concurrency or Configuration.ROW_EXECUTOR_CONCURRENCY
+        self.claim_size = max(Configuration.ROW_EXECUTOR_CLAIM_SIZE, self.concurrency)
+        self._tz = pytz.timezone("Asia/Kolkata")
+
+        self._stop = False
+        self._results = []
+        self._flush_lock = None
+        self._in_flight = 0
+        self.completed = 0
+        self.errored = 0
+
+    @staticmethod
+    def dispatch():
+        """
+        Start execute_rows_task, at most once per ROW_EXECUTOR_DISPATCH_WINDOW_SECONDS.
+        """
+        if not Configuration.ROW_EXECUTOR_API_URL:
+            return
+        ECSDispatchBuffer.dispatch_once("execute_rows_task", Configuration.ROW_EXECUTOR_DISPATCH_WINDOW_SECONDS)
+
+    def request_stop(self):
+        """
+        Called on shutdown: stop claiming, finish the calls in flight, write their results and put the
+        claimed rows not yet called back to Open.
+        """
+        logger.info("[ROW_EXECUTOR] Stop requested")
+        self._stop = True
+
+    @staticmethod
+    def build_client(concurrency: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=Configuration.ROW_EXECUTOR_HTTP2,
+            timeout=Configuration.ROW_EXECUTOR_HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+    async def run(self) -> dict:
+        """
+        Execute rows until none is left to claim for ROW_EXECUTOR_IDLE_SECONDS, or a stop is requested.
+
+        :return: {"completed", "errored", "seconds"}
+        """
+        started = time.perf_counter()
+        self._flush_lock = asyncio.Lock()
+        queue = asyncio.Queue()
+
+        per_client = max(1, Configuration.ROW_EXECUTOR_CLIENT_CONNECTIONS)
+        async with AsyncExitStack() as stack:
+            clients = [
+                await stack.enter_async_context(self.build_client(min(per_client, self.concurrency)))
+                for _ in range(math.ceil(self.concurrency / per_client))
+            ]
+            workers = [
+                asyncio.create_task(self._work(clients[number // per_client], queue)) for number in range(self.concurrency)
+            ]
+            workers_done = asyncio.Event()
+            flusher = asyncio.create_task(self._flush_periodically(workers_done))
+            try:
+                await self._claim_loop(queue)
+            finally:
+                for _ in workers:
+                    queue.put_nowait(None)
+                await asyncio.gather(*workers, return_exceptions=True)
+                # Not cancelled, so a write in progress is never cut off; its last flush writes what is left
+                workers_done.set()
+                await flusher
+
+        summary = {"completed": self.completed, "errored": self.errored, "seconds": time.perf_counter() - started}
+        logger.info(
+            f"[ROW_EXECUTOR] {summary['completed']} rows completed, {summary['errored']} errored in "
+            f"{summary['seconds']:.2f}s ({(summary['completed'] + summary['errored']) / max(summary['seconds'], 1e-6):.0f} rows/sec)"
+        )
+        return summary
+
+    async def _claim_loop(self, queue: asyncio.Queue):
+        idle_since = None
+        while not self._stop:
+            # Refilled while a claim's worth of rows is still queued, so the workers never wait for the DB
+            if queue.qsize() >= self.claim_size:
+                await asyncio.sleep(0.01)
+                continue
+
+            try:
+                rows = await Executors.run_io(self.claim, self.claim_size)
+            except Exception:
+                logger.exception("[ROW_EXECUTOR] Could not claim rows")
+                rows = []
+            for row in rows:
+                queue.put_nowait(row)
+            if rows:
+                idle_since = None
+                continue
+
+            if queue.empty() and self._in_flight == 0:
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since >= Configuration.ROW_EXECUTOR_IDLE_SECONDS:
+                    break
+            await asyncio.sleep(Configuration.ROW_EXECUTOR_POLL_SECONDS)
+
+        unstarted = []
+        while not queue.empty():
+            unstarted.append(queue.get_nowait())
+        if unstarted:
+            await Executors.run_io(self.release, unstarted)
+
+    async def _work(self, client: httpx.AsyncClient, queue: asyncio.Queue):
+        while True:
+            row = await queue.get()
+            if row is None:
+                return
+            self._in_flight += 1
+            try:
+                # Appended after the call returns: a flush in the meantime swaps self._results for a new list
+                result = await self.call(client, row)
+            finally:
+                self._in_flight -= 1
+            self._results.append(result)
+            if len(self._results) >= Configuration.ROW_EXECUTOR_FLUSH_ROWS:
+                await self._flush()
+
+    async def _flush_periodically(self, workers_done: asyncio.Event):
+        while not workers_done.is_set():
+            try:
+                await asyncio.wait_for(workers_done.wait(), Configuration.ROW_EXECUTOR_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+
+    async def _flush(self):
+        async with self._flush_lock:
+            results, self._results = self._results, []
+            if not results:
+                return
+            try:
+                await Executors.run_io(self.write_results, results)
+            except Exception:
+                # The rows stay Inprogress and are claimed again after ROW_EXECUTOR_CLAIM_TIMEOUT_MINUTES
+                logger.exception(f"[ROW_EXECUTOR] Could not write the results of {len(results)} rows")
+                return
+            for result in results:
+                if result["status"] == BatchRequestStatus.COMPLETED.value:
+                    self.completed += 1
+                else:
+                    self.errored += 1
+
+    async def call(self, client: httpx.AsyncClient, row: dict) -> dict:
+        """
+        Post one row's request_body.
+
+        :return: the row's result columns
+        """
+        start_time = datetime.now(self._tz)
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                Configuration.ROW_EXECUTOR_API_URL, content=row["request_body"] or "{}",
+                headers={"Content-Type": "application/json"}
+            )
+            http_response_code, body = response.status_code, response.text
+        except httpx.HTTPError as e:
+            http_response_code, body = None, f"{type(e).__name__}: {e}"
+
+        return {
+            "run_id": row["id"],
+            "batch_request_auto_id": row["batch_request_auto_id"],
+            "status": (
+                BatchRequestStatus.COMPLETED.value
+                if http_response_code is not None and 200 <= http_response_code < 300
+                else BatchRequestStatus.ERROR.value
+            ),
+            "http_response_code": http_response_code,
+            "response": body,
+            "start_time": start_time,
+            "tat": int((time.perf_counter() - started) * 1000),
+        }
+
+    def claim(self, limit: int) -> list:
+        """
+        Move up to limit Open rows, and Inprogress rows whose claim timed out, to Inprogress in one transaction.
+
+        :return: claimed rows as {"id", "batch_request_auto_id", "request_body"}
+        """
+        db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        try:
+            batch_request_ids = self.batch_request_ids or db_session.scalars(
+                select(IEBatchRequestLog.id).where(IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value)
+            ).all()
+            if not batch_request_ids:
+                db_session.commit()
+                return []
+
+            now = datetime.now(self._tz)
+            rows = db_session.execute(
+                select(
+                    IeBatchRunLog.id, IeBatchRunLog.batch_request_auto_id, IeBatchRunLog.request_body,
+                    IeBatchRunLog.processing_status
+                )
+                .where(
+                    IeBatchRunLog.batch_request_auto_id.in_(batch_request_ids),
+                    or_(
+                        IeBatchRunLog.processing_status == BatchRequestStatus.OPEN.value,
+                        and_(
+                            IeBatchRunLog.processing_status == BatchRequestStatus.IN_PROGRESS.value,
+                            IeBatchRunLog.start_time < now - timedelta(minutes=Configuration.ROW_EXECUTOR_CLAIM_TIMEOUT_MINUTES)
+                        )
+                    )
+                )
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                db_session.commit()
+                return []
+
+            db_session.execute(
+                update(IeBatchRunLog)
+                .where(IeBatchRunLog.id.in_([row.id for row in rows]))
+                .values(processing_status=BatchRequestStatus.IN_PROGRESS.value, start_time=now)
+                .execution_options(synchronize_session=False)
+            )
+            opened = defaultdict(int)
+            for row in rows:
+                if row.processing_status == BatchRequestStatus.OPEN.value:
+                    opened[row.batch_request_auto_id] += 1
+            for batch_request_auto_id, count in opened.items():
+                BatchStatusCounter.move(
+                    db_session, batch_request_auto_id, BatchRequestStatus.OPEN.value, BatchRequestStatus.IN_PROGRESS.value, count
+                )
+            db_session.commit()
+            return [
+                {"id": row.id, "batch_request_auto_id": row.batch_request_auto_id, "request_body": row.request_body}
+                for row in rows
+            ]
+        except Exception:
+            db_session.rollback()
+            raise
+        finally:
+            db_session.close()
+
+    def write_results(self, results: list):
+        """
+        Write a group of results and move their rows' counters, in one transaction.
+        """
+        db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        try:
+            table = IeBatchRunLog.__table__
+            # One executemany; only rows still Inprogress are written
+            updated = db_session.connection().execute(
+                update(table)
+                .where(table.c.id == bindparam("run_id"), table.c.processing_status == BatchRequestStatus.IN_PROGRESS.value)
+                .values(
+                    processing_status=bindparam("status"),
+                    http_response_code=bindparam("http_response_code"),
+                    response=bindparam("response"),
+                    start_time=bindparam("start_time"),
+                    tat=bindparam("tat")
+                ),
+                results
+            )
+            if updated.rowcount not in (-1, len(results)):
+                logger.error(
+                    f"[ROW_EXECUTOR] {len(results) - updated.rowcount} rows were no longer Inprogress, "
+                    f"counter_reconcile corrects their counters"
+                )
+
+            deltas = defaultdict(lambda: defaultdict(int))
+            for result in results:
+                deltas[result["batch_request_auto_id"]][BatchRequestStatus.IN_PROGRESS.value] -= 1
+                deltas[result["batch_request_auto_id"]][result["status"]] += 1
+            for batch_request_auto_id, batch_deltas in deltas.items():
+                BatchStatusCounter.add(db_session, batch_request_auto_id, batch_deltas)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            raise
+        finally:
+            db_session.close()
+
+    def release(self, rows: list):
+        """
+        Put claimed rows that were never called back to Open.
+        """
+        db_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        try:
+            db_session.execute(
+                update(IeBatchRunLog)
+                .where(
+                    IeBatchRunLog.id.in_([row["id"] for row in rows]),
+                    IeBatchRunLog.processing_status == BatchRequestStatus.IN_PROGRESS.value
+                )
+                .values(processing_status=BatchRequestStatus.OPEN.value, start_time=None)
+                .execution_options(synchronize_session=False)
+            )
+            released = defaultdict(int)
+            for row in rows:
+                released[row["batch_request_auto_id"]] += 1
+            for batch_request_auto_id, count in released.items():
+                BatchStatusCounter.move(
+                    db_session, batch_request_auto_id, BatchRequestStatus.IN_PROGRESS.value, BatchRequestStatus.OPEN.value, count
+                )
+            db_session.commit()
+            logger.info(f"[ROW_EXECUTOR] Released {len(rows)} claimed rows back to Open")
+        except Exception:
+            db_session.rollback()
+            raise
+        finally:
+            db_session.close()
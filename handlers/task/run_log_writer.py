@@ -0,0 +1,220 @@
+import datetime
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pytz
+from sqlalchemy import insert, text
+from starlette import status
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from models.batch_status import IeBatchRunLog
+from utility.pan_validator import PanValidator
+from utility.status_counter import BatchStatusCounter
+
+RUN_LOG_COLUMNS = (
+    "env",
+    "cid",
+    "batch_request_auto_id",
+    "client_ref_id",
+    "processing_status",
+    "batch_ref_num",
+    "pan",
+    "request_body",
+    "retry_count",
+    "created_on",
+    "updated_on",
+)
+
+
+class RunLogBulkWriter:
+    """
+    Writes loader rows into ie_individual_run_log with SQLAlchemy Core.
+
+    Column arrays are built once per chunk from the DataFrame instead of one ORM object per row,
+    and each chunk goes out as a multi-row executemany INSERT. The chunk size follows the measured
+    commit latency, so it grows on a fast database and backs off when commits slow down.
+    On MySQL the insert skips rows already present on (batch_request_auto_id, batch_ref_num), so a
+    resumed load can send a chunk twice without duplicating rows. The rows actually inserted are
+    added to the batch's Open counter in the same transaction.
+    """
+
+    def __init__(self, db_session, ent_id: int, batch_request_auto_id: int, env: str, start_batch_ref_num: int = 0):
+        self.db_session = db_session
+        self.ent_id = ent_id
+        self.batch_request_auto_id = batch_request_auto_id
+        self.env = env
+
+        self.chunk_size = Configuration.LOADER_MIN_CHUNK_SIZE
+        self.next_batch_ref_num = start_batch_ref_num
+        self.rows_written = 0
+        self.insert_seconds = 0.0
+
+        self._tz = pytz.timezone("Asia/Kolkata")
+        self._client_ref_prefix = f"{ent_id}_{datetime.date.today()}_{batch_request_auto_id}_"
+        is_mysql = self.db_session.get_bind().dialect.name == "mysql"
+        self._use_load_data = Configuration.LOADER_USE_LOAD_DATA and is_mysql
+
+        self._insert_statement = insert(IeBatchRunLog.__table__)
+        if is_mysql:
+            # Rows sent again after a restart hit the (batch_request_auto_id, batch_ref_num) key and are skipped,
+            # so the affected row count is exactly the number of new rows
+            self._insert_statement = self._insert_statement.prefix_with("IGNORE")
+
+    def build_columns(self, df: pd.DataFrame) -> dict:
+        """
+        Build the run log column arrays for one chunk of the input file.
+
+        :param df: input rows, indexed by their row number in the file
+        :return: column name to list of values
+        """
+        rows = len(df)
+        pans = PanValidator.sanitize(df["pan"] if "pan" in df.columns else pd.Series("", index=df.index)).sanitized
+
+        generated_ref_ids = self._client_ref_prefix + df.index.astype(str)
+        if "client_ref_id" in df.columns:
+            existing_ref_ids = df["client_ref_id"].fillna("").astype(str)
+            client_ref_ids = existing_ref_ids.where(existing_ref_ids != "", generated_ref_ids)
+        else:
+            client_ref_ids = pd.Series(generated_ref_ids, index=df.index)
+        client_ref_ids = client_ref_ids.tolist()
+
+        # PANs are plain alphanumerics, so only the client_ref_id needs JSON escaping
+        pan_values = pans.tolist()
+        request_bodies = [
+            '{"client_ref_id": ' + json.dumps(client_ref_id) + ', "pan": ' + (f'"{pan}"' if pan else 'null') + '}'
+            for client_ref_id, pan in zip(client_ref_ids, pan_values)
+        ]
+
+        now = datetime.datetime.now(self._tz)
+        start = self.next_batch_ref_num
+        self.next_batch_ref_num += rows
+
+        return {
+            "env": [self.env] * rows,
+            "cid": [self.ent_id] * rows,
+            "batch_request_auto_id": [self.batch_request_auto_id] * rows,
+            "client_ref_id": client_ref_ids,
+            "processing_status": [BatchRequestStatus.OPEN.value] * rows,
+            "batch_ref_num": [str(ref_num) for ref_num in range(start, start + rows)],
+            "pan": pan_values,
+            "request_body": request_bodies,
+            "retry_count": [0] * rows,
+            "created_on": [now] * rows,
+            "updated_on": [now] * rows,
+        }
+
+    def write(self, df: pd.DataFrame):
+        """
+        Insert every row of the DataFrame, chunk by chunk.
+
+        :param df: input rows
+        """
+        df = df.fillna("")
+        start = 0
+        while start < len(df):
+            chunk = df.iloc[start: start + self.chunk_size]
+            self.write_chunk(chunk)
+            start += len(chunk)
+
+    def write_chunk(self, chunk: pd.DataFrame):
+        self.insert_columns(self.build_columns(chunk))
+
+    def insert_columns(self, columns: dict):
+        """
+        Insert and commit one chunk of column arrays built by build_columns.
+
+        :param columns: column name to list of values
+        """
+        rows = len(columns["batch_ref_num"])
+
+        started = time.perf_counter()
+        self._insert(columns, rows)
+        elapsed = time.perf_counter() - started
+
+        self.rows_written += rows
+        self.insert_seconds += elapsed
+        logger.info(
+            f"Inserted {rows} rows into batch status table in {elapsed:.3f}s "
+            f"({rows / max(elapsed, 1e-6):.0f} rows/sec, total {self.rows_written})"
+        )
+        self._adapt_chunk_size(rows, elapsed)
+
+    def _adapt_chunk_size(self, rows: int, elapsed: float):
+        """
+        Scale the chunk size towards the target commit latency, at most doubling or halving per step.
+        """
+        if rows < self.chunk_size:
+            return
+
+        ratio = Configuration.LOADER_TARGET_COMMIT_SECONDS / max(elapsed, 1e-3)
+        ratio = min(max(ratio, 0.5), 2.0)
+        self.chunk_size = int(min(
+            max(self.chunk_size * ratio, Configuration.LOADER_MIN_CHUNK_SIZE),
+            Configuration.LOADER_MAX_CHUNK_SIZE
+        ))
+
+    def _insert(self, columns: dict, rows: int):
+        for attempt in range(3):
+            try:
+                if self._use_load_data:
+                    inserted = self._load_data_infile(columns)
+                else:
+                    records = [
+                        dict(zip(RUN_LOG_COLUMNS, values))
+                        for values in zip(*(columns[column] for column in RUN_LOG_COLUMNS))
+                    ]
+                    inserted = self.db_session.execute(self._insert_statement, records).rowcount
+                BatchStatusCounter.add(
+                    self.db_session, self.batch_request_auto_id, {BatchRequestStatus.OPEN.value: inserted}
+                )
+                self.db_session.commit()
+                return
+            except Exception:
+                logger.exception(
+                    f"Error occurred while inserting batch_ref_num {columns['batch_ref_num'][0]} "
+                    f"to {columns['batch_ref_num'][-1]} (attempt {attempt + 1})"
+                )
+                self.db_session.rollback()
+                time.sleep(5)
+
+        raise InterruptedError(
+            f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|Failed to insert {rows} rows into batch status table"
+        )
+
+    @staticmethod
+    def _tsv_value(value) -> str:
+        if value is None:
+            return "\\N"
+        if isinstance(value, datetime.datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+    def _load_data_infile(self, columns: dict) -> int:
+        """
+        MySQL fast path: stream the chunk to a local TSV file and bulk load it with LOAD DATA LOCAL INFILE.
+        Needs local_infile enabled on both the client connection and the server.
+
+        :return: number of rows inserted
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False) as tsv_file:
+            for values in zip(*(columns[column] for column in RUN_LOG_COLUMNS)):
+                tsv_file.write("\t".join(map(self._tsv_value, values)) + "\n")
+            tsv_path = tsv_file.name
+
+        try:
+            result = self.db_session.execute(
+                text(
+                    f"LOAD DATA LOCAL INFILE :path IGNORE INTO TABLE {IeBatchRunLog.__tablename__} "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(RUN_LOG_COLUMNS)})"
+                ),
+                {"path": tsv_path}
+            )
+            return result.rowcount
+        finally:
+            os.unlink(tsv_path)
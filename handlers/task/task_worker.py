@@ -0,0 +1,125 @@
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.job_queue import JobQueue
+from utility.graceful_shutdown import GracefulShutdown
+
+
+class TaskWorker:
+    """
+    Long running task process (python tasks.py worker): runs the jobs of ie_job_queue, up to
+    WORKER_CONCURRENCY at a time on threads, so a job starts within WORKER_POLL_SECONDS on a process
+    whose imports, DB pools and AWS clients are already warm, instead of waiting for a new container.
+
+    On SIGTERM it stops claiming, the running jobs are asked to stop at a checkpoint and get
+    WORKER_SHUTDOWN_GRACE_SECONDS to finish, their leases still renewed. Jobs still running after that
+    are left RUNNING: their threads cannot be stopped, so the job is only claimed again once its lease
+    runs out, by which time ECS has killed this container.
+    """
+
+    def __init__(self, task_functions: dict, concurrency: int = None):
+        """
+        :param task_functions: task name to the function running it, as in tasks.py
+        :param concurrency: jobs run at a time, defaults to WORKER_CONCURRENCY
+        """
+        self.task_functions = task_functions
+        self.concurrency = concurrency or Configuration.WORKER_CONCURRENCY
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = {}
+        self._wake = threading.Event()
+
+    def run(self):
+        GracefulShutdown.register(self._wake.set)
+        DatabaseManager().warm_up([(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)])
+        logger.info(f"[WORKER] {self.worker_id} started with concurrency {self.concurrency}")
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="task-worker")
+        heartbeat_every = self._heartbeat_every()
+        last_heartbeat = time.monotonic()
+        try:
+            while not GracefulShutdown.requested():
+                self._running = {job_id: future for job_id, future in self._running.items() if not future.done()}
+
+                free = self.concurrency - len(self._running)
+                jobs = self._claim(free) if free else []
+                for job in jobs:
+                    future = executor.submit(self._run_job, job)
+                    future.add_done_callback(lambda _: self._wake.set())
+                    self._running[job["id"]] = future
+
+                if time.monotonic() - last_heartbeat >= heartbeat_every:
+                    self._heartbeat()
+                    last_heartbeat = time.monotonic()
+
+                # Claim again at once while the queue fills every free slot, else wait for a job to end or the poll
+                if not jobs or len(jobs) < free:
+                    self._wake.wait(Configuration.WORKER_POLL_SECONDS)
+                    self._wake.clear()
+        finally:
+            self._shutdown(executor)
+
+    def _claim(self, limit: int) -> list:
+        try:
+            return JobQueue.claim(limit, self.worker_id)
+        except Exception:
+            logger.exception("[WORKER] Could not claim jobs")
+            return []
+
+    @staticmethod
+    def _heartbeat_every() -> float:
+        return Configuration.WORKER_JOB_LEASE_SECONDS / 3
+
+    def _heartbeat(self):
+        try:
+            JobQueue.heartbeat(list(self._running), self.worker_id)
+        except Exception:
+            logger.exception("[WORKER] Could not renew the job leases")
+
+    def _run_job(self, job: dict):
+        logger.info(f"[WORKER] Running job {job['id']}: {job['task_name']}")
+        started = time.perf_counter()
+        error = None
+        try:
+            task_function = self.task_functions.get(job["task_name"])
+            if task_function is None:
+                raise ValueError(f"Invalid task name: {job['task_name']}")
+            if job["params"] is not None:
+                task_function(json.loads(job["params"]))
+            else:
+                task_function()
+        except Exception as e:
+            logger.exception(f"[WORKER] Job {job['id']} failed")
+            error = str(e) or type(e).__name__
+
+        try:
+            JobQueue.finish(job["id"], self.worker_id, error)
+        except Exception:
+            logger.exception(f"[WORKER] Could not record the end of job {job['id']}, its lease will run out")
+        logger.info(f"[WORKER] Job {job['id']} ended in {time.perf_counter() - started:.2f}s")
+
+    def _shutdown(self, executor: ThreadPoolExecutor):
+        GracefulShutdown.unregister(self._wake.set)
+        running = [future for future in self._running.values() if not future.done()]
+        logger.info(f"[WORKER] Stopping, waiting for {len(running)} running jobs")
+        # Leases are renewed while the jobs may still end, so no other worker takes them meanwhile
+        deadline = time.monotonic() + Configuration.WORKER_SHUTDOWN_GRACE_SECONDS
+        while running and time.monotonic() < deadline:
+            wait(running, timeout=min(self._heartbeat_every(), deadline - time.monotonic()))
+            self._running = {job_id: future for job_id, future in self._running.items() if not future.done()}
+            running = list(self._running.values())
+            if running:
+                self._heartbeat()
+
+        if self._running:
+            logger.error(
+                f"[WORKER] Jobs {list(self._running)} still running after the grace period, left to their leases"
+            )
+        executor.shutdown(wait=False, cancel_futures=True)
+        DatabaseManager().dispose()
@@ -3,10 +3,13 @@ import json
 import cron
 from dependencies.logger import logger
 
-from main import app
+from main import app, warm_up_databases
 from mangum import Mangum
 
-fastapi_handler = Mangum(app)
+# Mangum runs the lifespan around every invocation, which would dispose the pools after each request.
+# The engines are warmed up once here, during container init, and kept across warm invocations.
+fastapi_handler = Mangum(app, lifespan="off")
+warm_up_databases()
 
 def lambda_handler(event, context):
     logger.info(f"[DEBUG] Incoming event: {json.dumps(event)}")
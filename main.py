@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from http import HTTPStatus
 
@@ -8,12 +9,44 @@ from starlette.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from starlette.responses import JSONResponse
 
+from dependencies.configuration import Configuration
 from dependencies.constants import Constants
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.ecs_dispatch_buffer import ECSDispatchBuffer
 from routes import api_router
+from utility.executors import Executors
+
+
+DATABASES = [
+    (Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB),
+    (Configuration.SOFTI_DB_CONNECTION_URL, Configuration.CS_DB)
+]
+
+
+def warm_up_databases():
+    """
+    Create the engines of both databases and open their first connections before a request needs them.
+    """
+    DatabaseManager().warm_up(DATABASES)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Used when the app is served by uvicorn; on Lambda the engines are warmed up on container init
+    await Executors.run_io(warm_up_databases)
+    await DatabaseManager().warm_up_async(DATABASES)
+    yield
+    # Start the loader for submissions still waiting in the dispatch window
+    await Executors.run_io(ECSDispatchBuffer.flush)
+    await DatabaseManager().dispose_async()
+    DatabaseManager().dispose()
+    Executors.shutdown()
+
 
 app = FastAPI(
     title='Batch Processing Engine',
-    description='Backend Engine for running end to end flow for API batches'
+    description='Backend Engine for running end to end flow for API batches',
+    lifespan=lifespan
 )
 
 origins = ["*"]
@@ -0,0 +1,49 @@
+"""
+Schema migrations for the batch database.
+
+    python -m migrations status          list applied and pending migrations
+    python -m migrations upgrade [N]     apply pending migrations, up to version N if given
+    python -m migrations explain         check that the hot queries use their indexes
+"""
+import sys
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from migrations.explain_check import ExplainCheck
+from migrations.runner import MigrationRunner
+
+
+def main(arguments: list) -> int:
+    command = arguments[0] if arguments else "status"
+    db_manager = DatabaseManager()
+    db_session = db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    engine = db_session.get_bind()
+
+    try:
+        runner = MigrationRunner(engine)
+        if command == "status":
+            applied = runner.applied()
+            for module in runner.available():
+                state = "applied" if module.VERSION in applied else "pending"
+                logger.info(f"[MIGRATION] {module.VERSION:04d} {state:8} {module.DESCRIPTION}")
+            return 0
+
+        if command == "upgrade":
+            target = int(arguments[1]) if len(arguments) > 1 else None
+            applied = runner.upgrade(target)
+            logger.info(f"[MIGRATION] Applied {len(applied)} migrations: {applied}")
+            return 0
+
+        if command == "explain":
+            return 0 if ExplainCheck(engine).run() else 1
+
+        logger.error(f"Unknown migrations command: {command}")
+        return 2
+    finally:
+        db_session.close()
+        db_manager.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,81 @@
+from sqlalchemy import select
+
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from models.batch_request import IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from models.batch_status_counter import IeBatchStatusCounter
+from utility.status_counter import BatchStatusCounter
+
+# name, query, table to check, indexes the optimizer is expected to pick for it
+HOT_QUERIES = (
+    (
+        "status api batch lookup",
+        select(IEBatchRequestLog.id).where(IEBatchRequestLog.request_id == "explain-check"),
+        "ie_batch_request_log",
+        {"ix_batch_request_request_id"},
+    ),
+    (
+        "in progress batches",
+        select(IEBatchRequestLog.id).where(IEBatchRequestLog.status == BatchRequestStatus.IN_PROGRESS.value),
+        "ie_batch_request_log",
+        {"ix_batch_request_status"},
+    ),
+    (
+        "statistics recount",
+        BatchStatusCounter.actual_counts_query([1]),
+        "ie_individual_run_log",
+        {"ix_run_log_batch_status"},
+    ),
+    (
+        "failed retry errored rows",
+        select(IeBatchRunLog.id).where(
+            IeBatchRunLog.batch_request_auto_id == 1,
+            IeBatchRunLog.processing_status == BatchRequestStatus.ERROR.value
+        ),
+        "ie_individual_run_log",
+        {"ix_run_log_batch_status"},
+    ),
+    (
+        "status counters",
+        select(IeBatchStatusCounter.row_count).where(IeBatchStatusCounter.batch_request_auto_id.in_([1])),
+        "ie_batch_status_counter",
+        {"PRIMARY"},
+    ),
+)
+
+
+class ExplainCheck:
+    """
+    Runs EXPLAIN for the hot status, statistics and retry queries and checks that MySQL picks the
+    expected index for each. Run it against a database with production-like data: on near empty
+    tables the optimizer may prefer a full scan.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def run(self) -> bool:
+        """
+        :return: True if every query uses one of its expected indexes
+        """
+        if self.engine.dialect.name != "mysql":
+            logger.info("[EXPLAIN_CHECK] Only supported on MySQL, skipped")
+            return True
+
+        passed = True
+        with self.engine.connect() as connection:
+            for name, query, table_name, expected_indexes in HOT_QUERIES:
+                sql = query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+                plan = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+                used_index = next((row["key"] for row in plan if row["table"] == table_name), None)
+
+                if used_index in expected_indexes:
+                    logger.info(f"[EXPLAIN_CHECK] OK   {name}: {table_name} uses {used_index}")
+                else:
+                    passed = False
+                    logger.error(
+                        f"[EXPLAIN_CHECK] FAIL {name}: {table_name} uses {used_index}, expected one of "
+                        f"{sorted(expected_indexes)}; plan: {[dict(row) for row in plan]}"
+                    )
+        return passed
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, inspect
+from sqlalchemy.schema import CreateColumn
+
+
+def index_names(connection, table_name: str) -> set:
+    """
+    :return: names of the table's indexes and unique constraints
+    """
+    inspector = inspect(connection)
+    names = {index["name"] for index in inspector.get_indexes(table_name)}
+    names |= {constraint["name"] for constraint in inspector.get_unique_constraints(table_name)}
+    return names
+
+
+def foreign_key_names(connection, table_name: str) -> set:
+    return {foreign_key["name"] for foreign_key in inspect(connection).get_foreign_keys(table_name)}
+
+
+def add_column(connection, table_name: str, column: Column):
+    """
+    Add the column unless the table already has it.
+    """
+    if column.name in {existing["name"] for existing in inspect(connection).get_columns(table_name)}:
+        return
+    column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
@@ -0,0 +1,78 @@
+import importlib
+import pkgutil
+from datetime import datetime
+
+import pytz
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select
+
+from dependencies.logger import logger
+from migrations import versions
+
+schema_version_metadata = MetaData()
+
+schema_version = Table(
+    "ie_schema_version",
+    schema_version_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_on", DateTime, nullable=False),
+)
+
+
+class MigrationRunner:
+    """
+    Applies the numbered migrations in migrations/versions in order and records each applied
+    version in ie_schema_version.
+
+    A migration module defines VERSION (int), DESCRIPTION (str) and upgrade(connection). MySQL
+    commits DDL implicitly, so migrations are written to be safe to run again after a failure
+    part way through: they check the live schema before every change.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def available() -> list:
+        """
+        :return: migration modules sorted by VERSION
+        """
+        modules = [
+            importlib.import_module(f"{versions.__name__}.{module_info.name}")
+            for module_info in pkgutil.iter_modules(versions.__path__)
+        ]
+        return sorted(modules, key=lambda module: module.VERSION)
+
+    def applied(self) -> set:
+        schema_version_metadata.create_all(self.engine, checkfirst=True)
+        with self.engine.connect() as connection:
+            return set(connection.scalars(select(schema_version.c.version)))
+
+    def pending(self) -> list:
+        applied = self.applied()
+        return [module for module in self.available() if module.VERSION not in applied]
+
+    def upgrade(self, target: int = None) -> list:
+        """
+        Apply every pending migration up to and including target.
+
+        :param target: last version to apply, all pending migrations if None
+        :return: versions applied
+        """
+        applied_versions = []
+        for module in self.pending():
+            if target is not None and module.VERSION > target:
+                break
+
+            logger.info(f"[MIGRATION] Applying {module.VERSION:04d}: {module.DESCRIPTION}")
+            with self.engine.begin() as connection:
+                module.upgrade(connection)
+                connection.execute(insert(schema_version).values(
+                    version=module.VERSION,
+                    description=module.DESCRIPTION,
+                    applied_on=datetime.now(pytz.timezone("Asia/Kolkata"))
+                ))
+            applied_versions.append(module.VERSION)
+            logger.info(f"[MIGRATION] Applied {module.VERSION:04d}")
+
+        return applied_versions
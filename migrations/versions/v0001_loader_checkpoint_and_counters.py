@@ -0,0 +1,62 @@
+"""
+Loader checkpoint columns on ie_batch_request_log, the run log's (batch_request_auto_id, batch_ref_num)
+unique key that makes resumed loads idempotent, and the ie_batch_status_counter table, seeded from the
+run log for the batches that are not finished yet.
+"""
+from sqlalchemy import Column, DateTime, Integer, exists, func, insert, select
+
+from dependencies.constants import BatchRequestStatus
+from dependencies.logger import logger
+from migrations.helpers import add_column, index_names
+from models.batch_request import IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from models.batch_status_counter import IeBatchStatusCounter
+
+# Batches that may still be counted or reported after the upgrade
+UNFINISHED_STATUSES = [
+    BatchRequestStatus.PENDING.value,
+    BatchRequestStatus.IN_PROGRESS.value,
+    BatchRequestStatus.COMPLING_OUTPUT.value,
+    BatchRequestStatus.COMPILING.value,
+]
+
+VERSION = 1
+DESCRIPTION = "loader checkpoint columns, run log batch_ref_num unique key, status counters table"
+
+
+def upgrade(connection):
+    add_column(connection, "ie_batch_request_log", Column("loaded_row_offset", Integer, nullable=True))
+    add_column(connection, "ie_batch_request_log", Column("load_completed_on", DateTime, nullable=True))
+
+    if "uq_run_log_batch_ref_num" not in index_names(connection, "ie_individual_run_log"):
+        connection.exec_driver_sql(
+            "CREATE UNIQUE INDEX uq_run_log_batch_ref_num "
+            "ON ie_individual_run_log (batch_request_auto_id, batch_ref_num)"
+        )
+
+    IeBatchStatusCounter.__table__.create(connection, checkfirst=True)
+    seed_counters(connection)
+
+
+def seed_counters(connection):
+    """
+    Count the run log rows of every unfinished batch that has no counters yet, with one INSERT ... SELECT.
+    """
+    run_log = IeBatchRunLog.__table__
+    batch_request_log = IEBatchRequestLog.__table__
+    counter = IeBatchStatusCounter.__table__
+
+    counts = (
+        select(run_log.c.batch_request_auto_id, run_log.c.processing_status, func.count())
+        .select_from(run_log.join(batch_request_log, batch_request_log.c.id == run_log.c.batch_request_auto_id))
+        .where(
+            batch_request_log.c.status.in_(UNFINISHED_STATUSES),
+            run_log.c.processing_status.isnot(None),
+            ~exists().where(counter.c.batch_request_auto_id == run_log.c.batch_request_auto_id)
+        )
+        .group_by(run_log.c.batch_request_auto_id, run_log.c.processing_status)
+    )
+    result = connection.execute(
+        insert(counter).from_select(["batch_request_auto_id", "processing_status", "row_count"], counts)
+    )
+    logger.info(f"[MIGRATION] Seeded {result.rowcount} status counters")
@@ -0,0 +1,23 @@
+"""
+Composite indexes for the hot queries:
+
+- run log by (batch_request_auto_id, processing_status): statistics recount, failed retry, output compilation
+- batch request log by status: check status, failed retry, loader and output crons
+- batch request log by request_id: status API and batch loader
+"""
+from migrations.helpers import index_names
+
+VERSION = 2
+DESCRIPTION = "hot path indexes on ie_individual_run_log and ie_batch_request_log"
+
+INDEXES = (
+    ("ie_individual_run_log", "ix_run_log_batch_status", "batch_request_auto_id, processing_status"),
+    ("ie_batch_request_log", "ix_batch_request_status", "status"),
+    ("ie_batch_request_log", "ix_batch_request_request_id", "request_id"),
+)
+
+
+def upgrade(connection):
+    for table_name, index_name, columns in INDEXES:
+        if index_name not in index_names(connection, table_name):
+            connection.exec_driver_sql(f"CREATE INDEX {index_name} ON {table_name} ({columns})")
@@ -0,0 +1,43 @@
+"""
+ie_individual_run_log.batch_request_auto_id held the integer ie_batch_request_log.id as VARCHAR(100),
+so every join and filter against the id compared across types. It becomes an INT foreign key.
+
+The column is rebuilt with a table copy; on a large run log run this in a maintenance window.
+"""
+from migrations.helpers import foreign_key_names
+
+VERSION = 3
+DESCRIPTION = "ie_individual_run_log.batch_request_auto_id as INT foreign key to ie_batch_request_log.id"
+
+FOREIGN_KEY_NAME = "fk_run_log_batch_request"
+
+
+def upgrade(connection):
+    if connection.dialect.name != "mysql":
+        # Other dialects are only used for local runs, where the tables come from the models
+        return
+
+    if FOREIGN_KEY_NAME in foreign_key_names(connection, "ie_individual_run_log"):
+        return
+
+    non_numeric = connection.exec_driver_sql(
+        "SELECT COUNT(*) FROM ie_individual_run_log "
+        "WHERE batch_request_auto_id IS NOT NULL AND batch_request_auto_id NOT REGEXP '^[0-9]+$'"
+    ).scalar()
+    orphans = connection.exec_driver_sql(
+        "SELECT COUNT(*) FROM ie_individual_run_log run_log "
+        "LEFT JOIN ie_batch_request_log batch_request ON batch_request.id = run_log.batch_request_auto_id "
+        "WHERE run_log.batch_request_auto_id IS NOT NULL AND batch_request.id IS NULL"
+    ).scalar()
+    if non_numeric or orphans:
+        raise RuntimeError(
+            f"ie_individual_run_log has {non_numeric} non numeric and {orphans} orphaned batch_request_auto_id "
+            f"values, clean them up before applying this migration"
+        )
+
+    # One ALTER, so the table is copied once; the unique key and indexes on the column are rebuilt with it
+    connection.exec_driver_sql(
+        "ALTER TABLE ie_individual_run_log "
+        "MODIFY batch_request_auto_id INT NULL, "
+        f"ADD CONSTRAINT {FOREIGN_KEY_NAME} FOREIGN KEY (batch_request_auto_id) REFERENCES ie_batch_request_log (id)"
+    )
@@ -0,0 +1,14 @@
+"""
+Backoff schedule of errored run log rows: FailedRetry moves an Error row back to Open only once
+its next_retry_at has passed.
+"""
+from sqlalchemy import Column, DateTime
+
+from migrations.helpers import add_column
+
+VERSION = 4
+DESCRIPTION = "ie_individual_run_log.next_retry_at retry schedule"
+
+
+def upgrade(connection):
+    add_column(connection, "ie_individual_run_log", Column("next_retry_at", DateTime, nullable=True))
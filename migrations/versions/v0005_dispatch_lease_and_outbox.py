@@ -0,0 +1,16 @@
+"""
+Claim based loader dispatch: the lease of a DISPATCHED batch on ie_batch_request_log, and the
+ie_dispatch_outbox table its loader launches are relayed from.
+"""
+from sqlalchemy import Column, DateTime
+
+from migrations.helpers import add_column
+from models.dispatch_outbox import IeDispatchOutbox
+
+VERSION = 5
+DESCRIPTION = "ie_batch_request_log.dispatch_lease_expires_at, ie_dispatch_outbox table"
+
+
+def upgrade(connection):
+    add_column(connection, "ie_batch_request_log", Column("dispatch_lease_expires_at", DateTime, nullable=True))
+    IeDispatchOutbox.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,11 @@
+"""
+The ie_job_queue table the long running task workers take their jobs from.
+"""
+from models.job_queue import IeJobQueue
+
+VERSION = 6
+DESCRIPTION = "ie_job_queue table"
+
+
+def upgrade(connection):
+    IeJobQueue.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,11 @@
+"""
+The ie_dispatch_window table that collapses launches of tasks without arguments across processes.
+"""
+from models.dispatch_window import IeDispatchWindow
+
+VERSION = 7
+DESCRIPTION = "ie_dispatch_window table"
+
+
+def upgrade(connection):
+    IeDispatchWindow.__table__.create(connection, checkfirst=True)
@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import (
     Column,
     DateTime,
+    Index,
     Integer,
     String,
     JSON
@@ -15,6 +16,10 @@ Base = declarative_base()
 
 class IEBatchRequestLog(Base):
     __tablename__ = 'ie_batch_request_log'
+    __table_args__ = (
+        Index('ix_batch_request_status', 'status'),
+        Index('ix_batch_request_request_id', 'request_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     client_ref_id = Column(String)
@@ -30,6 +35,13 @@ class IEBatchRequestLog(Base):
     current_statistics = Column(JSON, nullable=True)
 
     status = Column(String, nullable=True)
+
+    # Loader checkpoint: input rows committed to ie_individual_run_log without gaps
+    loaded_row_offset = Column(Integer, nullable=True)
+    load_completed_on = Column(DateTime, nullable=True)
+    # Until when a DISPATCHED batch is held for the loader task started for it
+    dispatch_lease_expires_at = Column(DateTime, nullable=True)
+
     created_on = Column(DateTime, default=datetime.now, nullable=False)
     updated_on = Column(DateTime, default=datetime.now,  nullable=False)
 
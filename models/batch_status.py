@@ -2,24 +2,31 @@ from sqlalchemy import (
     Column,
     DateTime,
     Enum,
+    ForeignKey,
+    Index,
     Integer,
     func,
     Text,
-    String
+    String,
+    UniqueConstraint
 )
-from sqlalchemy.orm import declarative_base
 
-Base = declarative_base()
+# Shares the batch request metadata so the batch_request_auto_id foreign key resolves
+from models.batch_request import Base
 
 
 class IeBatchRunLog(Base):
     __tablename__ = "ie_individual_run_log"
+    __table_args__ = (
+        UniqueConstraint("batch_request_auto_id", "batch_ref_num", name="uq_run_log_batch_ref_num"),
+        Index("ix_run_log_batch_status", "batch_request_auto_id", "processing_status"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     env = Column(Enum('Dev', 'Stage', 'Demo', 'Prod'), default='Prod')
     cid = Column(Integer, nullable=True)
     request_id = Column(String(100), nullable=True)
-    batch_request_auto_id = Column(String(100), nullable=True)
+    batch_request_auto_id = Column(Integer, ForeignKey("ie_batch_request_log.id"), nullable=True)
     batch_ref_num= Column(String(100), nullable=True)
     client_ref_id = Column(String(45), nullable=True)
     request_body = Column(Text, nullable=True)
@@ -27,6 +34,7 @@ class IeBatchRunLog(Base):
     process_id = Column(Integer, default=1)
     http_response_code = Column(Integer, nullable=True)
     retry_count = Column(Integer, nullable=True)
+    next_retry_at = Column(DateTime, nullable=True)
     processing_status = Column(Enum(
         'Open','Inprogress','Completed','Error','Failure','Hold'
     ), default='OPEN')
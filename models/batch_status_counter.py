@@ -0,0 +1,26 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    String,
+    func
+)
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class IeBatchStatusCounter(Base):
+    """
+    Number of ie_individual_run_log rows of a batch in each processing_status, kept in step with
+    the run log by whoever changes a row's processing_status, in the same transaction.
+    """
+    __tablename__ = "ie_batch_status_counter"
+
+    batch_request_auto_id = Column(Integer, primary_key=True, autoincrement=False)
+    processing_status = Column(String(20), primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    updated_on = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<IeBatchStatusCounter(batch={self.batch_request_auto_id}, {self.processing_status}={self.row_count})>"
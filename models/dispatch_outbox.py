@@ -0,0 +1,39 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String
+)
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class IeDispatchOutbox(Base):
+    """
+    A loader task still to be started for a batch, written in the same transaction as the batch, so
+    a batch is never committed without it. DispatchRelay starts the task and marks the row SENT, or
+    schedules the next attempt.
+    """
+    __tablename__ = "ie_dispatch_outbox"
+    __table_args__ = (
+        Index("ix_dispatch_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_dispatch_outbox_batch_request", "batch_request_auto_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    batch_request_auto_id = Column(Integer, nullable=False)
+    request_id = Column(String(64), nullable=False)
+    ecs_task_name = Column(String(50), nullable=False)
+    # PENDING, SENDING (launch in flight until next_attempt_at), SENT or SKIPPED
+    status = Column(String(20), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    last_error = Column(String(512), nullable=True)
+
+    created_on = Column(DateTime, nullable=False)
+    updated_on = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IeDispatchOutbox(id={self.id}, request_id={self.request_id}, status={self.status})>"
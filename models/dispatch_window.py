@@ -0,0 +1,24 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    String
+)
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class IeDispatchWindow(Base):
+    """
+    The current launch window of a task without arguments. The process whose conditional UPDATE moves
+    window_until forward, or whose INSERT creates the row, starts the task; every other process sees
+    the window held, so the task is started at most once per window across all containers.
+    """
+    __tablename__ = "ie_dispatch_window"
+
+    task_name = Column(String(50), primary_key=True)
+    window_until = Column(DateTime, nullable=False)
+    updated_on = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IeDispatchWindow(task_name={self.task_name}, window_until={self.window_until})>"
@@ -0,0 +1,41 @@
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text
+)
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class IeJobQueue(Base):
+    """
+    A task run by the long running workers (TASK_RUNNER=worker) instead of its own ECS task. Workers
+    claim QUEUED jobs with SKIP LOCKED and hold them with a lease they renew while the job runs; a
+    RUNNING job whose lease ran out belonged to a worker that died and is claimed again.
+    """
+    __tablename__ = "ie_job_queue"
+    __table_args__ = (
+        Index("ix_job_queue_status_available", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_name = Column(String(50), nullable=False)
+    # JSON encoded task arguments, as passed to tasks.py on the command line
+    params = Column(Text, nullable=True)
+    # QUEUED, RUNNING, DONE or FAILED
+    status = Column(String(20), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(String(512), nullable=True)
+
+    created_on = Column(DateTime, nullable=False)
+    updated_on = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<IeJobQueue(id={self.id}, task_name={self.task_name}, status={self.status})>"
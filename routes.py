@@ -13,22 +13,29 @@ from dependencies.logger import logger
 from handlers.batch_request_handler import BatchRequestHandler
 from handlers.status_handler import StatusHandler
 from utility.common import CommonUtils
+from utility.executors import Executors
+from utility.status_cache import StatusCache
 
 api_router = APIRouter()
 
 
 
-def get_db_sessions():
-    db_manager = DatabaseManager()
-    softi_session = db_manager.get_db(Configuration.SOFTI_DB_CONNECTION_URL, Configuration.CS_DB)
-    batch_session = db_manager.get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
-    return db_manager, softi_session, batch_session
+def softi_session_factory():
+    # The SOFTI DB is only needed when the credential cache misses; Authenticator closes the session
+    return lambda: DatabaseManager().get_async_db(Configuration.SOFTI_DB_CONNECTION_URL, Configuration.CS_DB)
 
 
-def close_sessions(db_manager, softi_session, batch_session):
-    softi_session.close()
-    batch_session.close()
-    db_manager.dispose()
+def with_batch_session(handler_method, *args):
+    """
+    Run a BatchRequestHandler method with a sync batch DB session of its own. Called on the I/O thread
+    pool: the method uploads to S3, writes the batch and starts the ECS task, all blocking calls.
+    """
+    batch_session = DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    try:
+        return handler_method(BatchRequestHandler(batch_session), *args)
+    finally:
+        # Closing hands the connection back to the process wide pool
+        batch_session.close()
 
 
 def handle_error(e: Exception, request_id: str, response: Response):
@@ -64,16 +71,14 @@ async def batch_request(
     common_util_obj = CommonUtils()
     env = common_util_obj.determine_environment(host)
 
-    db_manager, softi_session, batch_session = get_db_sessions()
     try:
-        ent_id, _ = Authenticator().validate(request.headers, softi_session, service_id = 43)
-        response_body = BatchRequestHandler(batch_session).handle_batch_request(
+        ent_id, _ = await Authenticator.validate(request.headers, softi_session_factory(), service_id = 43)
+        response_body = await Executors.run_io(
+            with_batch_session, BatchRequestHandler.handle_batch_request,
             ent_id, client_ref_id, request_id, file_extension, file, env
         )
     except Exception as e:
         response_body = handle_error(e, request_id, response)
-    finally:
-        close_sessions(db_manager, softi_session, batch_session)
 
     logger.info(f"[REQUEST] Response: {response_body}")
     return response_body
@@ -84,14 +89,22 @@ async def batch_status(request_id: str, response: Response, request: Request):
     session_id = str(uuid.uuid4())
     logger.info(f"[STATUS] Headers: {dict(request.headers)} | Request ID: {request_id} | Session ID: {session_id}")
 
-    db_manager, softi_session, batch_session = get_db_sessions()
     try:
-        Authenticator().validate(request.headers, softi_session)
-        response_body = StatusHandler(batch_session).get_batch_request_status(request_id)
+        await Authenticator.validate(request.headers, softi_session_factory())
+        document = await StatusHandler(
+            lambda: DatabaseManager().get_async_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+        ).get_batch_request_status(request_id)
+        response_body = document["body"]
+        headers = {"ETag": document["etag"], "Cache-Control": "no-cache"}
+        if document["last_modified"]:
+            headers["Last-Modified"] = document["last_modified"]
+
+        if StatusCache.matches(request.headers.get("if-none-match"), document["etag"]):
+            logger.info(f"[STATUS] Not modified: {request_id}")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
     except Exception as e:
         response_body = handle_error(e, session_id, response)
-    finally:
-        close_sessions(db_manager, softi_session, batch_session)
 
     logger.info(f"[STATUS] Response: {response_body}")
     return response_body
@@ -110,16 +123,14 @@ async def batch_request(
     common_util_obj = CommonUtils()
     env = common_util_obj.determine_environment(host)
 
-    db_manager, softi_session, batch_session = get_db_sessions()
     try:
-        ent_id, _ = Authenticator().validate(request.headers, softi_session, service_id = 43)
-        response_body = BatchRequestHandler(batch_session).handle_batch_request_list_object(
+        ent_id, _ = await Authenticator.validate(request.headers, softi_session_factory(), service_id = 43)
+        response_body = await Executors.run_io(
+            with_batch_session, BatchRequestHandler.handle_batch_request_list_object,
             ent_id, client_ref_id, request_id, pan_list, env
         )
     except Exception as e:
         response_body = handle_error(e, request_id, response)
-    finally:
-        close_sessions(db_manager, softi_session, batch_session)
 
     logger.info(f"[REQUEST] Response: {response_body}")
     return response_body
\ No newline at end of file
@@ -1,22 +1,37 @@
+import asyncio
 import json
+import signal
 import sys
 from datetime import datetime
 
 from dependencies.logger import logger
+from dependencies.managers.database_manager import DatabaseManager
+from handlers.output_api_handler import ExternalAPIHandler
 from handlers.task.batch_loader import BatchLoader
 from handlers.task.check_status import CheckStatus
+from handlers.task.row_executor import RowExecutor
+from handlers.task.task_worker import TaskWorker
+from utility.graceful_shutdown import GracefulShutdown
 
 """
 Standalone Task Executor (Celery-Free)
-Compatible with ECS Run Task or manual CLI
+Compatible with ECS Run Task or manual CLI, or run as a long running worker taking its tasks
+from ie_job_queue: python tasks.py worker [concurrency]
 """
 
 
 def batch_loader_task(request_ids=None):
-    """Triggers the batch loader task."""
+    """Triggers the batch loader task for a request_id or a list of them, as grouped by ECSDispatchBuffer."""
     logger.info(f'Triggering batch_loader task at {datetime.now()}')
     try:
-        BatchLoader().pending_batch_loader(received_request_id=request_ids)
+        batch_loader = BatchLoader()
+
+        # ECS sends SIGTERM before stopping the container: commit the in-flight chunks and keep the checkpoint
+        GracefulShutdown.register(batch_loader.request_stop)
+        try:
+            batch_loader.pending_batch_loader(received_request_id=request_ids)
+        finally:
+            GracefulShutdown.unregister(batch_loader.request_stop)
     except Exception as e:
         logger.exception(f'Some exception occurred in batch_loader: {e}')
     finally:
@@ -34,6 +49,41 @@ def check_status_task(_args=None):
         logger.info(f'Completing check_status task at {datetime.now()}')
 
 
+def execute_rows_task(batch_request_ids=None):
+    """Posts the Open run log rows of the given batches, or of every IN_PROGRESS batch, to the downstream API."""
+    logger.info(f'Triggering execute_rows task at {datetime.now()}')
+    try:
+        row_executor = RowExecutor(batch_request_ids)
+        GracefulShutdown.register(row_executor.request_stop)
+        try:
+            asyncio.run(row_executor.run())
+        finally:
+            GracefulShutdown.unregister(row_executor.request_stop)
+    except Exception as e:
+        logger.exception(f'Some exception occurred in execute_rows: {e}')
+    finally:
+        logger.info(f'Completing execute_rows task at {datetime.now()}')
+
+
+def compile_output_task(batch_request_ids=None):
+    """Triggers output compilation for the given batches, or every claimable batch."""
+    logger.info(f'Triggering compile_output task at {datetime.now()}')
+    try:
+        ExternalAPIHandler().process_completed_batches(batch_request_ids)
+    except Exception as e:
+        logger.exception(f'Some exception occurred in compile_output: {e}')
+    finally:
+        logger.info(f'Completing compile_output task at {datetime.now()}')
+
+
+TASK_MAPPINGS = {
+    'batch_loader_task': batch_loader_task,
+    'check_status_task': check_status_task,
+    'compile_output_task': compile_output_task,
+    'execute_rows_task': execute_rows_task
+}
+
+
 """
 ECS MAIN TASK HANDLER
 """
@@ -46,13 +96,15 @@ if __name__ == "__main__":
         sys.exit(1)
 
     task_name = arguments[0]
-    task_args = json.loads(arguments[1]) if len(arguments) > 1 else None
 
-    task_mappings = {
-        'batch_loader_task': batch_loader_task,
-        'check_status_task': check_status_task
-    }
-    task_func = task_mappings.get(task_name)
+    if task_name == 'worker':
+        GracefulShutdown.install(signal.SIGTERM, signal.SIGINT)
+        TaskWorker(TASK_MAPPINGS, int(arguments[1]) if len(arguments) > 1 else None).run()
+        sys.exit(0)
+
+    GracefulShutdown.install()
+    task_args = json.loads(arguments[1]) if len(arguments) > 1 else None
+    task_func = TASK_MAPPINGS.get(task_name)
 
     if not task_func:
         logger.error(f"Invalid task name: {task_name}")
@@ -62,3 +114,5 @@ if __name__ == "__main__":
         task_func(task_args)
     else:
         task_func()
+
+    DatabaseManager().dispose()
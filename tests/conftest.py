@@ -0,0 +1,29 @@
+import pytest
+
+from dependencies.configuration import Configuration
+from dependencies.managers.database_manager import DatabaseManager
+from models.batch_request import Base
+from models.batch_status import IeBatchRunLog  # noqa: F401, registers the run log on Base
+from models.batch_status_counter import IeBatchStatusCounter
+from models.dispatch_outbox import IeDispatchOutbox
+from models.dispatch_window import IeDispatchWindow
+from models.job_queue import IeJobQueue
+
+
+@pytest.fixture
+def batch_db(tmp_path, monkeypatch):
+    """
+    Batch DB as a SQLite file of its own, with every table of the batch schema.
+
+    :return: callable opening a new session on it
+    """
+    monkeypatch.setattr(Configuration, "BATCH_DB_CONNECTION_URL", f"sqlite:///{tmp_path}/")
+    monkeypatch.setattr(Configuration, "IE_DB", "batch.db")
+    engine = DatabaseManager().engine(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    for metadata in (
+        Base.metadata, IeBatchStatusCounter.metadata, IeDispatchOutbox.metadata, IeDispatchWindow.metadata, IeJobQueue.metadata
+    ):
+        metadata.create_all(engine)
+
+    yield lambda: DatabaseManager().get_db(Configuration.BATCH_DB_CONNECTION_URL, Configuration.IE_DB)
+    engine.dispose()
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from dependencies.configuration import Configuration
+from handlers.ecs_dispatch_buffer import ECSDispatchBuffer
+from handlers.job_queue import JobQueue
+from models.dispatch_window import IeDispatchWindow
+from models.job_queue import IeJobQueue
+
+
+def _expire_window(batch_db, task_name: str):
+    db_session = batch_db()
+    window_until = db_session.scalar(select(IeDispatchWindow.window_until).where(IeDispatchWindow.task_name == task_name))
+    db_session.execute(
+        update(IeDispatchWindow).where(IeDispatchWindow.task_name == task_name)
+        .values(window_until=window_until - timedelta(hours=1))
+    )
+    db_session.commit()
+    db_session.close()
+
+
+def test_dispatch_once_starts_a_task_once_per_window(batch_db, monkeypatch):
+    monkeypatch.setattr(Configuration, "TASK_RUNNER", "ecs")
+    started = []
+    monkeypatch.setattr(JobQueue, "start_task", classmethod(lambda cls, task_name, *args, **kwargs: started.append(task_name)))
+
+    ECSDispatchBuffer.dispatch_once("check_status_task", 60)
+    ECSDispatchBuffer.dispatch_once("check_status_task", 60)
+    ECSDispatchBuffer.dispatch_once("execute_rows_task", 60)
+    assert started == ["check_status_task", "execute_rows_task"]
+
+    _expire_window(batch_db, "check_status_task")
+    ECSDispatchBuffer.dispatch_once("check_status_task", 60)
+    assert started == ["check_status_task", "execute_rows_task", "check_status_task"]
+
+
+def test_dispatch_once_queues_one_job_for_the_end_of_the_window(batch_db, monkeypatch):
+    monkeypatch.setattr(Configuration, "TASK_RUNNER", "worker")
+
+    for _ in range(3):
+        ECSDispatchBuffer.dispatch_once("check_status_task", 60)
+
+    db_session = batch_db()
+    jobs = db_session.scalars(select(IeJobQueue).order_by(IeJobQueue.id)).all()
+    window_until = db_session.scalar(select(IeDispatchWindow.window_until))
+    db_session.close()
+    # The leading job is still queued, so it covers the requests after it
+    assert len(jobs) == 1
+    assert jobs[0].available_at < window_until
+
+    assert JobQueue.claim(1, "test-worker")
+    ECSDispatchBuffer.dispatch_once("check_status_task", 60)
+    db_session = batch_db()
+    trailing = db_session.scalars(select(IeJobQueue).where(IeJobQueue.status == "QUEUED")).all()
+    db_session.close()
+    assert [job.available_at for job in trailing] == [window_until]
+    assert JobQueue.claim(1, "test-worker") == []
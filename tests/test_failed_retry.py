@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from sqlalchemy import insert, select
+
+from dependencies.configuration import Configuration
+from dependencies.constants import FAILURE_RETRY_LIMIT, BatchRequestStatus
+from handlers.cron.failed_retry import FailedRetry
+from models.batch_request import IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from utility.status_counter import BatchStatusCounter
+
+ERROR = BatchRequestStatus.ERROR.value
+OPEN = BatchRequestStatus.OPEN.value
+FAILURE = BatchRequestStatus.FAILURE.value
+
+
+@pytest.mark.parametrize("retry_count", range(8))
+def test_backoff_delay_is_capped_with_equal_jitter(retry_count):
+    delay = min(3600, 60 * 2 ** retry_count)
+    delays = [FailedRetry.backoff_delay(retry_count, 60, 3600) for _ in range(200)]
+
+    assert all(delay / 2 <= value <= delay for value in delays)
+    # Rows that failed together are spread over the jittered half
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("http_response_code, terminal", [
+    (None, False), (429, False), (500, False), (503, False), (408, False),
+    (400, True), (404, True), (422, True), (451, True), (200, False), (302, False),
+])
+def test_is_terminal_response(http_response_code, terminal):
+    assert FailedRetry.is_terminal_response(http_response_code) is terminal
+
+
+def _prepare_batch(db_session, rows: list) -> int:
+    now = datetime.now()
+    batch = IEBatchRequestLog(
+        request_id="retry", cid=1, env="Dev", status=BatchRequestStatus.IN_PROGRESS.value,
+        total_count=len(rows), created_on=now, updated_on=now
+    )
+    db_session.add(batch)
+    db_session.flush()
+    db_session.execute(insert(IeBatchRunLog), [
+        {"batch_request_auto_id": batch.id, "batch_ref_num": ref, "processing_status": ERROR, **row}
+        for ref, row in rows
+    ])
+    BatchStatusCounter.add(db_session, batch.id, {ERROR: len(rows)})
+    db_session.commit()
+    return batch.id
+
+
+def test_failed_retry_cron_classifies_each_slice(batch_db, monkeypatch):
+    monkeypatch.setattr(Configuration, "FAILED_RETRY_BATCH_SIZE", 2)
+    db_session = batch_db()
+    # Stored as Asia/Kolkata wall clock time, as the cron compares it
+    now = datetime.now(pytz.timezone("Asia/Kolkata")).replace(tzinfo=None)
+    batch_id = _prepare_batch(db_session, [
+        ("unscheduled", {"retry_count": 1, "http_response_code": 503}),
+        ("no_response", {"retry_count": None, "http_response_code": None}),
+        ("due", {"retry_count": 1, "http_response_code": 500, "next_retry_at": now - timedelta(minutes=1)}),
+        ("not_due", {"retry_count": 1, "http_response_code": 500, "next_retry_at": now + timedelta(hours=1)}),
+        ("terminal", {"retry_count": 0, "http_response_code": 404}),
+        ("exhausted", {"retry_count": FAILURE_RETRY_LIMIT, "http_response_code": 503}),
+    ])
+
+    FailedRetry.failed_retry_cron()
+
+    rows = {
+        row.batch_ref_num: row
+        for row in db_session.scalars(select(IeBatchRunLog).where(IeBatchRunLog.batch_request_auto_id == batch_id))
+    }
+    assert {ref: row.processing_status for ref, row in rows.items()} == {
+        "unscheduled": ERROR, "no_response": ERROR, "due": OPEN, "not_due": ERROR, "terminal": FAILURE, "exhausted": FAILURE,
+    }
+    assert rows["due"].retry_count == 2 and rows["due"].next_retry_at is None
+    assert rows["not_due"].next_retry_at > now + timedelta(minutes=59)
+    assert rows["terminal"].next_retry_at is None
+
+    # Scheduled within the jittered backoff of their retry count
+    base, cap = Configuration.RETRY_BACKOFF_BASE_SECONDS, Configuration.RETRY_BACKOFF_MAX_SECONDS
+    for ref, retry_count in (("unscheduled", 1), ("no_response", 0)):
+        delay = min(cap, base * 2 ** retry_count)
+        scheduled_in = (rows[ref].next_retry_at - now).total_seconds()
+        assert delay / 2 - 5 <= scheduled_in <= delay + 5
+
+    assert BatchStatusCounter.counts(db_session, [batch_id])[batch_id] == {ERROR: 3, OPEN: 1, FAILURE: 2}
+    assert BatchStatusCounter.actual_counts(db_session, [batch_id])[batch_id] == {ERROR: 3, OPEN: 1, FAILURE: 2}
+    db_session.close()
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from benchmarks.pan_validator_benchmark import build_pans
+from utility.pan_validator import PanValidator
+
+EDGE_CASES = [
+    "ABCDE1234F", "abcde1234f", "ABCDE-1234-F", " ABCDE1234F ", "ABCDE 1234 F", "", "NOT A PAN",
+    "ABCDE1234", "ABCDE1234FG", "ABCD51234F", "ABCDE12A4F", "ABCDE1234@", "@BCDE1234F", "`BCDE1234F",
+    # Values a fixed width cast would cut short or take for padding
+    "ABCDE1234F\x00x", "ABCDE1234F\x00", "\x00ABCDE1234F", "ABCDE\x001234F", "ABCDE1234\x00", "\x00",
+    "ABCDE1234ß", "ÀBCDE1234F", "ＡBCDE1234F",
+]
+
+
+def _assert_matches_per_row(pans: pd.Series):
+    result = PanValidator.sanitize(pans)
+    per_row = pans.apply(PanValidator.sanitize_one)
+
+    assert result.sanitized.equals(per_row)
+    assert result.invalid_mask.equals(per_row.isna())
+    assert list(result.invalid_index) == list(pans.index[per_row.isna()])
+
+
+@pytest.mark.parametrize("pan", EDGE_CASES)
+def test_vectorized_matches_per_row_for_each_value(pan):
+    _assert_matches_per_row(pd.Series([pan, "ABCDE1234F"], index=[10, 20]))
+
+
+def test_vectorized_matches_per_row_for_a_mixed_column():
+    pans = pd.concat([build_pans(5000), pd.Series(EDGE_CASES)], ignore_index=True)
+    _assert_matches_per_row(pans)
+
+
+def test_missing_values_are_invalid():
+    result = PanValidator.sanitize(pd.Series(["abcde1234f", None, float("nan")]))
+
+    assert list(result.sanitized) == ["ABCDE1234F", None, None]
+    assert list(result.invalid_index) == [1, 2]
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from dependencies.configuration import Configuration
+from dependencies.constants import BatchRequestStatus
+from handlers.task.row_executor import RowExecutor
+from models.batch_request import IEBatchRequestLog
+from models.batch_status import IeBatchRunLog
+from utility.status_counter import BatchStatusCounter
+
+OPEN = BatchRequestStatus.OPEN.value
+COMPLETED = BatchRequestStatus.COMPLETED.value
+ERROR = BatchRequestStatus.ERROR.value
+ROWS = 60
+
+
+async def _serve_connection(reader, writer, received: list, on_request):
+    # Keep-alive HTTP/1.1 stub: 200 for every body, 503 for the bodies asking to fail
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            body = b""
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    body = await reader.readexactly(int(line.split(b":", 1)[1]))
+            received.append(body)
+            on_request(len(received))
+            status_line, payload = (b"503 Service Unavailable", b'{"status": "busy"}') if b'"fail"' in body else (
+                b"200 OK", b'{"status": "ok"}'
+            )
+            writer.write(
+                b"HTTP/1.1 " + status_line + b"\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+@pytest.fixture
+def in_progress_batch(batch_db, monkeypatch):
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_HTTP2", False)
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_IDLE_SECONDS", 0)
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_CLAIM_SIZE", 16)
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_FLUSH_ROWS", 10)
+
+    db_session = batch_db()
+    now = datetime.now()
+    batch = IEBatchRequestLog(
+        request_id="execute", cid=1, env="Dev", status=BatchRequestStatus.IN_PROGRESS.value,
+        total_count=ROWS, created_on=now, updated_on=now
+    )
+    db_session.add(batch)
+    db_session.flush()
+    batch_request_id = batch.id
+    db_session.execute(insert(IeBatchRunLog), [
+        {
+            "batch_request_auto_id": batch_request_id, "batch_ref_num": str(row), "processing_status": OPEN,
+            "request_body": f'{{"row": {row}, "action": "{"fail" if row % 5 == 0 else "verify"}"}}'
+        }
+        for row in range(ROWS)
+    ])
+    BatchStatusCounter.add(db_session, batch_request_id, {OPEN: ROWS})
+    db_session.commit()
+    db_session.close()
+    return batch_request_id
+
+
+async def _run_against_stub(executor: RowExecutor, monkeypatch, on_request=lambda requests: None) -> tuple:
+    received = []
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(reader, writer, received, on_request), "127.0.0.1", 0
+    )
+    monkeypatch.setattr(Configuration, "ROW_EXECUTOR_API_URL", f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/execute")
+    try:
+        summary = await executor.run()
+    finally:
+        server.close()
+        await server.wait_closed()
+    return summary, received
+
+
+def test_rows_are_posted_once_and_their_results_written(batch_db, in_progress_batch, monkeypatch):
+    summary, received = asyncio.run(_run_against_stub(RowExecutor([in_progress_batch], concurrency=4), monkeypatch))
+
+    failing = ROWS // 5
+    assert (summary["completed"], summary["errored"]) == (ROWS - failing, failing)
+    assert len(received) == len(set(received)) == ROWS
+
+    db_session = batch_db()
+    rows = db_session.scalars(select(IeBatchRunLog).where(IeBatchRunLog.batch_request_auto_id == in_progress_batch)).all()
+    assert {(row.processing_status, row.http_response_code) for row in rows if int(row.batch_ref_num) % 5} == {(COMPLETED, 200)}
+    assert {(row.processing_status, row.http_response_code) for row in rows if not int(row.batch_ref_num) % 5} == {(ERROR, 503)}
+    assert all(row.response and row.start_time and row.tat is not None for row in rows)
+
+    expected = {COMPLETED: ROWS - failing, ERROR: failing}
+    counts = BatchStatusCounter.counts(db_session, [in_progress_batch])[in_progress_batch]
+    assert {status: count for status, count in counts.items() if count} == expected
+    assert BatchStatusCounter.actual_counts(db_session, [in_progress_batch])[in_progress_batch] == expected
+    db_session.close()
+
+
+def test_stop_writes_calls_in_flight_and_releases_the_rest(batch_db, in_progress_batch, monkeypatch):
+    executor = RowExecutor([in_progress_batch], concurrency=2)
+    summary, received = asyncio.run(_run_against_stub(
+        executor, monkeypatch, on_request=lambda requests: requests == 5 and executor.request_stop()
+    ))
+
+    assert summary["completed"] + summary["errored"] == len(received) < ROWS
+    db_session = batch_db()
+    actual = BatchStatusCounter.actual_counts(db_session, [in_progress_batch])[in_progress_batch]
+    counts = BatchStatusCounter.counts(db_session, [in_progress_batch])[in_progress_batch]
+    # Every claimed row was either written or put back to Open, none is left Inprogress
+    assert BatchRequestStatus.IN_PROGRESS.value not in actual
+    assert actual[OPEN] == ROWS - len(received)
+    assert {status: count for status, count in counts.items() if count} == actual
+    db_session.close()
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.sql.elements import TextClause
+
+from dependencies.constants import BatchRequestStatus
+from handlers.task import run_log_writer
+from handlers.task.run_log_writer import RUN_LOG_COLUMNS, RunLogBulkWriter
+from models.batch_status import IeBatchRunLog
+from utility.status_counter import BatchStatusCounter
+
+BATCH_ID = 7
+
+
+def _tsv_field(value: str):
+    if value == "\\N":
+        return None
+    return value.replace("\\n", "\n").replace("\\t", "\t").replace("\\\\", "\\")
+
+
+@pytest.fixture
+def load_data_session(batch_db, monkeypatch):
+    """
+    Session whose LOAD DATA LOCAL INFILE statements are replayed on SQLite as INSERT OR IGNORE of the
+    TSV file's rows, so the loader's LOAD DATA branch runs as it would against MySQL.
+    """
+    monkeypatch.setattr(run_log_writer.time, "sleep", lambda seconds: None)
+    db_session = batch_db()
+    execute = db_session.execute
+
+    def execute_load_data(statement, params=None, *args, **kwargs):
+        if isinstance(statement, TextClause) and "LOAD DATA LOCAL INFILE" in statement.text:
+            with open(params["path"]) as tsv_file:
+                rows = [tuple(map(_tsv_field, line.rstrip("\n").split("\t"))) for line in tsv_file]
+            return db_session.connection().exec_driver_sql(
+                f"INSERT OR IGNORE INTO {IeBatchRunLog.__tablename__} ({', '.join(RUN_LOG_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(RUN_LOG_COLUMNS))})",
+                rows
+            )
+        return execute(statement, params, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", execute_load_data)
+    yield db_session
+    db_session.close()
+
+
+def test_load_data_branch_counts_inserted_rows(load_data_session):
+    writer = RunLogBulkWriter(load_data_session, ent_id=1, batch_request_auto_id=BATCH_ID, env="Dev")
+    writer._use_load_data = True
+    chunk = pd.DataFrame({"pan": ["ABCDE1234F", "BBCDE1234F", ""], "client_ref_id": ["a", "b\tc", ""]})
+
+    columns = writer.build_columns(chunk)
+    writer._insert(columns, len(chunk))
+    # A resumed load sends the chunk again; the rows already there are ignored and not counted twice
+    writer._insert(columns, len(chunk))
+
+    assert load_data_session.scalar(select(func.count()).select_from(IeBatchRunLog)) == 3
+    assert BatchStatusCounter.counts(load_data_session, [BATCH_ID])[BATCH_ID] == {BatchRequestStatus.OPEN.value: 3}
+    assert load_data_session.scalar(select(IeBatchRunLog.client_ref_id).where(IeBatchRunLog.batch_ref_num == "1")) == "b\tc"
+
+
+def test_executemany_branch_counts_inserted_rows(batch_db):
+    db_session = batch_db()
+    writer = RunLogBulkWriter(db_session, ent_id=1, batch_request_auto_id=BATCH_ID, env="Dev")
+    writer.write(pd.DataFrame({"pan": ["ABCDE1234F", "BBCDE1234F"]}))
+
+    assert BatchStatusCounter.counts(db_session, [BATCH_ID])[BATCH_ID] == {BatchRequestStatus.OPEN.value: 2}
+    db_session.close()
@@ -0,0 +1,65 @@
+from sqlalchemy import insert, update
+
+from dependencies.constants import BatchRequestStatus
+from models.batch_status import IeBatchRunLog
+from utility.status_counter import BatchStatusCounter
+
+BATCH_ID = 3
+OPEN = BatchRequestStatus.OPEN.value
+IN_PROGRESS = BatchRequestStatus.IN_PROGRESS.value
+COMPLETED = BatchRequestStatus.COMPLETED.value
+
+
+def test_add_creates_and_updates_counters(batch_db):
+    db_session = batch_db()
+    BatchStatusCounter.add(db_session, BATCH_ID, {OPEN: 5, COMPLETED: 0})
+    BatchStatusCounter.add(db_session, BATCH_ID, {OPEN: -2, COMPLETED: 2})
+    BatchStatusCounter.add(db_session, BATCH_ID + 1, {OPEN: 1})
+    db_session.commit()
+
+    assert BatchStatusCounter.counts(db_session, [BATCH_ID, BATCH_ID + 1, BATCH_ID + 2]) == {
+        BATCH_ID: {OPEN: 3, COMPLETED: 2},
+        BATCH_ID + 1: {OPEN: 1},
+        BATCH_ID + 2: {},
+    }
+    db_session.close()
+
+
+def test_add_rolls_back_with_the_transaction(batch_db):
+    db_session = batch_db()
+    BatchStatusCounter.add(db_session, BATCH_ID, {OPEN: 5})
+    db_session.rollback()
+
+    assert BatchStatusCounter.counts(db_session, [BATCH_ID]) == {BATCH_ID: {}}
+    db_session.close()
+
+
+def test_move_keeps_the_total(batch_db):
+    db_session = batch_db()
+    BatchStatusCounter.add(db_session, BATCH_ID, {OPEN: 4})
+    BatchStatusCounter.move(db_session, BATCH_ID, OPEN, IN_PROGRESS, 3)
+    BatchStatusCounter.move(db_session, BATCH_ID, IN_PROGRESS, COMPLETED)
+    db_session.commit()
+
+    assert BatchStatusCounter.counts(db_session, [BATCH_ID])[BATCH_ID] == {OPEN: 1, IN_PROGRESS: 2, COMPLETED: 1}
+    db_session.close()
+
+
+def test_reconcile_corrects_drift_from_the_run_log(batch_db):
+    db_session = batch_db()
+    db_session.execute(insert(IeBatchRunLog), [
+        {"batch_request_auto_id": BATCH_ID, "batch_ref_num": str(row), "processing_status": OPEN} for row in range(4)
+    ])
+    BatchStatusCounter.add(db_session, BATCH_ID, {OPEN: 4})
+    db_session.commit()
+    # Rows changed by a writer that did not move their counters
+    db_session.execute(
+        update(IeBatchRunLog).where(IeBatchRunLog.batch_ref_num.in_(["0", "1", "2"])).values(processing_status=COMPLETED)
+    )
+    db_session.commit()
+
+    assert BatchStatusCounter.reconcile(db_session, BATCH_ID) == {OPEN: 3, COMPLETED: -3}
+    assert BatchStatusCounter.counts(db_session, [BATCH_ID])[BATCH_ID] == {OPEN: 1, COMPLETED: 3}
+    assert BatchStatusCounter.actual_counts(db_session, [BATCH_ID])[BATCH_ID] == {OPEN: 1, COMPLETED: 3}
+    assert BatchStatusCounter.reconcile(db_session, BATCH_ID) == {}
+    db_session.close()
@@ -1,13 +1,35 @@
-import boto3
-
 from botocore.exceptions import ClientError
 
 from dependencies.configuration import Configuration
 from dependencies.logger import logger
+from dependencies.managers.cache_manager import CacheManager
+from utility.aws_clients import AwsClients
 
 
 class AwsUtility:
 
+    @staticmethod
+    def s3_key_from_url(s3_url: str) -> str:
+        """
+        :param s3_url: s3://bucket/key as stored on the batch request, or a bare key
+        :return: object key
+        """
+        if s3_url.startswith('s3://'):
+            return s3_url[len('s3://'):].split('/', 1)[1]
+        return s3_url
+
+    @staticmethod
+    def output_url_for(input_s3_url: str | None, extension: str = 'xlsx', request_id: str = None) -> str:
+        """
+        :param input_s3_url: s3 url or key of a batch input file; None for pan_list batches
+        :param extension: output file format
+        :param request_id: request id of the batch, locates the output of a batch without an input file
+        :return: the same location for the batch's output file
+        """
+        if input_s3_url is None:
+            return f's3://{Configuration.AWS_BUCKET}/{request_id}/output/{request_id}.{extension}'
+        return input_s3_url.replace('/input/', '/output/').rsplit('.', 1)[0] + f'.{extension}'
+
     @staticmethod
     def create_presigned_url(
             s3_upload_key: str,
@@ -16,16 +38,21 @@ class AwsUtility:
          ):
 
         """Generate a presigned URL to share an S3 object
+        Download URLs are cached and the same URL is returned until PRESIGNED_URL_REUSE_FRACTION
+        of its lifetime has passed, so a caller always gets a URL valid for the rest of it. A URL signed
+        with temporary credentials stops working when they expire, which bounds its lifetime too.
         :param expiry_time:
         :param mode:
         :param s3_upload_key: str
         :return: str
         """
         logger.info("Inside create_presigned_url function")
-        s3_client = boto3.client(
-            's3',
-            region_name=Configuration.AWS_REGION_NAME
-            )
+        cache_key = f"{mode}:{Configuration.AWS_BUCKET}:{s3_upload_key}:{expiry_time}"
+        if mode == 'get_object':
+            url = CacheManager().get("presigned_url", cache_key)
+            if url:
+                return url
+        s3_client = AwsClients.client('s3')
 
         logger.info(f'The s3_upload key is {s3_upload_key}')
         try:
@@ -39,8 +66,36 @@ class AwsUtility:
             )
 
             logger.info(f'The pre-singed url is {url}')
+            if mode == 'get_object':
+                lifetime = expiry_time
+                credentials_left = AwsUtility.credentials_seconds_left(expiry_time)
+                if credentials_left is not None:
+                    lifetime = min(lifetime, credentials_left)
+                reuse_seconds = int(lifetime * Configuration.PRESIGNED_URL_REUSE_FRACTION)
+                if reuse_seconds > 0:
+                    CacheManager().set("presigned_url", cache_key, url, reuse_seconds)
         except (ClientError, Exception) as e:
             logger.exception(f'Exception raised when uploading to S3 to generate the s3 url {e}')
             return
         return url
 
+    @staticmethod
+    def credentials_seconds_left(max_seconds: int) -> int | None:
+        """
+        Bound how long a URL signed now stays valid by its signing credentials, with the public
+        RefreshableCredentials.refresh_needed check: the horizon is halved until the credentials
+        outlast it, so the result is at most a factor two short of the real time left.
+
+        :param max_seconds: lifetime the URL was signed for
+        :return: seconds the signing credentials are known to last, at most max_seconds; None for
+            credentials that do not expire or do not tell, the URL's own lifetime then applies
+        """
+        credentials = AwsClients.credentials()
+        refresh_needed = getattr(credentials, 'refresh_needed', None)
+        if refresh_needed is None:
+            return None
+
+        seconds_left = max_seconds
+        while seconds_left > 0 and refresh_needed(seconds_left):
+            seconds_left //= 2
+        return seconds_left
@@ -0,0 +1,72 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+
+
+class AwsClients:
+    """
+    Process wide registry of boto3 clients, built lazily on first use and shared by the API, crons
+    and tasks. boto3 clients are thread safe; building one costs tens of milliseconds of CPU plus a
+    credential lookup, so every caller should take its client from here instead of calling boto3.client.
+    """
+
+    _clients = {}
+    _session = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def client(cls, service_name: str, region_name: str = None):
+        """
+        :param service_name: AWS service, e.g. 's3' or 'ecs'
+        :param region_name: defaults to AWS_REGION_NAME
+        :return: shared client for the service and region
+        """
+        key = (service_name, region_name or Configuration.AWS_REGION_NAME)
+        client = cls._clients.get(key)
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(key)
+                if client is None:
+                    client = cls._build(*key)
+                    cls._clients[key] = client
+        return client
+
+    @classmethod
+    def credentials(cls):
+        """
+        :return: credentials the shared clients sign with, RefreshableCredentials for temporary ones;
+            None if no credentials were found
+        """
+        with cls._lock:
+            return cls._get_session().get_credentials()
+
+    @classmethod
+    def _get_session(cls) -> boto3.session.Session:
+        # Clients of one session resolve its credentials once and share them
+        if cls._session is None:
+            cls._session = boto3.session.Session()
+        return cls._session
+
+    @classmethod
+    def _build(cls, service_name: str, region_name: str):
+        logger.info(f"Creating shared {service_name} client for region {region_name}")
+        config = Config(
+            # Sized for the parallel multipart uploads and compilation threads sharing one client
+            max_pool_connections=Configuration.AWS_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": Configuration.AWS_MAX_ATTEMPTS, "mode": "standard"},
+            tcp_keepalive=True
+        )
+        return cls._get_session().client(service_name, region_name=region_name, config=config)
+
+    @classmethod
+    def reset(cls):
+        """
+        Drop every cached client, e.g. after credentials were rotated.
+        """
+        with cls._lock:
+            cls._clients = {}
+            cls._session = None
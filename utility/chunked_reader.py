@@ -0,0 +1,83 @@
+import tempfile
+
+import openpyxl
+import pandas as pd
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from utility.aws_clients import AwsClients
+from utility.columnar_artifact import ColumnarArtifact
+
+
+class S3ChunkedReader:
+    """
+    Reads a batch input file from S3 as a sequence of DataFrame chunks, so memory stays
+    flat however large the file is. Chunks keep a running index, which is the row number
+    in the file, and have their column names stripped and lower cased.
+
+    The Parquet artifact written at validation time is read when it exists; the original
+    xlsx/csv is only parsed for batches uploaded before artifacts were written.
+    """
+
+    def __init__(self, s3_bucket: str, s3_key: str, chunk_size: int = None):
+        self.s3_bucket = s3_bucket
+        self.s3_key = s3_key
+        self.chunk_size = chunk_size or Configuration.LOADER_READ_CHUNK_SIZE
+        self.file_extension = s3_key.split(".")[-1].lower()
+
+    def iter_chunks(self):
+        s3_client = AwsClients.client("s3")
+
+        artifact_found = yield from ColumnarArtifact.iter_chunks(
+            s3_client, self.s3_bucket, ColumnarArtifact.key_for(self.s3_key), self.chunk_size
+        )
+        if artifact_found:
+            return
+
+        if self.file_extension == "csv":
+            yield from self._iter_csv_chunks(s3_client)
+        else:
+            yield from self._iter_xlsx_chunks(s3_client)
+
+    def _iter_csv_chunks(self, s3_client):
+        s3_file = s3_client.get_object(Bucket=self.s3_bucket, Key=self.s3_key)
+        with pd.read_csv(s3_file["Body"], dtype=str, encoding="utf-8", chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                chunk.columns = chunk.columns.str.strip().str.lower()
+                yield chunk
+
+    def _iter_xlsx_chunks(self, s3_client):
+        # openpyxl needs a seekable file, so the object is streamed to local disk rather than into memory
+        with tempfile.TemporaryFile() as local_file:
+            s3_client.download_fileobj(self.s3_bucket, self.s3_key, local_file)
+            local_file.seek(0)
+            logger.info(f"Downloaded s3://{self.s3_bucket}/{self.s3_key} to local disk")
+
+            workbook = openpyxl.load_workbook(local_file, read_only=True, data_only=True)
+            try:
+                rows = workbook.worksheets[0].iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    return
+                columns = [str(cell).strip().lower() if cell is not None else "" for cell in header]
+
+                row_number = 0
+                buffer = []
+                for row in rows:
+                    if all(cell is None for cell in row):
+                        continue
+                    cells = [None if cell is None else str(cell) for cell in row[:len(columns)]]
+                    buffer.append(cells + [None] * (len(columns) - len(cells)))
+                    if len(buffer) >= self.chunk_size:
+                        yield self._to_frame(buffer, columns, row_number)
+                        row_number += len(buffer)
+                        buffer = []
+
+                if buffer:
+                    yield self._to_frame(buffer, columns, row_number)
+            finally:
+                workbook.close()
+
+    @staticmethod
+    def _to_frame(rows: list, columns: list, start: int) -> pd.DataFrame:
+        return pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(rows)), dtype=object)
@@ -0,0 +1,81 @@
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
+
+from dependencies.logger import logger
+
+ARTIFACT_SCHEMA = pa.schema([
+    ("pan", pa.string()),
+    ("client_ref_id", pa.string()),
+])
+
+
+class ColumnarArtifact:
+    """
+    Compact Parquet copy of the sanitized pan and client_ref_id columns of an upload,
+    stored next to the original file so the loader never has to parse the xlsx/csv again.
+    """
+
+    @staticmethod
+    def key_for(input_s3_key: str) -> str:
+        """
+        :param input_s3_key: key of the uploaded xlsx/csv
+        :return: key of its Parquet artifact
+        """
+        return input_s3_key.rsplit(".", 1)[0] + ".parquet"
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._writer = pq.ParquetWriter(self._file, ARTIFACT_SCHEMA, compression="zstd")
+        self.rows = 0
+
+    def write(self, pans: list, client_ref_ids: list):
+        self._writer.write_table(pa.table({"pan": pans, "client_ref_id": client_ref_ids}, schema=ARTIFACT_SCHEMA))
+        self.rows += len(pans)
+
+    def upload(self, s3_client, s3_bucket: str, s3_key: str):
+        """
+        Finish the Parquet file and upload it. Failures are only logged, the loader
+        falls back to the original file when the artifact is missing.
+        """
+        try:
+            self._writer.close()
+            self._file.seek(0)
+            s3_client.upload_fileobj(self._file, s3_bucket, s3_key)
+            logger.info(f"Uploaded columnar artifact of {self.rows} rows to s3://{s3_bucket}/{s3_key}")
+        except Exception:
+            logger.exception(f"Columnar artifact upload failed for s3://{s3_bucket}/{s3_key}")
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+
+    @staticmethod
+    def iter_chunks(s3_client, s3_bucket: str, s3_key: str, chunk_size: int):
+        """
+        Read an artifact as DataFrame chunks indexed by row number.
+        Yields nothing and returns False if the batch has no artifact.
+        """
+        try:
+            s3_client.head_object(Bucket=s3_bucket, Key=s3_key)
+        except ClientError:
+            logger.info(f"No columnar artifact at s3://{s3_bucket}/{s3_key}")
+            return False
+
+        with tempfile.NamedTemporaryFile(suffix=".parquet") as local_file:
+            s3_client.download_fileobj(s3_bucket, s3_key, local_file)
+            local_file.flush()
+            logger.info(f"Reading columnar artifact s3://{s3_bucket}/{s3_key}")
+
+            parquet_file = pq.ParquetFile(local_file.name, memory_map=True)
+            row_number = 0
+            for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+                chunk = record_batch.to_pandas()
+                chunk.index = pd.RangeIndex(row_number, row_number + len(chunk))
+                row_number += len(chunk)
+                yield chunk
+
+        return True
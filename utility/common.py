@@ -1,7 +1,6 @@
-import re
-
 from dependencies.configuration import Configuration
 from dependencies.logger import logger
+from utility.pan_validator import PanValidator
 
 
 class CommonUtils:
@@ -21,17 +20,5 @@ class CommonUtils:
 
     @staticmethod
     def sanitize_and_validate_pan(pan_raw: str) -> str | None:
-
-        if not pan_raw:
-            return None
-
-        # Remove any non-alphanumeric characters
-        pan_clean = re.sub(r"[^A-Za-z0-9]", "", pan_raw).upper()
-
-        if len(pan_clean) != 10:
-            return None
-
-        if not re.match(r"^[A-Z]{5}[0-9]{4}[A-Z]$", pan_clean):
-            return None
-
-        return pan_clean
+        """Sanitize a single PAN. Use PanValidator.sanitize for whole columns."""
+        return PanValidator.sanitize_one(pan_raw)
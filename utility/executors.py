@@ -0,0 +1,67 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+
+
+class Executors:
+    """
+    Process wide pools that keep blocking work off the API's event loop: a thread pool for blocking
+    I/O (sync DB sessions, S3 uploads, ECS run_task) and a process pool for CPU heavy upload parsing.
+    """
+
+    _io_pool = None
+    _cpu_pool = None
+    _cpu_pool_failed = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def io(cls) -> ThreadPoolExecutor:
+        if cls._io_pool is None:
+            with cls._lock:
+                if cls._io_pool is None:
+                    cls._io_pool = ThreadPoolExecutor(
+                        max_workers=Configuration.IO_THREAD_POOL_SIZE, thread_name_prefix="blocking-io"
+                    )
+        return cls._io_pool
+
+    @classmethod
+    def cpu(cls) -> ProcessPoolExecutor | None:
+        """
+        :return: the parsing process pool, None if it is disabled or processes cannot be started here
+                 (e.g. on Lambda, which has no /dev/shm for the pool's semaphores)
+        """
+        if cls._cpu_pool is None and not cls._cpu_pool_failed and Configuration.UPLOAD_PARSE_PROCESSES > 0:
+            with cls._lock:
+                if cls._cpu_pool is None and not cls._cpu_pool_failed:
+                    try:
+                        # spawn, as forking a process that already runs threads can copy held locks
+                        cls._cpu_pool = ProcessPoolExecutor(
+                            max_workers=Configuration.UPLOAD_PARSE_PROCESSES,
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    except (OSError, NotImplementedError):
+                        logger.exception("Process pool unavailable, uploads are parsed on the I/O threads")
+                        cls._cpu_pool_failed = True
+        return cls._cpu_pool
+
+    @classmethod
+    async def run_io(cls, func, *args, **kwargs):
+        """
+        Run a blocking function on the I/O thread pool and wait for it without blocking the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(cls.io(), partial(func, *args, **kwargs))
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._io_pool is not None:
+                cls._io_pool.shutdown(wait=True)
+                cls._io_pool = None
+            if cls._cpu_pool is not None:
+                cls._cpu_pool.shutdown(wait=True)
+                cls._cpu_pool = None
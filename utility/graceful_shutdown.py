@@ -0,0 +1,58 @@
+import signal
+import threading
+
+from dependencies.logger import logger
+
+
+class GracefulShutdown:
+    """
+    Process wide SIGTERM handling. ECS sends SIGTERM before stopping a container; the handler, installed
+    once from the main thread, sets the shutdown flag and calls every registered callback, so work
+    running on any thread can commit what is in flight and stop at a checkpoint.
+    """
+
+    _callbacks = []
+    _lock = threading.Lock()
+    _requested = threading.Event()
+
+    @classmethod
+    def install(cls, *signals):
+        """
+        Must be called from the main thread.
+
+        :param signals: signals that request the shutdown, SIGTERM if none
+        """
+        for signum in signals or (signal.SIGTERM,):
+            signal.signal(signum, lambda signum, frame: cls.request())
+
+    @classmethod
+    def request(cls):
+        logger.info("[SHUTDOWN] Shutdown requested")
+        cls._requested.set()
+        with cls._lock:
+            callbacks = list(cls._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("[SHUTDOWN] Shutdown callback failed")
+
+    @classmethod
+    def requested(cls) -> bool:
+        return cls._requested.is_set()
+
+    @classmethod
+    def register(cls, callback):
+        """
+        :param callback: called without arguments on shutdown; called at once if shutdown was already requested
+        """
+        with cls._lock:
+            cls._callbacks.append(callback)
+        if cls.requested():
+            callback()
+
+    @classmethod
+    def unregister(cls, callback):
+        with cls._lock:
+            if callback in cls._callbacks:
+                cls._callbacks.remove(callback)
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+from starlette import status
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from utility.aws_clients import AwsClients
+
+
+class S3MultipartUpload:
+    """
+    Streams bytes into an S3 object as a multipart upload. Parts are sent in parallel
+    from a small thread pool while the caller keeps writing, and at most
+    ``max_workers * 2`` parts are held in memory at any time.
+    """
+
+    def __init__(self, s3_bucket: str, s3_key: str, part_size: int = None, max_workers: int = None):
+        self.s3_bucket = s3_bucket
+        self.s3_key = s3_key
+        self.part_size = part_size or Configuration.S3_MULTIPART_PART_SIZE
+        self.max_workers = max_workers or Configuration.S3_MULTIPART_CONCURRENCY
+
+        self.upload_id = None
+        self._buffer = bytearray()
+        self._part_number = 0
+        self._futures = []
+        self._executor = None
+        self._in_flight = threading.BoundedSemaphore(self.max_workers * 2)
+
+    @staticmethod
+    def _client():
+        return AwsClients.client('s3')
+
+    def start(self):
+        response = self._client().create_multipart_upload(Bucket=self.s3_bucket, Key=self.s3_key)
+        self.upload_id = response["UploadId"]
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-part")
+        logger.info(f"Started multipart upload {self.upload_id} for s3://{self.s3_bucket}/{self.s3_key}")
+
+    def write(self, data: bytes):
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._submit_part(part)
+
+    def _submit_part(self, part: bytes):
+        self._in_flight.acquire()
+        self._part_number += 1
+        self._futures.append(self._executor.submit(self._upload_part, self._part_number, part))
+
+    def _upload_part(self, part_number: int, part: bytes):
+        try:
+            response = self._client().upload_part(
+                Bucket=self.s3_bucket,
+                Key=self.s3_key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=part
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            self._in_flight.release()
+
+    def complete(self):
+        """
+        Flush the remaining buffer as the last part and complete the upload.
+        """
+        try:
+            if self._buffer or not self._futures:
+                self._submit_part(bytes(self._buffer))
+                self._buffer.clear()
+
+            parts = [future.result() for future in self._futures]
+            self._client().complete_multipart_upload(
+                Bucket=self.s3_bucket,
+                Key=self.s3_key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": parts}
+            )
+            logger.info(f"Completed multipart upload of {len(parts)} parts to s3://{self.s3_bucket}/{self.s3_key}")
+        except Exception as e:
+            logger.error(f"S3 multipart upload failed: {str(e)}")
+            self.abort()
+            raise InterruptedError(f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|S3 upload failed")
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self):
+        if not self.upload_id:
+            return
+
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+        try:
+            self._client().abort_multipart_upload(Bucket=self.s3_bucket, Key=self.s3_key, UploadId=self.upload_id)
+            logger.info(f"Aborted multipart upload {self.upload_id}")
+        except ClientError:
+            logger.exception(f"Failed to abort multipart upload {self.upload_id}")
+        finally:
+            self.upload_id = None
@@ -0,0 +1,80 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytz
+
+from dependencies.configuration import Configuration
+from dependencies.logger import logger
+from dependencies.managers.cache_manager import CacheManager
+
+NAMESPACE = "batch_status"
+
+
+class StatusCache:
+    """
+    Read-through cache of the GET /v1/status document of each request_id, with its ETag and
+    Last-Modified. Every writer of a batch's status or current_statistics calls invalidate() after
+    its commit, so the next poll reads the batch again; STATUS_CACHE_TTL_SECONDS bounds how long
+    a document can be served when the invalidation happened in a process with a separate cache.
+    """
+
+    @staticmethod
+    def get(request_id: str) -> dict | None:
+        """
+        :return: {"body", "etag", "last_modified"} of the request_id, None on a miss
+        """
+        document = CacheManager().get(NAMESPACE, request_id)
+        return json.loads(document) if document else None
+
+    @staticmethod
+    def put(request_id: str, body: dict, updated_on: datetime) -> dict:
+        """
+        :param body: status response body
+        :param updated_on: updated_on of the batch, naive datetimes are taken as IST
+        :return: the cached document
+        """
+        document = {
+            "body": body,
+            "etag": StatusCache.etag(body),
+            "last_modified": StatusCache.http_date(updated_on)
+        }
+        CacheManager().set(NAMESPACE, request_id, json.dumps(document), Configuration.STATUS_CACHE_TTL_SECONDS)
+        return document
+
+    @staticmethod
+    def invalidate(request_ids: list):
+        """
+        :param request_ids: request_ids whose batch status was written
+        """
+        cache = CacheManager()
+        for request_id in request_ids:
+            if request_id:
+                cache.delete(NAMESPACE, request_id)
+        logger.info(f"[STATUS_CACHE] Invalidated {len(request_ids)} status documents")
+
+    @staticmethod
+    def etag(body: dict) -> str:
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+        return f'"{digest[:32]}"'
+
+    @staticmethod
+    def http_date(updated_on: datetime | None) -> str | None:
+        if updated_on is None:
+            return None
+        if updated_on.tzinfo is None:
+            updated_on = pytz.timezone("Asia/Kolkata").localize(updated_on)
+        return format_datetime(updated_on.astimezone(timezone.utc), usegmt=True)
+
+    @staticmethod
+    def matches(if_none_match: str | None, etag: str) -> bool:
+        """
+        :param if_none_match: If-None-Match request header
+        :return: True if the client's copy is current and a 304 can be sent
+        """
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        # Weak comparison, as RFC 9110 asks for If-None-Match
+        return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
@@ -0,0 +1,140 @@
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from dependencies.logger import logger
+from models.batch_status import IeBatchRunLog
+from models.batch_status_counter import IeBatchStatusCounter
+
+
+class BatchStatusCounter:
+    """
+    Per-batch processing_status counters in ie_batch_status_counter.
+
+    Every writer that inserts run log rows or changes their processing_status calls add() in the
+    same transaction, so the counters commit or roll back together with the rows they count and
+    reading a batch's statistics is one primary key range lookup instead of a scan of its rows.
+    """
+
+    @staticmethod
+    def add(db_session, batch_request_auto_id: int, deltas: dict):
+        """
+        Apply row count deltas to a batch's counters. Does not commit.
+
+        :param db_session: session of the transaction that changed the run log rows
+        :param batch_request_auto_id: IEBatchRequestLog id
+        :param deltas: processing_status to signed change in row count
+        """
+        # A fixed status order keeps the counter row locks of concurrent writers in the same order
+        deltas = {status: delta for status, delta in sorted(deltas.items()) if delta}
+        if not deltas:
+            return
+
+        batch_request_auto_id = int(batch_request_auto_id)
+        if db_session.get_bind().dialect.name == "mysql":
+            statement = mysql_insert(IeBatchStatusCounter).values([
+                {"batch_request_auto_id": batch_request_auto_id, "processing_status": status, "row_count": delta}
+                for status, delta in deltas.items()
+            ])
+            db_session.execute(statement.on_duplicate_key_update(
+                row_count=IeBatchStatusCounter.row_count + statement.inserted.row_count
+            ))
+            return
+
+        for status, delta in deltas.items():
+            updated = db_session.execute(
+                update(IeBatchStatusCounter)
+                .where(
+                    IeBatchStatusCounter.batch_request_auto_id == batch_request_auto_id,
+                    IeBatchStatusCounter.processing_status == status
+                )
+                .values(row_count=IeBatchStatusCounter.row_count + delta)
+            )
+            if not updated.rowcount:
+                db_session.execute(insert(IeBatchStatusCounter).values(
+                    batch_request_auto_id=batch_request_auto_id, processing_status=status, row_count=delta
+                ))
+
+    @staticmethod
+    def move(db_session, batch_request_auto_id: int, from_status: str, to_status: str, rows: int = 1):
+        """
+        Count rows moving from one processing_status to another. Does not commit.
+        """
+        BatchStatusCounter.add(db_session, batch_request_auto_id, {from_status: -rows, to_status: rows})
+
+    @staticmethod
+    def counts(db_session, batch_request_ids: list, for_update: bool = False) -> dict:
+        """
+        :param batch_request_ids: IEBatchRequestLog ids
+        :param for_update: lock the counter rows, and the gaps around them, until the transaction ends
+        :return: batch request id to processing_status to row count, from the counters
+        """
+        counts = {int(batch_request_id): {} for batch_request_id in batch_request_ids}
+        if not counts:
+            return counts
+
+        query = select(
+            IeBatchStatusCounter.batch_request_auto_id, IeBatchStatusCounter.processing_status,
+            IeBatchStatusCounter.row_count
+        ).where(IeBatchStatusCounter.batch_request_auto_id.in_(list(counts)))
+        if for_update:
+            query = query.with_for_update()
+
+        for batch_request_auto_id, processing_status, row_count in db_session.execute(query):
+            counts[batch_request_auto_id][processing_status] = row_count
+        return counts
+
+    @staticmethod
+    def actual_counts_query(batch_request_ids: list):
+        """
+        :return: GROUP BY over the run log of the batches, served by the (batch_request_auto_id, processing_status) index
+        """
+        return (
+            select(IeBatchRunLog.batch_request_auto_id, IeBatchRunLog.processing_status, func.count())
+            .where(IeBatchRunLog.batch_request_auto_id.in_([int(batch_id) for batch_id in batch_request_ids]))
+            .group_by(IeBatchRunLog.batch_request_auto_id, IeBatchRunLog.processing_status)
+        )
+
+    @staticmethod
+    def actual_counts(db_session, batch_request_ids: list) -> dict:
+        """
+        :param batch_request_ids: IEBatchRequestLog ids
+        :return: batch request id to processing_status to row count, from one GROUP BY over the run log
+        """
+        counts = {int(batch_request_id): {} for batch_request_id in batch_request_ids}
+        if not counts:
+            return counts
+
+        for batch_request_auto_id, processing_status, row_count in db_session.execute(
+            BatchStatusCounter.actual_counts_query(list(counts))
+        ):
+            counts[batch_request_auto_id][processing_status] = row_count
+        return counts
+
+    @staticmethod
+    def reconcile(db_session, batch_request_auto_id: int) -> dict:
+        """
+        Recount one batch's run log rows and correct its counters, in one transaction.
+
+        The counter rows are locked before the run log is read, so a writer that has changed rows but
+        not yet its counters waits for this transaction and then applies its delta on top of counts
+        that did not include it.
+
+        :return: processing_status to drift that was corrected (counter minus actual), empty if in sync
+        """
+        try:
+            counted = BatchStatusCounter.counts(db_session, [batch_request_auto_id], for_update=True)[int(batch_request_auto_id)]
+            actual = BatchStatusCounter.actual_counts(db_session, [batch_request_auto_id])[int(batch_request_auto_id)]
+
+            drift = {
+                status: counted.get(status, 0) - actual.get(status, 0)
+                for status in set(counted) | set(actual)
+                if counted.get(status, 0) != actual.get(status, 0)
+            }
+            if drift:
+                logger.info(f"[COUNTER_RECONCILE] BatchRequest [{batch_request_auto_id}] counters drifted by {drift}")
+                BatchStatusCounter.add(db_session, batch_request_auto_id, {status: -delta for status, delta in drift.items()})
+            db_session.commit()
+            return drift
+        except Exception:
+            db_session.rollback()
+            raise
@@ -0,0 +1,267 @@
+import csv
+import hashlib
+import io
+import math
+import tempfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from starlette import status
+
+from dependencies.configuration import Configuration
+from dependencies.constants import ERROR_MAPPING_CONSTANT
+from dependencies.logger import logger
+from utility.aws_clients import AwsClients
+from utility.columnar_artifact import ColumnarArtifact
+from utility.pan_validator import PanValidator
+
+
+class _LimitedStreamReader(io.RawIOBase):
+    """
+    Raw reader over the uploaded file that counts the bytes pulled through it and
+    stops the upload as soon as it grows past the configured size limit.
+    """
+
+    def __init__(self, fileobj, max_file_size: int, on_chunk=None):
+        self.fileobj = fileobj
+        self.max_file_size = max_file_size
+        self.on_chunk = on_chunk
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.fileobj.read(len(buffer))
+        if not data:
+            return 0
+
+        self.bytes_read += len(data)
+        if self.bytes_read > self.max_file_size:
+            logger.error(f"Uploaded file crossed the size limit of {self.max_file_size} bytes")
+            raise InterruptedError(
+                f"{status.HTTP_400_BAD_REQUEST}|{ERROR_MAPPING_CONSTANT['EXCEEDS_BATCH_SIZE_LIMIT']['message']}"
+            )
+
+        if self.on_chunk:
+            self.on_chunk(data)
+
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class _RowDigests:
+    """
+    Duplicate check over 8 byte row digests in bounded memory. Digests are collected in a fixed buffer;
+    a full buffer is checked on its own and spilled to temp files, split by digest so that equal digests
+    always land in the same partition, with enough partitions that a MAX_BATCH_ROWS upload fills each
+    about one buffer. At the end every partition is read back and checked on its own, so at most one
+    buffer and one partition are in memory whatever the row count.
+    """
+
+    def __init__(self, buffer_rows: int, max_rows: int):
+        self.buffer_bytes = max(buffer_rows, 1) * 8
+        self.buffer = bytearray()
+        self.partitions = max(1, math.ceil(max_rows / max(buffer_rows, 1)))
+        self._files = None
+
+    @staticmethod
+    def _has_repeats(digests: np.ndarray) -> bool:
+        digests = np.sort(digests)
+        return bool(np.any(digests[1:] == digests[:-1]))
+
+    def add(self, digest: bytes) -> bool:
+        """
+        :return: True if a duplicate was found in the buffer this digest filled
+        """
+        self.buffer += digest
+        if len(self.buffer) < self.buffer_bytes:
+            return False
+        return self._spill()
+
+    def _spill(self) -> bool:
+        digests = np.frombuffer(self.buffer, dtype=np.uint64)
+        if self._has_repeats(digests):
+            return True
+        if self._files is None:
+            self._files = [tempfile.TemporaryFile() for _ in range(self.partitions)]
+        partition_of = digests % np.uint64(self.partitions)
+        for partition, file in enumerate(self._files):
+            file.write(digests[partition_of == partition].tobytes())
+        del digests
+        self.buffer = bytearray()
+        return False
+
+    def has_duplicates(self) -> bool:
+        if self._files is None:
+            return self._has_repeats(np.frombuffer(self.buffer, dtype=np.uint64))
+        if self._spill():
+            return True
+        for file in self._files:
+            file.seek(0)
+            if self._has_repeats(np.frombuffer(file.read(), dtype=np.uint64)):
+                return True
+        return False
+
+    def close(self):
+        for file in self._files or []:
+            file.close()
+        self._files = None
+
+
+class StreamingUploadValidator:
+    """
+    Validates an uploaded batch file row by row while it is being read, instead of
+    copying it to a temp file and loading it into a DataFrame.
+    """
+
+    def __init__(self, file_extension: str, required_columns: set, on_chunk=None, artifact=None):
+        """
+        :param file_extension: csv or xlsx
+        :param required_columns: header columns the file must contain
+        :param on_chunk: optional callable receiving every raw chunk as it is read, e.g. to tee it to S3
+        :param artifact: optional ColumnarArtifact receiving the sanitized pan and client_ref_id columns
+        """
+        self.file_extension = file_extension.lower()
+        self.required_columns = {col.lower() for col in required_columns}
+        self.on_chunk = on_chunk
+        self.artifact = artifact
+        self.chunk_size = Configuration.UPLOAD_CHUNK_SIZE
+        self.max_rows = Configuration.MAX_BATCH_ROWS
+        self.row_count = 0
+        self.bytes_read = 0
+        self._row_digests = _RowDigests(Configuration.DUPLICATE_CHECK_BUFFER_ROWS, self.max_rows)
+        self._pending_pans = []
+        self._pending_client_ref_ids = []
+
+    def validate(self, fileobj) -> int:
+        """
+        Validate the uploaded file object and return the number of data rows in it.
+        Raises InterruptedError on the first rule the file breaks.
+
+        :param fileobj: binary file object of the upload
+        :return: row count
+        """
+        if not Configuration.EXCEL_SIZE_LIMIT:
+            logger.error("EXCEL_SIZE_LIMIT is not configured")
+            raise InterruptedError(
+                f"{status.HTTP_500_INTERNAL_SERVER_ERROR}|{ERROR_MAPPING_CONSTANT['MISSING_EXCEL_SIZE_LIMIT']['message']}"
+            )
+
+        reader = _LimitedStreamReader(fileobj, int(Configuration.EXCEL_SIZE_LIMIT), self.on_chunk)
+
+        if self.file_extension == "csv":
+            rows = self._iter_csv_rows(reader)
+        elif self.file_extension == "xlsx":
+            rows = self._iter_xlsx_rows(fileobj, reader)
+        else:
+            raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Unsupported file extension: {self.file_extension}")
+
+        try:
+            self._validate_rows(rows)
+        finally:
+            self._row_digests.close()
+        self.bytes_read = reader.bytes_read
+
+        logger.info(f"Validated {self.row_count} rows ({self.bytes_read} bytes)")
+        return self.row_count
+
+    @staticmethod
+    def validate_file(path: str, file_extension: str, required_columns: set, s3_bucket: str, artifact_s3_key: str) -> int:
+        """
+        Validate an upload saved at path and upload its columnar artifact. Runs in the parsing process pool,
+        so it only takes and returns picklable values.
+
+        :return: row count
+        """
+        artifact = ColumnarArtifact()
+        try:
+            with open(path, "rb") as fileobj:
+                row_count = StreamingUploadValidator(file_extension, required_columns, artifact=artifact).validate(fileobj)
+            artifact.upload(AwsClients.client("s3"), s3_bucket, artifact_s3_key)
+            return row_count
+        finally:
+            artifact.close()
+
+    def _iter_csv_rows(self, reader: _LimitedStreamReader):
+        text_stream = io.TextIOWrapper(
+            io.BufferedReader(reader, buffer_size=self.chunk_size),
+            encoding="utf-8-sig",
+            newline=""
+        )
+        yield from csv.reader(text_stream)
+
+    def _iter_xlsx_rows(self, fileobj, reader: _LimitedStreamReader):
+        # The xlsx central directory sits at the end of the archive, so the size check has to
+        # see the whole stream before openpyxl can open it. The body is never held in memory.
+        while reader.read(self.chunk_size):
+            pass
+        fileobj.seek(0)
+
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield ["" if cell is None else str(cell) for cell in row]
+        finally:
+            workbook.close()
+
+    def _validate_rows(self, rows):
+        header = None
+        pan_index = None
+        client_ref_index = None
+
+        for row in rows:
+            if not any(cell.strip() for cell in row):
+                continue
+
+            if header is None:
+                header = [cell.strip().lower() for cell in row]
+                missing = self.required_columns - set(header)
+                if missing:
+                    raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Missing columns: {', '.join(missing)}")
+                pan_index = header.index("pan")
+                client_ref_index = header.index("client_ref_id") if "client_ref_id" in header else None
+                continue
+
+            self.row_count += 1
+            if self.row_count > self.max_rows:
+                logger.error(f"Uploaded file crossed the row limit of {self.max_rows}")
+                raise InterruptedError(
+                    f"{status.HTTP_400_BAD_REQUEST}|{ERROR_MAPPING_CONSTANT['EXCEEDS_BATCH_SIZE_LIMIT']['message']}"
+                )
+
+            # Only an 8 byte digest per row is kept for the duplicate check, in a bounded buffer
+            digest = hashlib.blake2b("\x1f".join(cell.strip() for cell in row).encode(), digest_size=8).digest()
+            if self._row_digests.add(digest):
+                raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Duplicate records found")
+
+            self._pending_pans.append(self._cell(row, pan_index))
+            if self.artifact:
+                self._pending_client_ref_ids.append(self._cell(row, client_ref_index) or None)
+            if len(self._pending_pans) >= Configuration.PAN_VALIDATION_CHUNK_SIZE:
+                self._check_pending_pans()
+
+        self._check_pending_pans()
+
+        if not self.row_count:
+            raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|File is empty")
+        if self._row_digests.has_duplicates():
+            raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Duplicate records found")
+
+    @staticmethod
+    def _cell(row: list, index: int | None) -> str:
+        return row[index] if index is not None and index < len(row) else ""
+
+    def _check_pending_pans(self):
+        if not self._pending_pans:
+            return
+
+        result = PanValidator.sanitize(pd.Series(self._pending_pans, dtype=object))
+        self._pending_pans = []
+        if len(result.invalid_index):
+            raise InterruptedError(f"{status.HTTP_400_BAD_REQUEST}|Invalid PAN(s) File")
+
+        if self.artifact:
+            self.artifact.write(result.sanitized.tolist(), self._pending_client_ref_ids)
+            self._pending_client_ref_ids = []